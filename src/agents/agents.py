@@ -7,7 +7,9 @@ from src.tools import (
     crawl_tool,
     python_repl_tool,
 )
-from src.tools.search import search
+from src.tools.artifacts import read_artifact
+from src.tools.crawl import crawl_many
+from src.tools.search import search, search_many
 
 from src.llms.llm import get_llm_by_type
 from src.config.agents import AGENT_LLM_MAP
@@ -24,6 +26,6 @@ def create_agent(agent_type: str, tools: list, prompt_template: str, user_id: st
 
 
 # Create agents using the factory function
-research_agent = create_agent("researcher", [search, crawl_tool], "researcher")
-coder_agent = create_agent("coder", [python_repl_tool, bash_tool], "coder")
-browser_agent = create_agent("browser", [browser_tool], "browser")
+research_agent = create_agent("researcher", [search, search_many, crawl_tool, crawl_many, read_artifact], "researcher")
+coder_agent = create_agent("coder", [python_repl_tool, bash_tool, read_artifact], "coder")
+browser_agent = create_agent("browser", [browser_tool, read_artifact], "browser")
@@ -9,8 +9,8 @@ from typing import Dict, List, Any, Optional, Union, Set
 import weakref
 
 from fastapi import FastAPI, HTTPException, Request, Header
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 from sse_starlette.sse import EventSourceResponse
 import asyncio
@@ -18,6 +18,7 @@ from typing import AsyncGenerator, Dict, List, Any
 
 from src.graph import build_graph
 from src.config import TEAM_MEMBERS, TEAM_MEMBER_CONFIGRATIONS, BROWSER_HISTORY_DIR
+from src.config.env import BROWSER_HISTORY_WAIT_SECONDS
 from src.service.workflow_service import run_agent_workflow
 from src.services.user_service import UserService
 from src.middleware.auth_middleware import AuthMiddleware
@@ -27,6 +28,7 @@ from src.routers.payments import router as payments_router
 from src.routers.auth import router as auth_router
 from src.routers.subscription import router as subscription_router
 from src.models.user import User
+from src.utils.file_serving import serve_file
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -61,6 +63,12 @@ active_tasks: Dict[str, asyncio.Task] = {}
 task_abort_events: Dict[str, asyncio.Event] = {}
 # Track tasks by user ID for bulk operations
 user_tasks: Dict[int, Set[str]] = {}
+# Browser task recordings served by /api/browser_history
+BROWSER_HISTORY_MEDIA_TYPES = {".gif": "image/gif", ".webp": "image/webp"}
+# Recordings are write-once under unique names, so clients may keep them
+BROWSER_HISTORY_CACHE_CONTROL = "private, max-age=604800, immutable"
+# Seconds clients wait before asking again for a recording that is still rendering
+BROWSER_HISTORY_RETRY_AFTER = 2
 
 
 class ChatMessage(BaseModel):
@@ -82,8 +90,14 @@ class ChatRequest(BaseModel):
     search_before_planning: Optional[bool] = Field(
         False, description="Whether to search before planning"
     )
+    speculative_planning: Optional[bool] = Field(
+        None, description="Whether to start planning while the coordinator is still deciding"
+    )
     team_members: Optional[list] = Field(None, description="enabled team members")
     thread_id: Optional[str] = Field(None, description="Conversation thread ID for state persistence")
+    browser_history_format: Optional[str] = Field(
+        None, description="Browser task recording: gif, webp or off (defaults to the user's setting)"
+    )
 
 
 class UserRegisterRequest(BaseModel):
@@ -215,6 +229,8 @@ async def chat_endpoint(request: ChatRequest, req: Request, authorization: str =
                         user_id=user_id,
                         request_headers=dict(req.headers),
                         thread_id=request.thread_id,
+                        speculative_planning=request.speculative_planning,
+                        browser_history_format=request.browser_history_format,
                     )
                 )
                 async for event in generator:
@@ -279,23 +295,77 @@ async def chat_endpoint(request: ChatRequest, req: Request, authorization: str =
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/browser_history")
+async def list_browser_history(workflow_id: str, authorization: str = Header(None)):
+    """
+    List the browser recordings of a workflow.
+
+    Args:
+        workflow_id: The workflow whose recordings to list
+        authorization: Bearer token; recordings of other users are not listed
+
+    Returns:
+        The recordings, oldest first, with `ready` False while still rendering
+    """
+    from src.utils.browser_history_store import browser_history_store
+
+    user_id = None
+    if authorization:
+        try:
+            user_id = UserService.get_user_id_from_authorization(authorization)
+        except Exception as e:
+            logger.warning(f"Failed to get user_id from token: {e}")
+    recordings = [
+        {
+            "filename": item["filename"],
+            "url": f"/api/browser_history/{item['filename']}",
+            "size": item["size"],
+            "created": item["created"],
+            "ready": item["ready"],
+        }
+        for item in await asyncio.to_thread(browser_history_store.list_workflow, workflow_id)
+        if item["user_id"] is None or item["user_id"] == user_id
+    ]
+    return {"workflow_id": workflow_id, "recordings": recordings}
+
+
 @app.get("/api/browser_history/{filename}")
-async def get_browser_history_file(filename: str):
+async def get_browser_history_file(filename: str, request: Request):
     """
-    Get a specific browser history GIF file.
+    Get a specific browser history recording (GIF or animated WebP).
+
+    Recordings are rendered in the background, so a file may not exist yet
+    right after the browser task finished: the request then waits for the
+    render, and answers 202 with Retry-After if it is still running. Recordings
+    never change once written, so they are served with a strong ETag, long-lived
+    Cache-Control and byte-range support.
 
     Args:
-        filename: The filename of the GIF to retrieve
+        filename: The filename of the recording to retrieve
+        request: The request (conditional and Range headers)
 
     Returns:
-        The GIF file
+        The recording file (200, 206 or 304), or 202 while it is rendering
     """
+    from src.utils.browser_history_store import browser_history_store
+
     try:
         file_path = os.path.join(BROWSER_HISTORY_DIR, filename)
-        if not os.path.exists(file_path) or not filename.endswith(".gif"):
-            raise HTTPException(status_code=404, detail="File not found")
+        media_type = BROWSER_HISTORY_MEDIA_TYPES.get(os.path.splitext(filename)[1])
+        if media_type is None or os.path.basename(filename) != filename:
+            raise HTTPException(status_code=404, detail="File not found", headers={"Cache-Control": "no-store"})
+        if not os.path.exists(file_path):
+            # 录像在后台渲染：渲染中的录像短暂等待，仍未完成时让客户端稍后重试
+            rendered = await browser_history_store.wait_until_rendered(filename, BROWSER_HISTORY_WAIT_SECONDS)
+            if not rendered:
+                if browser_history_store.is_pending(filename):
+                    return Response(
+                        status_code=202,
+                        headers={"Retry-After": str(BROWSER_HISTORY_RETRY_AFTER), "Cache-Control": "no-store"},
+                    )
+                raise HTTPException(status_code=404, detail="File not found", headers={"Cache-Control": "no-store"})
 
-        return FileResponse(file_path, media_type="image/gif", filename=filename)
+        return serve_file(request, file_path, media_type, BROWSER_HISTORY_CACHE_CONTROL)
     except HTTPException:
         raise
     except Exception as e:
@@ -627,3 +697,39 @@ async def startup_event():
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
+
+    # 预热正文提取进程池，避免首个爬取请求承担进程启动开销
+    try:
+        from src.crawler.extraction_pool import extraction_pool
+        await asyncio.to_thread(extraction_pool.warm)
+        logger.info("Extraction pool warmed up")
+    except Exception as e:
+        logger.warning(f"Failed to warm up extraction pool: {e}")
+
+    # 预启动 Python 沙箱的 forkserver 与预备进程
+    try:
+        from src.config.env import PYTHON_SANDBOX_ENABLED
+        if PYTHON_SANDBOX_ENABLED:
+            from src.utils.python_sandbox import python_sandbox
+            await asyncio.to_thread(python_sandbox.warm)
+            logger.info("Python sandbox warmed up")
+    except Exception as e:
+        logger.warning(f"Failed to warm up Python sandbox: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    应用关闭时释放正文提取进程池、Python 沙箱进程、录像渲染进程与浏览器池
+    """
+    from src.crawler.extraction_pool import extraction_pool
+    extraction_pool.shutdown()
+    from src.utils.python_sandbox import python_sandbox
+    python_sandbox.shutdown()
+    from src.tools.history_renderer import history_renderer
+    history_renderer.shutdown()
+    try:
+        from src.tools.browser_pool import browser_pool
+        await asyncio.to_thread(browser_pool.shutdown)
+    except Exception as e:
+        logger.warning(f"Failed to shut down browser pool: {e}")
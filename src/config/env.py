@@ -28,6 +28,151 @@ VL_MODEL = os.getenv("VL_MODEL", "gpt-4o")
 VL_BASE_URL = os.getenv("VL_BASE_URL")
 VL_API_KEY = os.getenv("VL_API_KEY")
 
+# Client-side LLM rate limiting, shared per (provider, api_key). 0 disables a budget.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+# Tokens reserved per request before the provider reports actual usage
+LLM_ESTIMATED_TOKENS_PER_REQUEST = int(os.getenv("LLM_ESTIMATED_TOKENS_PER_REQUEST", "2000"))
+
+# Supervisor pre-router: resolve mechanical routing decisions without an LLM call
+SUPERVISOR_PRE_ROUTER_ENABLED = os.getenv("SUPERVISOR_PRE_ROUTER_ENABLED", "True") == "True"
+# Fraction of rule decisions that are also sent to the LLM to audit for disagreement
+SUPERVISOR_PRE_ROUTER_AUDIT_RATE = float(os.getenv("SUPERVISOR_PRE_ROUTER_AUDIT_RATE", "0"))
+
+# Speculative planning: start the planner while the coordinator is still deciding.
+# Requests can opt in per call; this sets the default.
+SPECULATIVE_PLANNING_ENABLED = os.getenv("SPECULATIVE_PLANNING_ENABLED", "False") == "True"
+
+# Search result cache: seconds a result stays valid (0 disables), in-memory
+# entries and the SQLite file of the shared tier (empty keeps it in memory only)
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_SIZE = int(os.getenv("SEARCH_CACHE_MAX_SIZE", "512"))
+SEARCH_CACHE_DB_PATH = os.getenv("SEARCH_CACHE_DB_PATH", "cache/search_cache.db")
+
+# Wall-clock budget of one workflow run in seconds (0 = unlimited); network
+# calls made by tools derive their deadlines from what is left of it
+WORKFLOW_TIME_BUDGET_SECONDS = float(os.getenv("WORKFLOW_TIME_BUDGET_SECONDS", "0"))
+
+# Jina reader client: per-request timeout, retries for transient failures and pool size
+JINA_TIMEOUT_SECONDS = float(os.getenv("JINA_TIMEOUT_SECONDS", "30"))
+JINA_MAX_RETRIES = int(os.getenv("JINA_MAX_RETRIES", "2"))
+JINA_MAX_CONNECTIONS = int(os.getenv("JINA_MAX_CONNECTIONS", "20"))
+
+# Crawler: "jina" fetches through the Jina reader, "direct" fetches pages itself
+# (and can revalidate cached pages with ETag / Last-Modified)
+CRAWLER_FETCH_MODE = os.getenv("CRAWLER_FETCH_MODE", "jina")
+# Direct fetches and image probes refuse private, loopback and link-local
+# addresses unless this is set (for deployments crawling an intranet)
+CRAWLER_ALLOW_PRIVATE_URLS = os.getenv("CRAWLER_ALLOW_PRIVATE_URLS", "false").lower() == "true"
+# On-disk crawl cache; TTL in seconds (0 disables). Key mode "url" serves fresh
+# entries without fetching, "content" always fetches but reuses extractions of
+# identical content
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "cache/crawl")
+CRAWL_CACHE_MAX_MB = int(os.getenv("CRAWL_CACHE_MAX_MB", "512"))
+CRAWL_CACHE_TTL = int(os.getenv("CRAWL_CACHE_TTL", "86400"))
+CRAWL_CACHE_KEY_MODE = os.getenv("CRAWL_CACHE_KEY_MODE", "url")
+
+# crawl_many: URLs per call, pages in flight, per-domain concurrency and spacing
+# between request starts (seconds), and the time budget of one batch (seconds)
+CRAWL_MANY_MAX_URLS = int(os.getenv("CRAWL_MANY_MAX_URLS", "10"))
+CRAWL_MANY_CONCURRENCY = int(os.getenv("CRAWL_MANY_CONCURRENCY", "8"))
+CRAWL_DOMAIN_MAX_CONCURRENCY = int(os.getenv("CRAWL_DOMAIN_MAX_CONCURRENCY", "2"))
+CRAWL_DOMAIN_MIN_INTERVAL = float(os.getenv("CRAWL_DOMAIN_MIN_INTERVAL", "1.0"))
+CRAWL_MANY_TIME_BUDGET = float(os.getenv("CRAWL_MANY_TIME_BUDGET", "60"))
+# Crawled articles are split into chunks of about CRAWL_CHUNK_TOKENS tokens; a
+# tool result carries the most relevant chunks up to CRAWL_TOKEN_BUDGET tokens
+CRAWL_CHUNK_TOKENS = int(os.getenv("CRAWL_CHUNK_TOKENS", "256"))
+CRAWL_TOKEN_BUDGET = int(os.getenv("CRAWL_TOKEN_BUDGET", "2000"))
+# Near-duplicate search results and pages within a workflow are collapsed when
+# their SimHash fingerprints differ in at most DEDUP_MAX_DISTANCE of 64 bits
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "True") == "True"
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "6"))
+# Images sent with crawled content: at most IMAGE_MAX_PER_MESSAGE per result,
+# dropping those whose URL declares a side below IMAGE_MIN_DIMENSION pixels.
+# With probing on, candidates are HEAD-requested and non-images or files under
+# IMAGE_PROBE_MIN_BYTES are dropped (IMAGE_PROBE_TIMEOUT seconds per result)
+IMAGE_MAX_PER_MESSAGE = int(os.getenv("IMAGE_MAX_PER_MESSAGE", "4"))
+IMAGE_MIN_DIMENSION = int(os.getenv("IMAGE_MIN_DIMENSION", "100"))
+IMAGE_PROBE_ENABLED = os.getenv("IMAGE_PROBE_ENABLED", "False") == "True"
+IMAGE_PROBE_MIN_BYTES = int(os.getenv("IMAGE_PROBE_MIN_BYTES", "4096"))
+IMAGE_PROBE_TIMEOUT = float(os.getenv("IMAGE_PROBE_TIMEOUT", "3"))
+
+# python_repl_tool sandbox: one worker process per conversation thread (pre-forked
+# with numpy/pandas loaded). Limits: live sessions, spare workers, idle eviction
+# (seconds), per-call timeout (seconds) and address space per worker (MB, 0 = none)
+PYTHON_SANDBOX_ENABLED = os.getenv("PYTHON_SANDBOX_ENABLED", "True") == "True"
+PYTHON_SANDBOX_MAX_WORKERS = int(os.getenv("PYTHON_SANDBOX_MAX_WORKERS", "8"))
+PYTHON_SANDBOX_SPARES = int(os.getenv("PYTHON_SANDBOX_SPARES", "1"))
+PYTHON_SANDBOX_IDLE_TTL = float(os.getenv("PYTHON_SANDBOX_IDLE_TTL", "900"))
+PYTHON_SANDBOX_TIMEOUT = float(os.getenv("PYTHON_SANDBOX_TIMEOUT", "60"))
+PYTHON_SANDBOX_MEMORY_MB = int(os.getenv("PYTHON_SANDBOX_MEMORY_MB", "2048"))
+# bash_tool keeps at most this many bytes of stdout (and of stderr): head and tail
+BASH_MAX_OUTPUT_BYTES = int(os.getenv("BASH_MAX_OUTPUT_BYTES", str(64 * 1024)))
+# Identical tool calls within one workflow (same tool, same arguments) reuse the
+# first result; side-effecting tools (bash, python, browser, file writes) opt out
+TOOL_MEMO_ENABLED = os.getenv("TOOL_MEMO_ENABLED", "True") == "True"
+# Tool results over their budget are cut before entering the conversation; the
+# full output is kept in the artifact store (TTL seconds, total size in MB) and
+# can be read back with read_artifact. Per-tool token budgets: "tool=tokens,..."
+TOOL_RESULT_GOVERNOR_ENABLED = os.getenv("TOOL_RESULT_GOVERNOR_ENABLED", "True") == "True"
+TOOL_RESULT_MAX_TOKENS = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "4000"))
+TOOL_RESULT_MAX_BYTES = int(os.getenv("TOOL_RESULT_MAX_BYTES", str(32 * 1024)))
+TOOL_RESULT_TOKEN_BUDGETS = os.getenv(
+    "TOOL_RESULT_TOKEN_BUDGETS", "crawl_many=12000,bash_tool=2000,python_repl_tool=2000"
+)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "cache/artifacts")
+ARTIFACT_TTL = float(os.getenv("ARTIFACT_TTL", "86400"))
+ARTIFACT_MAX_MB = int(os.getenv("ARTIFACT_MAX_MB", "256"))
+# Every tool call gets a deadline (the earlier of its own limit and the workflow
+# budget) and is cancelled when the workflow is aborted. Default limit in seconds
+# and per-tool overrides: "tool=seconds,..." (0 = no limit of its own)
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "300"))
+TOOL_TIMEOUTS = os.getenv(
+    "TOOL_TIMEOUTS", "search=60,search_many=60,crawl_tool=90,browser=900,smart_browser=900"
+)
+# Warm browsers shared by browser tasks across workflows: processes kept running,
+# leases served by one browser before it is replaced, memory of all browsers (MB)
+# above which idle ones are recycled, and seconds an unused browser is kept
+BROWSER_POOL_MAX_BROWSERS = int(os.getenv("BROWSER_POOL_MAX_BROWSERS", "2"))
+BROWSER_POOL_MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES", "20"))
+BROWSER_POOL_MAX_MEMORY_MB = int(os.getenv("BROWSER_POOL_MAX_MEMORY_MB", "2048"))
+BROWSER_POOL_IDLE_TTL = float(os.getenv("BROWSER_POOL_IDLE_TTL", "600"))
+BROWSER_POOL_MAX_OVERFLOW = int(os.getenv("BROWSER_POOL_MAX_OVERFLOW", "2"))
+BROWSER_POOL_MEMORY_CHECK_INTERVAL = float(os.getenv("BROWSER_POOL_MEMORY_CHECK_INTERVAL", "30"))
+# Per-user browser storage state (cookies, localStorage) reused by later browser
+# tasks, encrypted with BROWSER_STATE_KEY (a Fernet key; derived from
+# JWT_SECRET_KEY when empty). States expire after TTL seconds; MAX_KB per user
+BROWSER_STATE_ENABLED = os.getenv("BROWSER_STATE_ENABLED", "False") == "True"
+BROWSER_STATE_DIR = os.getenv("BROWSER_STATE_DIR", "cache/browser_state")
+BROWSER_STATE_KEY = os.getenv("BROWSER_STATE_KEY", "")
+BROWSER_STATE_TTL = float(os.getenv("BROWSER_STATE_TTL", str(7 * 86400)))
+BROWSER_STATE_MAX_KB = int(os.getenv("BROWSER_STATE_MAX_KB", "512"))
+# Browser task recordings, rendered in the background from step screenshots:
+# "gif", "webp" (smaller, faster) or "off"; overridable per request and in the
+# user's browser settings. Render workers (0 = a background thread), frame
+# duration (ms), max frames per recording and max frame width (px)
+BROWSER_HISTORY_FORMAT = os.getenv("BROWSER_HISTORY_FORMAT", "gif")
+BROWSER_HISTORY_WORKERS = int(os.getenv("BROWSER_HISTORY_WORKERS", "1"))
+BROWSER_HISTORY_FRAME_MS = int(os.getenv("BROWSER_HISTORY_FRAME_MS", "1000"))
+BROWSER_HISTORY_MAX_FRAMES = int(os.getenv("BROWSER_HISTORY_MAX_FRAMES", "60"))
+BROWSER_HISTORY_MAX_WIDTH = int(os.getenv("BROWSER_HISTORY_MAX_WIDTH", "1280"))
+# Retention of browser recordings: per-user disk quota (MB, anonymous users
+# share one; 0 = unlimited) and age in days after which they are removed
+BROWSER_HISTORY_USER_QUOTA_MB = int(os.getenv("BROWSER_HISTORY_USER_QUOTA_MB", "200"))
+BROWSER_HISTORY_TTL_DAYS = float(os.getenv("BROWSER_HISTORY_TTL_DAYS", "30"))
+# Seconds a request for a recording that is still rendering waits before a 202
+BROWSER_HISTORY_WAIT_SECONDS = float(os.getenv("BROWSER_HISTORY_WAIT_SECONDS", "10"))
+# tool_progress SSE events: at most one per tool call per interval (seconds);
+# text accumulated in between is merged, keeping its last MAX_CHARS characters
+TOOL_PROGRESS_MIN_INTERVAL = float(os.getenv("TOOL_PROGRESS_MIN_INTERVAL", "0.5"))
+TOOL_PROGRESS_MAX_CHARS = int(os.getenv("TOOL_PROGRESS_MAX_CHARS", "4000"))
+
+# Readability/markdown extraction process pool: workers (0 = inline), per-page
+# timeout in seconds and the page size cap in bytes (larger pages are truncated)
+EXTRACTION_POOL_WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", "2"))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "30"))
+EXTRACTION_MAX_HTML_BYTES = int(os.getenv("EXTRACTION_MAX_HTML_BYTES", str(2 * 1024 * 1024)))
+
 # Browser Instance configuration
 # 默认使用 Playwright 内置的 Chromium，避免与用户本地 Chrome 冲突
 # 如果设置了 CHROME_INSTANCE_PATH，则使用指定的浏览器路径
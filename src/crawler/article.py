@@ -1,33 +1,86 @@
 import re
+from typing import Optional
 from urllib.parse import urljoin
 
 from markdownify import markdownify as md
 
+from src.utils.chunking import ChunkPage, chunk_markdown, paginate_chunks
+from .image_policy import ImagePolicy, image_policy
+
 
 class Article:
-    def __init__(self, title: str, html_content: str, url: str = ""):
+    def __init__(
+        self,
+        title: str,
+        html_content: str,
+        url: str = "",
+        markdown: Optional[str] = None,
+    ):
         self.title = title
         self.html_content = html_content
         self.url = url
+        # Body markdown precomputed by the crawl cache; converted lazily otherwise
+        self._markdown = markdown
+        # (chunk size, chunks) of the body, computed on first use
+        self._chunks = None
+
+    @property
+    def body_markdown(self) -> str:
+        if self._markdown is None:
+            self._markdown = md(self.html_content)
+        return self._markdown
 
     def to_markdown(self, including_title: bool = True) -> str:
         markdown = ""
         if including_title:
             markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
+        markdown += self.body_markdown
         return markdown
 
-    def to_message(self) -> list[dict]:
-        image_pattern = r"!\[.*?\]\((.*?)\)"
+    def chunk_page(
+        self,
+        query: Optional[str] = None,
+        page: int = 1,
+        token_budget: int = 2000,
+        chunk_tokens: int = 256,
+    ) -> ChunkPage:
+        """Return one token-budgeted page of body chunks ranked against `query`."""
+        if self._chunks is None or self._chunks[0] != chunk_tokens:
+            self._chunks = (chunk_tokens, chunk_markdown(self.body_markdown, chunk_tokens))
+        return paginate_chunks(self._chunks[1], query, token_budget, page)
 
-        content: list[dict[str, str]] = []
-        parts = re.split(image_pattern, self.to_markdown())
+    def to_message(
+        self,
+        markdown: Optional[str] = None,
+        policy: Optional[ImagePolicy] = None,
+    ) -> list[dict]:
+        """
+        Split markdown (the whole article by default) into text and image parts.
 
-        for i, part in enumerate(parts):
-            if i % 2 == 1:
-                image_url = urljoin(self.url, part.strip())
+        Only images accepted by the image policy become `image_url` parts;
+        the text around dropped images is merged.
+        """
+        image_pattern = r"!\[(.*?)\]\((.*?)\)"
+
+        parts = re.split(image_pattern, self.to_markdown() if markdown is None else markdown)
+        # re.split with two groups: text, alt, src, text, alt, src, ..., text
+        images = [
+            (urljoin(self.url, (parts[i + 1].strip().split() or [""])[0]), parts[i])
+            for i in range(1, len(parts), 3)
+        ]
+        kept = set((policy or image_policy).select(images))
+
+        content: list[dict[str, str]] = []
+        text = parts[0].strip()
+        for (image_url, _), following in zip(images, parts[3::3]):
+            if image_url in kept:
+                content.append({"type": "text", "text": text})
                 content.append({"type": "image_url", "image_url": {"url": image_url}})
+                # An image appears once even if the page repeats it
+                kept.discard(image_url)
+                text = following.strip()
             else:
-                content.append({"type": "text", "text": part.strip()})
+                text = "\n\n".join(t for t in (text, following.strip()) if t)
+        content.append({"type": "text", "text": text})
 
         return content
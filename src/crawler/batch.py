@@ -0,0 +1,217 @@
+"""
+Concurrent multi-page crawling with per-domain politeness.
+
+`acrawl_many` fetches a batch of URLs on the shared background loop and yields
+each page as soon as it completes. A `DomainLimiter` caps how many requests hit
+one host at a time and spaces request starts per host; the whole batch is
+bounded by a deadline, after which unfinished pages are reported as timed out.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from src.config.env import (
+    CRAWL_MANY_CONCURRENCY,
+    CRAWL_DOMAIN_MAX_CONCURRENCY,
+    CRAWL_DOMAIN_MIN_INTERVAL,
+)
+from src.utils.background_loop import background_loop
+from .article import Article
+from .crawler import Crawler
+
+logger = logging.getLogger(__name__)
+
+# Drop idle per-domain state once this many hosts are tracked
+MAX_TRACKED_DOMAINS = 1024
+# How often the sync iterator checks for cancellation while waiting (seconds)
+CANCEL_POLL_SECONDS = 0.1
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    article: Optional[Article] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def domain_of(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class _DomainState:
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.spacing = asyncio.Lock()
+        self.next_start = 0.0
+        self.active = 0
+
+
+class DomainLimiter:
+    """Per-domain concurrency cap plus minimum spacing between request starts."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        min_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = max(0.0, min_interval)
+        self._clock = clock
+        self._domains: Dict[str, _DomainState] = {}
+
+    def _state(self, domain: str) -> _DomainState:
+        state = self._domains.get(domain)
+        if state is None:
+            if len(self._domains) >= MAX_TRACKED_DOMAINS:
+                now = self._clock()
+                self._domains = {
+                    d: s for d, s in self._domains.items()
+                    if s.active or s.next_start > now
+                }
+            state = self._domains[domain] = _DomainState(self.max_concurrency)
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str, overall: Optional[asyncio.Semaphore] = None):
+        """
+        Hold a request slot for the domain of `url`.
+
+        Args:
+            url: The page about to be requested
+            overall: A batch-wide semaphore, acquired only once the domain's
+                spacing allows the request to start, so tasks waiting on a
+                slow or rate-limited domain do not hold slots other domains could use
+        """
+        state = self._state(domain_of(url))
+        async with state.semaphore:
+            async with state.spacing:
+                wait = state.next_start - self._clock()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                if overall is not None:
+                    await overall.acquire()
+                state.next_start = self._clock() + self.min_interval
+            state.active += 1
+            try:
+                yield
+            finally:
+                state.active -= 1
+                if overall is not None:
+                    overall.release()
+
+
+# Shared across batches so concurrent workflows stay polite to the same host.
+# Only ever used from the background loop.
+domain_limiter = DomainLimiter(CRAWL_DOMAIN_MAX_CONCURRENCY, CRAWL_DOMAIN_MIN_INTERVAL)
+
+
+async def acrawl_many(
+    crawler: Crawler,
+    urls: List[str],
+    deadline: Optional[float] = None,
+    limiter: Optional[DomainLimiter] = None,
+    concurrency: int = CRAWL_MANY_CONCURRENCY,
+) -> AsyncIterator[CrawlResult]:
+    """
+    Crawl several URLs concurrently, yielding results in completion order.
+
+    Args:
+        crawler: The crawler used for every page
+        urls: Pages to crawl (duplicates are crawled once)
+        deadline: Optional time.monotonic() value for the whole batch
+        limiter: Per-domain limiter; the shared one by default
+        concurrency: Maximum pages in flight overall
+
+    Yields:
+        One CrawlResult per URL; pages still running at the deadline are
+        cancelled and reported with error "timed out"
+    """
+    limiter = limiter or domain_limiter
+    overall = asyncio.Semaphore(max(1, concurrency))
+
+    async def crawl_one(url: str) -> CrawlResult:
+        started = time.monotonic()
+        async with limiter.slot(url, overall):
+            article = await crawler.acrawl(url, deadline)
+        elapsed = time.monotonic() - started
+        if article is None:
+            return CrawlResult(url, error="failed", elapsed=elapsed)
+        return CrawlResult(url, article=article, elapsed=elapsed)
+
+    tasks = {asyncio.ensure_future(crawl_one(url)): url for url in dict.fromkeys(urls)}
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    logger.error(f"Error crawling URL {tasks[task]}: {task.exception()!r}")
+                    yield CrawlResult(tasks[task], error="failed")
+                else:
+                    yield task.result()
+        for task in pending:
+            task.cancel()
+            yield CrawlResult(tasks[task], error="timed out")
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_DONE = object()
+
+
+def iter_crawl_many(
+    crawler: Crawler,
+    urls: List[str],
+    deadline: Optional[float] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Iterator[CrawlResult]:
+    """
+    Sync generator over `acrawl_many` for tools running on executor threads.
+
+    The batch runs on the shared background loop; each result is handed over
+    as soon as its page completes. Setting `cancel_event` stops the batch and
+    ends the iteration.
+    """
+    if background_loop.in_loop_thread():
+        raise RuntimeError("iter_crawl_many() called from the background loop thread")
+    results: "queue.Queue" = queue.Queue()
+
+    async def pump():
+        try:
+            async for result in acrawl_many(crawler, urls, deadline):
+                results.put(result)
+        finally:
+            results.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), background_loop.loop)
+    try:
+        while True:
+            try:
+                item = results.get(timeout=CANCEL_POLL_SECONDS)
+            except queue.Empty:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                continue
+            if item is _DONE:
+                break
+            yield item
+        future.result()
+    finally:
+        # Consumer stopped early: stop the batch too
+        future.cancel()
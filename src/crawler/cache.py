@@ -0,0 +1,313 @@
+"""
+Content-addressed on-disk crawl cache.
+
+Raw HTML and the extracted article are stored once per content hash under
+`<directory>/objects/`; a SQLite index maps URLs to their current content hash
+together with the validators (`ETag`, `Last-Modified`) needed to revalidate
+them. Two URLs serving the same page share one copy and one extraction, and a
+page whose content did not change is never extracted twice.
+
+Eviction is LRU over content objects, bounded by total bytes on disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from src.config.env import (
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_MAX_MB,
+    CRAWL_CACHE_TTL,
+    CRAWL_CACHE_KEY_MODE,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_MODE_URL = "url"
+KEY_MODE_CONTENT = "content"
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CrawlEntry:
+    """A cached page as seen through its URL."""
+
+    url: str
+    content_hash: str
+    title: str
+    markdown: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    fresh: bool
+
+
+class CrawlCache:
+    """URL index plus content-addressed objects with TTL and size-bounded LRU."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl: int = 86400,
+        key_mode: str = KEY_MODE_URL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            directory: Cache root directory
+            max_bytes: Upper bound for the objects stored on disk
+            ttl: Seconds a URL is served without revalidation
+            key_mode: "url" serves fresh URL entries directly; "content" always
+                fetches and only reuses extractions of identical content
+            clock: Time source
+        """
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.key_mode = key_mode
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "revalidated": 0,
+            "extraction_reuses": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+        os.makedirs(self.objects_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                "url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, etag TEXT, "
+                "last_modified TEXT, fetched_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "content_hash TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=5)
+
+    def _object_path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.objects_dir, f"{digest}.{suffix}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    # ------------------------------------------------------------------
+    # Objects
+    # ------------------------------------------------------------------
+
+    def _read_extraction(self, digest: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._object_path(digest, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get_extraction(self, html: str) -> Optional[Dict[str, str]]:
+        """Return the stored {title, markdown} for identical content, if any."""
+        digest = content_hash(html)
+        extraction = self._read_extraction(digest)
+        if extraction is not None:
+            self._touch_object(digest)
+            self._count("extraction_reuses")
+        return extraction
+
+    def _touch_object(self, digest: str) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE objects SET last_access = ? WHERE content_hash = ?",
+                    (self._clock(), digest),
+                )
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"更新爬取缓存访问时间失败: {e}")
+
+    # ------------------------------------------------------------------
+    # URL entries
+    # ------------------------------------------------------------------
+
+    def get(self, url: str) -> Optional[CrawlEntry]:
+        """Return the cached entry for `url` (fresh or stale), or None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT content_hash, etag, last_modified, fetched_at FROM urls WHERE url = ?",
+                    (url,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"读取爬取缓存失败: {e}")
+            return None
+        if row is None:
+            self._count("misses")
+            return None
+        digest, etag, last_modified, fetched_at = row
+        extraction = self._read_extraction(digest)
+        if extraction is None:
+            # Object evicted or removed behind our back
+            self._count("misses")
+            return None
+        self._touch_object(digest)
+        fresh = self.key_mode == KEY_MODE_URL and self._clock() - fetched_at < self.ttl
+        return CrawlEntry(
+            url=url,
+            content_hash=digest,
+            title=extraction.get("title") or "",
+            markdown=extraction.get("markdown") or "",
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+            fresh=fresh,
+        )
+
+    def record_hit(self, revalidated: bool = False) -> None:
+        self._count("revalidated" if revalidated else "hits")
+
+    def touch(self, url: str) -> None:
+        """Mark `url` as freshly validated (e.g. after a 304 Not Modified)."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE urls SET fetched_at = ? WHERE url = ?", (self._clock(), url)
+                )
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"更新爬取缓存失败: {e}")
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        title: str,
+        markdown: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> str:
+        """
+        Store a fetched page and its extraction.
+
+        Returns:
+            The content hash the page is stored under
+        """
+        digest = content_hash(html)
+        now = self._clock()
+        try:
+            html_path = self._object_path(digest, "html")
+            json_path = self._object_path(digest, "json")
+            if not os.path.exists(json_path):
+                with open(html_path, "w", encoding="utf-8") as f:
+                    f.write(html)
+                # Write the extraction last: its presence marks a complete object
+                tmp_path = f"{json_path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"title": title, "markdown": markdown}, f, ensure_ascii=False)
+                os.replace(tmp_path, json_path)
+            size = os.path.getsize(html_path) + os.path.getsize(json_path)
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO objects (content_hash, size, last_access) "
+                    "VALUES (?, ?, ?)",
+                    (digest, size, now),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, content_hash, etag, last_modified, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, digest, etag, last_modified, now),
+                )
+                self.stats["stores"] += 1
+            self._evict()
+        except (OSError, sqlite3.Error) as e:
+            self._count("errors")
+            logger.warning(f"写入爬取缓存失败: {e}")
+        return digest
+
+    # ------------------------------------------------------------------
+    # Eviction and stats
+    # ------------------------------------------------------------------
+
+    def _evict(self) -> None:
+        with self._lock, self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for digest, size in conn.execute(
+                "SELECT content_hash, size FROM objects ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM objects WHERE content_hash = ?", (digest,))
+                conn.execute("DELETE FROM urls WHERE content_hash = ?", (digest,))
+                for suffix in ("json", "html"):
+                    try:
+                        os.remove(self._object_path(digest, suffix))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            with self._connect() as conn:
+                objects, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects"
+                ).fetchone()
+                urls = conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        except sqlite3.Error:
+            objects, total, urls = 0, 0, 0
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["revalidated"] + self.stats["misses"]
+            served = self.stats["hits"] + self.stats["revalidated"]
+            hit_rate = (served / lookups * 100) if lookups > 0 else 0
+            return {
+                "urls": urls,
+                "objects": objects,
+                "size_bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "key_mode": self.key_mode,
+                **self.stats,
+                "hit_rate": f"{hit_rate:.2f}%",
+            }
+
+
+_crawl_cache: Optional[CrawlCache] = None
+_crawl_cache_lock = threading.Lock()
+
+
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """Return the shared crawl cache, or None when it is disabled."""
+    global _crawl_cache
+    if CRAWL_CACHE_TTL <= 0 or not CRAWL_CACHE_DIR:
+        return None
+    with _crawl_cache_lock:
+        if _crawl_cache is None:
+            try:
+                _crawl_cache = CrawlCache(
+                    CRAWL_CACHE_DIR,
+                    max_bytes=CRAWL_CACHE_MAX_MB * 1024 * 1024,
+                    ttl=CRAWL_CACHE_TTL,
+                    key_mode=CRAWL_CACHE_KEY_MODE,
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"爬取缓存初始化失败，已禁用: {e}")
+                return None
+        return _crawl_cache
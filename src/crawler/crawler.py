@@ -1,34 +1,155 @@
+import asyncio
 import sys
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 
+from src.config.env import CRAWLER_FETCH_MODE
 from .article import Article
+from .cache import CrawlCache, CrawlEntry, get_crawl_cache
+from .direct_client import DirectClient, FetchResult
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
 
 logger = logging.getLogger(__name__)
 
+_UNSET = object()
+
 
 class Crawler:
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        cache: Optional[CrawlCache] = _UNSET,
+    ):
         self.config = config or {}
         self.jina_client = JinaClient(self.config)
+        self.direct_client = DirectClient(self.config)
         self.readability_extractor = ReadabilityExtractor()
+        self.fetch_mode = self.config.get('fetch_mode') or CRAWLER_FETCH_MODE
+        self.cache = get_crawl_cache() if cache is _UNSET else cache
 
     def crawl(self, url: str) -> Optional[Article]:
         """Crawl a URL and return an Article object."""
         try:
-            html_content = self.jina_client.get_html(url)
-            if html_content:
-                article = self.readability_extractor.extract(html_content, url)
-                return article
+            entry = self._lookup(url)
+            if entry is not None and entry.fresh:
+                return self._serve(entry)
+
+            if self.fetch_mode == "direct":
+                fetched = self.direct_client.fetch(url, **self._validators(entry))
+            else:
+                fetched = self.jina_client.get_html(url)
+            return self._finish(url, entry, fetched)
+        except Exception as e:
+            logger.error(f"Error crawling URL {url}: {e}")
+            return None
+
+    async def acrawl(self, url: str, deadline: Optional[float] = None) -> Optional[Article]:
+        """
+        Async variant of `crawl`, for use on the shared background loop.
+
+        Cache access and extraction block, so they run in worker threads.
+
+        Args:
+            url: The page to crawl
+            deadline: Optional time.monotonic() value the fetch may not run past
+
+        Returns:
+            The article, or None on failure
+        """
+        try:
+            entry = await asyncio.to_thread(self._lookup, url)
+            if entry is not None and entry.fresh:
+                return self._serve(entry)
+
+            if self.fetch_mode == "direct":
+                fetched = await self.direct_client.afetch(
+                    url, deadline=deadline, **self._validators(entry)
+                )
             else:
-                logger.error(f"Failed to get HTML content for URL: {url}")
-                return None
+                fetched = await self.jina_client.aget_html(url, deadline)
+            return await asyncio.to_thread(self._finish, url, entry, fetched)
         except Exception as e:
             logger.error(f"Error crawling URL {url}: {e}")
             return None
 
+    def _lookup(self, url: str) -> Optional[CrawlEntry]:
+        return self.cache.get(url) if self.cache else None
+
+    def _serve(self, entry: CrawlEntry) -> Article:
+        self.cache.record_hit()
+        logger.info(f"爬取缓存命中: {entry.url}")
+        return self._article_from_entry(entry)
+
+    @staticmethod
+    def _validators(entry: Optional[CrawlEntry]) -> Dict[str, Optional[str]]:
+        return {
+            "etag": entry.etag if entry else None,
+            "last_modified": entry.last_modified if entry else None,
+        }
+
+    def _finish(
+        self,
+        url: str,
+        entry: Optional[CrawlEntry],
+        fetched: Union[FetchResult, str, None],
+    ) -> Optional[Article]:
+        """Turn a fetch (direct FetchResult or Jina HTML) into an article."""
+        etag = last_modified = None
+        if isinstance(fetched, FetchResult):
+            if fetched.not_modified and entry is not None:
+                # 304: the cached copy is still current
+                self.cache.touch(url)
+                self.cache.record_hit(revalidated=True)
+                logger.info(f"爬取缓存重新验证通过: {url}")
+                return self._article_from_entry(entry)
+            html_content = fetched.html
+            etag, last_modified = fetched.etag, fetched.last_modified
+        else:
+            html_content = fetched
+
+        if html_content:
+            return self._extract(html_content, url, etag, last_modified)
+        else:
+            logger.error(f"Failed to get HTML content for URL: {url}")
+            return None
+
+    def _extract(
+        self,
+        html_content: str,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Article:
+        """Extract an article, reusing the cached extraction of identical content."""
+        if self.cache is None:
+            return self.readability_extractor.extract(html_content, url)
+        extraction = self.cache.get_extraction(html_content)
+        if extraction is not None:
+            article = Article(
+                title=extraction.get("title"),
+                html_content="",
+                url=url,
+                markdown=extraction.get("markdown"),
+            )
+        else:
+            article = self.readability_extractor.extract(html_content, url)
+        self.cache.put(
+            url,
+            html_content,
+            article.title,
+            article.body_markdown,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        return article
+
+    @staticmethod
+    def _article_from_entry(entry) -> Article:
+        return Article(
+            title=entry.title, html_content="", url=entry.url, markdown=entry.markdown
+        )
+
 
 if __name__ == "__main__":
     if len(sys.argv) == 2:
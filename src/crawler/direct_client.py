@@ -0,0 +1,117 @@
+"""
+Direct page fetching with conditional revalidation.
+
+Used when `CRAWLER_FETCH_MODE=direct`: the page is requested from its origin
+with `If-None-Match` / `If-Modified-Since` built from the cached validators,
+so an unchanged page costs a 304 instead of a download and an extraction.
+Only public addresses are fetched, including after redirects (see url_guard).
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.utils.background_loop import background_loop
+from src.utils.workflow_context import remaining_workflow_time
+from .jina_client import get_http_client
+from .url_guard import UnsafeURLError, guarded_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+@dataclass
+class FetchResult:
+    status_code: int
+    html: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+class DirectClient:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or {}
+        self.timeout = float(self.config.get('timeout') or 30)
+        self.user_agent = self.config.get('user_agent') or DEFAULT_USER_AGENT
+
+    async def afetch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Optional[FetchResult]:
+        """
+        Fetch a page, revalidating when validators are given.
+
+        Args:
+            url: The page to fetch
+            etag: Cached ETag, sent as If-None-Match
+            last_modified: Cached Last-Modified, sent as If-Modified-Since
+            deadline: Optional time.monotonic() value the request may not run past
+
+        Returns:
+            The fetch result (status 200 or 304), or None on failure
+        """
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                logger.error(f"Deadline exceeded before fetching {url}")
+                return None
+        headers = {"User-Agent": self.user_agent}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            response = await guarded_request(
+                get_http_client(), "GET", url, headers=headers, timeout=timeout
+            )
+        except UnsafeURLError as e:
+            logger.warning(str(e))
+            return None
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching {url}: {e!r}")
+            return None
+        if response.status_code not in (200, 304):
+            logger.error(f"Fetching {url} failed: HTTP {response.status_code}")
+            return None
+        return FetchResult(
+            status_code=response.status_code,
+            html=response.text if response.status_code == 200 else None,
+            etag=response.headers.get("ETag") or etag,
+            last_modified=response.headers.get("Last-Modified") or last_modified,
+        )
+
+    def fetch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Optional[FetchResult]:
+        """Sync shim over `afetch`, bounded by the workflow time budget."""
+        remaining = remaining_workflow_time()
+        if remaining is not None and remaining <= 0:
+            logger.error(f"Workflow time budget exhausted, not fetching {url}")
+            return None
+        deadline = time.monotonic() + remaining if remaining is not None else None
+        wait = self.timeout if remaining is None else min(self.timeout, remaining)
+        try:
+            return background_loop.run(
+                self.afetch(url, etag, last_modified, deadline), timeout=wait + 1
+            )
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
@@ -0,0 +1,279 @@
+"""
+Readability extraction and markdown conversion in a bounded set of worker processes.
+
+Both steps are CPU-heavy on large pages. Running them inline holds the GIL on
+the tool's executor thread and stalls every other workflow in the process, so
+they run in worker processes instead. Workers are spawned (not forked: the
+server is multi-threaded) and warmed up once; oversized pages are truncated
+before they are shipped. Each worker has its own pipe, so an extraction that
+overruns its timeout (counted from when a worker picks it up, not while it
+waits for one) gets only its own worker killed and replaced; extractions of
+other workflows keep running.
+"""
+
+import contextlib
+import logging
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.config.env import (
+    EXTRACTION_POOL_WORKERS,
+    EXTRACTION_TIMEOUT_SECONDS,
+    EXTRACTION_MAX_HTML_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionWorkerError(RuntimeError):
+    """The worker process died while running a task."""
+
+
+def extract_article(html: str) -> Dict[str, str]:
+    """Run readability and markdownify on `html`; executes in a worker process."""
+    from markdownify import markdownify as md
+    from readabilipy import simple_json_from_html_string
+
+    article = simple_json_from_html_string(html, use_readability=True)
+    return {
+        "title": article.get("title") or "",
+        "markdown": md(article.get("content") or ""),
+    }
+
+
+def _warm_up() -> None:
+    # Pay the import cost once per worker instead of on the first real page
+    import markdownify  # noqa: F401
+    import readabilipy  # noqa: F401
+
+
+def _noop() -> None:
+    return None
+
+
+def _worker_main(conn) -> None:
+    """Worker loop: run (fn, args) requests and send back their outcome."""
+    _warm_up()
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        fn, args = request
+        try:
+            reply = ("ok", fn(*args))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            return
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        with contextlib.suppress(Exception):
+            self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+def truncate_html(html: str, max_bytes: int) -> str:
+    """Cap `html` at `max_bytes` of UTF-8 without splitting a character."""
+    if max_bytes <= 0:
+        return html
+    encoded = html.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return html
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+class ExtractionPool:
+    """Lazily started, self-healing set of extraction worker processes."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 30.0,
+        max_html_bytes: int = 2 * 1024 * 1024,
+        mp_context: str = "spawn",
+    ):
+        """
+        Args:
+            max_workers: Worker processes (0 runs extraction inline)
+            timeout: Seconds one task may run before its worker is killed
+            max_html_bytes: Pages larger than this are truncated before extraction
+            mp_context: multiprocessing start method for the workers
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_html_bytes = max_html_bytes
+        self.mp_context = mp_context
+        self._ctx = multiprocessing.get_context(mp_context)
+        # One slot per worker; tasks beyond that wait here, outside their timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        self._idle: List[_Worker] = []
+        self._workers: Set[_Worker] = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "tasks": 0,
+            "inline": 0,
+            "truncated": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "restarts": 0,
+        }
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+                self._workers.discard(worker)
+        worker = _Worker(self._ctx)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _checkin(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._idle.append(worker)
+                return
+        # The pool was shut down while the task ran
+        worker.kill()
+
+    def _discard(self, worker: _Worker, stat: str) -> None:
+        """Kill one worker (the others keep running) and count why."""
+        with self._lock:
+            self._workers.discard(worker)
+            self.stats[stat] += 1
+            self.stats["restarts"] += 1
+        worker.kill()
+
+    def warm(self) -> None:
+        """Start every worker now instead of on the first extraction."""
+        if self.max_workers <= 0:
+            return
+        acquired = []
+        try:
+            for _ in range(self.max_workers):
+                self._slots.acquire()
+                acquired.append(self._checkout())
+            for worker in acquired:
+                worker.conn.send((_noop, ()))
+            for worker in acquired:
+                if worker.conn.poll(self.timeout):
+                    worker.conn.recv()
+        finally:
+            for worker in acquired:
+                self._checkin(worker)
+                self._slots.release()
+
+    def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a picklable, module-level `fn(*args)` in a worker and wait for it.
+
+        Raises:
+            TimeoutError: If the task ran longer than `timeout` (its worker is killed)
+            ExtractionWorkerError: If the worker died while running the task
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self.stats["tasks"] += 1
+        if self.max_workers <= 0:
+            with self._lock:
+                self.stats["inline"] += 1
+            return fn(*args)
+
+        with self._slots:
+            worker = self._checkout()
+            try:
+                worker.conn.send((fn, args))
+            except (EOFError, OSError):
+                self._discard(worker, "errors")
+                raise ExtractionWorkerError("Extraction worker is not running")
+            except Exception:
+                # fn or its arguments could not be pickled; the worker is untouched
+                self._checkin(worker)
+                raise
+            # The timeout starts once a worker has the task
+            try:
+                finished = worker.conn.poll(timeout)
+                reply = worker.conn.recv() if finished else None
+            except (EOFError, OSError):
+                self._discard(worker, "errors")
+                raise ExtractionWorkerError("Extraction worker died")
+            if reply is None:
+                self._discard(worker, "timeouts")
+                logger.warning(f"正文提取超过 {timeout}s，已终止该工作进程")
+                raise TimeoutError(f"Extraction did not finish within {timeout}s")
+            self._checkin(worker)
+        status, value = reply
+        if status == "error":
+            raise value
+        return value
+
+    def extract(self, html: str) -> Dict[str, str]:
+        """
+        Extract {title, markdown} from a page.
+
+        Args:
+            html: The raw page
+
+        Returns:
+            The article title and body markdown
+        """
+        capped = truncate_html(html, self.max_html_bytes)
+        if len(capped) < len(html):
+            with self._lock:
+                self.stats["truncated"] += 1
+            logger.warning(
+                f"页面过大，已截断至 {self.max_html_bytes} 字节后提取 (原始 {len(html)} 字符)"
+            )
+        started = time.monotonic()
+        result = self.run(extract_article, capped)
+        logger.debug(f"正文提取耗时 {time.monotonic() - started:.2f}s")
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._workers, self._idle = list(self._workers), set(), []
+        for worker in workers:
+            worker.kill()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": bool(self._workers),
+                "workers": len(self._workers),
+                "idle_workers": len(self._idle),
+                **self.stats,
+            }
+
+
+# Shared by every crawler in the process
+extraction_pool = ExtractionPool(
+    max_workers=EXTRACTION_POOL_WORKERS,
+    timeout=EXTRACTION_TIMEOUT_SECONDS,
+    max_html_bytes=EXTRACTION_MAX_HTML_BYTES,
+)
@@ -0,0 +1,178 @@
+"""
+Which images of a crawled article are worth sending to the LLM.
+
+Pages carry many images that are noise to a model: icons, logos, tracking
+pixels, avatars, sprites, tiny thumbnails and the same picture at several
+sizes. Each one a multimodal provider still has to download and encode, so
+`ImagePolicy` drops decorative and duplicate images by URL and alt text, can
+probe the rest with HEAD requests (through the shared pooled client, public
+addresses only) to drop non-images and tiny files, and caps the number of
+images per message.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import httpx
+
+from src.config.env import (
+    IMAGE_MAX_PER_MESSAGE,
+    IMAGE_MIN_DIMENSION,
+    IMAGE_PROBE_ENABLED,
+    IMAGE_PROBE_MIN_BYTES,
+    IMAGE_PROBE_TIMEOUT,
+)
+from src.utils.background_loop import background_loop
+from .jina_client import get_http_client
+from .url_guard import UnsafeURLError, guarded_request
+
+logger = logging.getLogger(__name__)
+
+_DECORATIVE_PATTERN = re.compile(
+    r"(^|[^a-z])(icon|favicon|logo|sprite|avatar|badge|emoji|spacer|blank|pixel|"
+    r"tracking|tracker|beacon|button|banner|placeholder|loading|spinner|ads?)([^a-z]|$)"
+)
+# e.g. photo-50x50.jpg, thumb_120x90.png
+_FILENAME_SIZE_PATTERN = re.compile(r"(\d{1,4})x(\d{1,4})(?=[._-]|$)")
+_SIZE_PARAMS = ("w", "h", "width", "height", "size", "sz")
+_SKIPPED_EXTENSIONS = (".svg", ".ico")
+
+
+def image_key(url: str) -> str:
+    """Identity of an image for deduplication: the URL without query or fragment."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, "", ""))
+
+
+def _declared_size(url: str) -> Optional[int]:
+    """Smallest dimension the URL itself declares (query params or filename), if any."""
+    parts = urlsplit(url)
+    sizes: List[int] = []
+    for name, values in parse_qs(parts.query).items():
+        if name.lower() in _SIZE_PARAMS:
+            sizes += [int(v) for v in values if v.isdigit()]
+    filename = parts.path.rsplit("/", 1)[-1]
+    for width, height in _FILENAME_SIZE_PATTERN.findall(filename):
+        sizes += [int(width), int(height)]
+    return min(sizes) if sizes else None
+
+
+def is_decorative(url: str, alt: str = "", min_dimension: int = 100) -> bool:
+    """Whether an image is decoration judging by its URL and alt text alone."""
+    if not url or url.startswith("data:"):
+        return True
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return True
+    path = parts.path.lower()
+    if path.endswith(_SKIPPED_EXTENSIONS):
+        return True
+    if _DECORATIVE_PATTERN.search(path) or _DECORATIVE_PATTERN.search((alt or "").lower()):
+        return True
+    size = _declared_size(url)
+    return size is not None and size < min_dimension
+
+
+class ImagePolicy:
+    """Filters, deduplicates, optionally probes and caps article images."""
+
+    def __init__(
+        self,
+        max_images: int = 4,
+        min_dimension: int = 100,
+        probe: bool = False,
+        probe_min_bytes: int = 4096,
+        probe_timeout: float = 3.0,
+    ):
+        """
+        Args:
+            max_images: Images kept per message (0 drops all)
+            min_dimension: Images declaring a smaller width/height are dropped
+            probe: HEAD candidates and drop non-images and files below probe_min_bytes
+            probe_min_bytes: Smallest Content-Length accepted when probing
+            probe_timeout: Seconds allowed for all probes of one message
+        """
+        self.max_images = max_images
+        self.min_dimension = min_dimension
+        self.probe = probe
+        self.probe_min_bytes = probe_min_bytes
+        self.probe_timeout = probe_timeout
+
+    def select(self, images: Sequence[Tuple[str, str]]) -> List[str]:
+        """
+        Pick the images to send.
+
+        Args:
+            images: (absolute url, alt text) pairs in document order
+
+        Returns:
+            URLs of the kept images, in document order
+        """
+        if self.max_images <= 0:
+            return []
+        candidates: List[str] = []
+        seen = set()
+        for url, alt in images:
+            key = image_key(url)
+            if key in seen or is_decorative(url, alt, self.min_dimension):
+                continue
+            seen.add(key)
+            candidates.append(url)
+
+        if self.probe and candidates:
+            # Probe a few spares so rejected ones can be replaced
+            probed = self._probe(candidates[: self.max_images * 2])
+            candidates = [url for url in candidates[: self.max_images * 2] if probed.get(url, True)]
+        return candidates[: self.max_images]
+
+    def _probe(self, urls: List[str]) -> Dict[str, bool]:
+        try:
+            return background_loop.run(
+                self._aprobe_all(urls, time.monotonic() + self.probe_timeout),
+                timeout=self.probe_timeout + 1,
+            )
+        except Exception as e:
+            logger.warning(f"图片探测失败，保留全部候选图片: {e}")
+            return {}
+
+    async def _aprobe_all(self, urls: List[str], deadline: float) -> Dict[str, bool]:
+        results = await asyncio.gather(*(self._aprobe(url, deadline) for url in urls))
+        return dict(zip(urls, results))
+
+    async def _aprobe(self, url: str, deadline: float) -> bool:
+        """HEAD one image; unknown answers (errors, missing headers) keep it."""
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return True
+        try:
+            response = await guarded_request(get_http_client(), "HEAD", url, timeout=timeout)
+        except UnsafeURLError:
+            # Never probed (nor useful to a remote model): an image on a private address
+            return False
+        except httpx.HTTPError:
+            return True
+        if response.status_code >= 400:
+            return response.status_code in (403, 405)  # HEAD not allowed; cannot tell
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and not content_type.startswith("image/"):
+            return False
+        if content_type.startswith(("image/svg", "image/x-icon", "image/vnd.microsoft.icon")):
+            return False
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) < self.probe_min_bytes:
+            return False
+        return True
+
+
+# Default policy for crawled articles
+image_policy = ImagePolicy(
+    max_images=IMAGE_MAX_PER_MESSAGE,
+    min_dimension=IMAGE_MIN_DIMENSION,
+    probe=IMAGE_PROBE_ENABLED,
+    probe_min_bytes=IMAGE_PROBE_MIN_BYTES,
+    probe_timeout=IMAGE_PROBE_TIMEOUT,
+)
@@ -1,10 +1,48 @@
+import asyncio
 import os
-import requests
+import random
+import time
 import logging
 from typing import Optional, Dict, Any
 
+import httpx
+
+from src.config.env import (
+    JINA_TIMEOUT_SECONDS,
+    JINA_MAX_RETRIES,
+    JINA_MAX_CONNECTIONS,
+)
+from src.utils.background_loop import background_loop
+from src.utils.workflow_context import get_workflow_context, remaining_workflow_time
+
 logger = logging.getLogger(__name__)
 
+# Jittered exponential backoff between retries (seconds)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 8.0
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Shared keep-alive client; lives on the background loop
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=JINA_MAX_CONNECTIONS,
+                max_keepalive_connections=JINA_MAX_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt)))
+
 
 class JinaClient:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
@@ -12,27 +50,81 @@ class JinaClient:
         # 优先使用配置中的API密钥，否则使用环境变量
         self.api_key = self.config.get('jina_api_key') or os.getenv("JINA_API_KEY")
         self.base_url = "https://r.jina.ai/"
+        self.timeout = float(self.config.get('timeout') or JINA_TIMEOUT_SECONDS)
+        self.max_retries = JINA_MAX_RETRIES
+
+    async def aget_html(self, url: str, deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Get HTML content from a URL using Jina API.
+
+        Args:
+            url: The page to fetch
+            deadline: Optional time.monotonic() value no attempt may run past
+
+        Returns:
+            The page content, or None when every attempt failed
+        """
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        client = get_http_client()
+        for attempt in range(self.max_retries + 1):
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    logger.error(f"Jina API deadline exceeded before fetching {url}")
+                    return None
+            try:
+                response = await client.post(
+                    self.base_url,
+                    json={"url": url},
+                    headers=headers,
+                    timeout=timeout,
+                )
+                if response.status_code == 200:
+                    return response.text
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(f"Jina API error: {response.status_code} - {response.text}")
+                    return None
+                error = f"HTTP {response.status_code}"
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = repr(e)
+            except Exception as e:
+                logger.error(f"Error calling Jina API: {e}")
+                return None
+
+            if attempt >= self.max_retries:
+                logger.error(f"Jina API failed for {url} after {attempt + 1} attempts: {error}")
+                return None
+            delay = backoff_delay(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                logger.error(f"Jina API failed for {url} and no time is left to retry: {error}")
+                return None
+            logger.warning(
+                f"Jina API attempt {attempt + 1} failed for {url} ({error}), "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        return None
 
     def get_html(self, url: str) -> Optional[str]:
-        """Get HTML content from a URL using Jina API."""
+        """Get HTML content from a URL using Jina API (sync shim over `aget_html`)."""
+        remaining = remaining_workflow_time()
+        if remaining is not None and remaining <= 0:
+            logger.error(f"Workflow time budget exhausted, not fetching {url}")
+            return None
+        deadline = time.monotonic() + remaining if remaining is not None else None
+        context = get_workflow_context()
+        if context is not None:
+            context.incr("jina_requests")
+        # Worst case: every attempt times out and every backoff is at its cap
+        wait = (self.max_retries + 1) * (self.timeout + RETRY_BACKOFF_MAX)
+        if remaining is not None:
+            wait = min(wait, remaining)
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.post(
-                self.base_url,
-                json={"url": url},
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return response.text
-            else:
-                logger.error(f"Jina API error: {response.status_code} - {response.text}")
-                return None
-                
+            return background_loop.run(self.aget_html(url, deadline), timeout=wait + 1)
         except Exception as e:
             logger.error(f"Error calling Jina API: {e}")
             return None
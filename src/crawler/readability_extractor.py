@@ -1,13 +1,14 @@
-from readabilipy import simple_json_from_html_string
-
 from .article import Article
+from .extraction_pool import extraction_pool
 
 
 class ReadabilityExtractor:
     def extract(self, html: str, url: str) -> Article:
-        article = simple_json_from_html_string(html, use_readability=True)
+        # Readability and markdown conversion run in the extraction process pool
+        article = extraction_pool.extract(html)
         return Article(
             title=article.get("title"),
-            html_content=article.get("content"),
-            url=url
+            html_content="",
+            url=url,
+            markdown=article.get("markdown"),
         )
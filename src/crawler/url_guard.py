@@ -0,0 +1,108 @@
+"""
+Server-side requests to URLs chosen by the LLM, restricted to public addresses.
+
+Direct page fetches and image probes request URLs taken from search results
+and model output. Without a check they can reach the server's own network:
+127.0.0.1, cloud metadata at 169.254.169.254, RFC 1918 ranges, or a public
+URL that redirects there. `guarded_request` resolves the host of every URL
+it is about to request, including each redirect target (redirects are
+followed here, not by httpx), and refuses any that resolves to a private,
+loopback, link-local or otherwise non-global address.
+
+Set CRAWLER_ALLOW_PRIVATE_URLS=true for deployments that are meant to crawl
+an intranet.
+"""
+
+import asyncio
+import ipaddress
+import socket
+from typing import Any, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config.env import CRAWLER_ALLOW_PRIVATE_URLS
+
+MAX_REDIRECTS = 5
+
+
+class UnsafeURLError(httpx.HTTPError):
+    """The URL points at a non-public address (or is not http/https)."""
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable (not private, loopback, link-local, ...)."""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Addresses `host` resolves to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def check_url(url: str, allow_private: Optional[bool] = None) -> None:
+    """
+    Refuse URLs that are not http(s) or whose host resolves to a non-public address.
+
+    Raises:
+        UnsafeURLError: If the URL may not be requested
+        httpx.ConnectError: If the host cannot be resolved
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError(f"Refusing to fetch {url!r}: not an http(s) URL")
+    if CRAWLER_ALLOW_PRIVATE_URLS if allow_private is None else allow_private:
+        return
+    host = parts.hostname
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        try:
+            addresses = await resolve_host(host, parts.port or (443 if parts.scheme == "https" else 80))
+        except (socket.gaierror, UnicodeError) as e:
+            raise httpx.ConnectError(f"Cannot resolve {host}: {e}")
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise UnsafeURLError(f"Refusing to fetch {url!r}: {host} resolves to a non-public address")
+
+
+async def guarded_request(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    max_redirects: int = MAX_REDIRECTS,
+    allow_private: Optional[bool] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Send a request, following redirects only to public addresses.
+
+    Args:
+        client: The client to send with
+        method: "GET" or "HEAD"
+        url: The URL to request
+        max_redirects: Redirects followed at most
+        allow_private: Override CRAWLER_ALLOW_PRIVATE_URLS
+        **kwargs: Passed to `client.request` (headers, timeout, ...)
+
+    Returns:
+        The final response
+
+    Raises:
+        UnsafeURLError: If the URL or a redirect target is not public
+        httpx.HTTPError: On transport errors and too many redirects
+    """
+    for _ in range(max_redirects + 1):
+        await check_url(url, allow_private)
+        response = await client.request(method, url, follow_redirects=False, **kwargs)
+        if not response.is_redirect:
+            return response
+        url = str(response.url.join(response.headers["Location"]))
+        await response.aclose()
+    raise httpx.TooManyRedirects(f"Exceeded {max_redirects} redirects", request=response.request)
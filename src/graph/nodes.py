@@ -2,9 +2,11 @@ import logging
 import json
 import json_repair
 import logging
+import time
 from copy import deepcopy
-from typing import Literal
-from langchain_core.messages import HumanMessage, BaseMessage
+from typing import Literal, Optional
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, BaseMessage
 
 import json_repair
 from langchain_core.messages import HumanMessage
@@ -17,7 +19,16 @@ from src.config.agents import AGENT_LLM_MAP
 from src.prompts.template import apply_prompt_template
 from src.tools.search import search
 from src.utils.json_utils import repair_json_output
-from .types import State, Router
+from .routing import RouterStreamParser, supervisor_pre_router
+from .speculation import (
+    SpeculationCancelled,
+    cancel_speculation,
+    record_speculation_failed,
+    record_speculation_used,
+    start_speculation,
+    take_speculation,
+)
+from .types import State
 
 logger = logging.getLogger(__name__)
 
@@ -77,8 +88,9 @@ def browser_node(state: State) -> Command[Literal["supervisor"]]:
     if current_browser_tool:
         # 使用用户特定的browser_tool创建临时agent
         from src.agents.agents import create_agent
+        from src.tools.artifacts import read_artifact
         user_id = state.get("user_id")
-        temp_browser_agent = create_agent("browser", [current_browser_tool], "browser", user_id)
+        temp_browser_agent = create_agent("browser", [current_browser_tool, read_artifact], "browser", user_id)
         result = temp_browser_agent.invoke(state)
     else:
         # 回退到默认的browser_agent
@@ -102,9 +114,8 @@ def browser_node(state: State) -> Command[Literal["supervisor"]]:
     )
 
 
-def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
-    """Supervisor node that decides which agent should act next."""
-    logger.info("Supervisor evaluating next action")
+def _route_with_llm(state: State) -> str:
+    """Ask the supervisor LLM which agent should act next."""
     messages = apply_prompt_template("supervisor", state)
     # preprocess messages to make supervisor execute better.
     messages = deepcopy(messages)
@@ -112,14 +123,40 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
         if isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS:
             message.content = RESPONSE_FORMAT.format(message.name, message.content)
     user_id = state.get("user_id")
-    response = (
-        get_llm_by_type(AGENT_LLM_MAP["supervisor"], user_id)
-        .with_structured_output(schema=Router, method="json_mode")
-        .invoke(messages)
+    llm = get_llm_by_type(AGENT_LLM_MAP["supervisor"], user_id).bind(
+        response_format={"type": "json_object"}
     )
-    goto = response["next"]
+    # 流式读取路由结果，`next` 字段一旦完整即停止生成，省去剩余 token 的等待
+    parser = RouterStreamParser()
+    goto = None
+    stream = llm.stream(messages)
+    try:
+        for chunk in stream:
+            goto = parser.feed(chunk.content)
+            if goto is not None:
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+    if goto is None:
+        goto = parser.finalize()
     logger.debug(f"Current state messages: {state['messages']}")
-    logger.debug(f"Supervisor response: {response}")
+    logger.debug(f"Supervisor response: {parser.buffer}")
+    return goto
+
+
+def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    """Supervisor node that decides which agent should act next."""
+    logger.info("Supervisor evaluating next action")
+    # 先尝试基于规则的确定性路由，只有无法判断时才调用 LLM
+    decision = supervisor_pre_router.route(state)
+    if decision is None:
+        goto = _route_with_llm(state)
+    else:
+        rule_name, goto = decision
+        if supervisor_pre_router.should_audit():
+            supervisor_pre_router.record_audit(rule_name, goto, _route_with_llm(state))
 
     # 校验 LLM 返回的 agent 名称是否合法
     valid_options = state.get("TEAM_MEMBERS", TEAM_MEMBERS) + ["FINISH"]
@@ -156,9 +193,19 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
 
 
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
-    """Planner node that generate the full plan."""
-    logger.info("Planner generating full plan")
+def _generate_plan(state: State, cancel_event=None, callbacks=None) -> str:
+    """
+    Run the planner LLM and return its raw response.
+
+    Args:
+        state: The graph state the plan is generated for
+        cancel_event: Optional threading.Event; when set, generation stops with
+            SpeculationCancelled
+        callbacks: Optional callbacks attached to the LLM call
+
+    Returns:
+        The concatenated planner output
+    """
     messages = apply_prompt_template("planner", state)
     # whether to enable deep thinking mode
     user_id = state.get("user_id")
@@ -178,10 +225,73 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
             logger.error(
                 f"Tavily search returned malformed response: {searched_content}"
             )
-    stream = llm.stream(messages)
+    if cancel_event is not None and cancel_event.is_set():
+        raise SpeculationCancelled()
+    stream = (
+        llm.stream(messages, config={"callbacks": callbacks})
+        if callbacks
+        else llm.stream(messages)
+    )
     full_response = ""
-    for chunk in stream:
-        full_response += chunk.content
+    try:
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                raise SpeculationCancelled()
+            full_response += chunk.content
+    finally:
+        # Closing the generator aborts the underlying HTTP stream on cancel
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return full_response
+
+
+def _replay_plan(plan: str, messages) -> str:
+    """Stream a plan produced speculatively so the client still sees planner output."""
+    replay = GenericFakeChatModel(messages=iter([AIMessage(content=plan)]))
+    return "".join(chunk.content for chunk in replay.stream(messages))
+
+
+def _take_speculative_plan(state: State) -> Optional[str]:
+    """Claim the plan speculatively started by the coordinator, if there is one."""
+    workflow_id = state.get("workflow_id")
+    task = take_speculation(workflow_id)
+    if task is None:
+        return None
+    started = time.monotonic()
+    try:
+        plan = task.result()
+    except Exception as e:
+        logger.warning(f"Speculative planner failed, planning again: {e}")
+        record_speculation_failed(workflow_id, task)
+        return None
+    record_speculation_used(workflow_id, task, time.monotonic() - started)
+    return plan
+
+
+def _start_speculative_planning(state: State) -> None:
+    """Start the planner in the background while the coordinator decides."""
+    workflow_id = state.get("workflow_id")
+    if not state.get("speculative_planning") or not workflow_id:
+        return
+    planner_state = dict(state)
+    start_speculation(
+        workflow_id,
+        "planner",
+        lambda cancel_event, callbacks: _generate_plan(
+            planner_state, cancel_event, callbacks
+        ),
+    )
+
+
+def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+    """Planner node that generate the full plan."""
+    logger.info("Planner generating full plan")
+    full_response = _take_speculative_plan(state)
+    if full_response is not None:
+        full_response = _replay_plan(full_response, state["messages"])
+    else:
+        full_response = _generate_plan(state)
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Planner response: {full_response}")
 
@@ -245,9 +355,14 @@ def parallel_merge_node(state: State) -> Command[Literal["supervisor"]]:
 def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     """Coordinator node that communicate with customers."""
     logger.info("Coordinator talking.")
+    _start_speculative_planning(state)
     messages = apply_prompt_template("coordinator", state)
     user_id = state.get("user_id")
-    response = get_llm_by_type(AGENT_LLM_MAP["coordinator"], user_id).invoke(messages)
+    try:
+        response = get_llm_by_type(AGENT_LLM_MAP["coordinator"], user_id).invoke(messages)
+    except Exception:
+        cancel_speculation(state.get("workflow_id"))
+        raise
     logger.debug(f"Current state messages: {state['messages']}")
     response_content = response.content
     # 尝试修复可能的JSON输出
@@ -257,6 +372,9 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     goto = "__end__"
     if "handoff_to_planner" in response_content:
         goto = "planner"
+    else:
+        # No handoff: the speculative plan will never be needed
+        cancel_speculation(state.get("workflow_id"))
 
     # 更新response.content为修复后的内容
     response.content = response_content
@@ -0,0 +1,285 @@
+"""
+Routing helpers for the supervisor.
+
+Most supervisor hops are mechanical: after the reporter the workflow is done,
+and after an agent finishes its planned step the next planned agent takes
+over. `SupervisorPreRouter` resolves these cases from state with a list of
+pluggable rules and only defers to the LLM when no rule is confident.
+When the LLM is asked, `RouterStreamParser` reads its streamed JSON output
+and reports the `next` value as soon as the string literal is closed.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+from typing import Callable, Optional
+
+import json_repair
+from langchain_core.messages import BaseMessage
+
+from src.config.env import (
+    SUPERVISOR_PRE_ROUTER_ENABLED,
+    SUPERVISOR_PRE_ROUTER_AUDIT_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+# A rule inspects the graph state and returns the next worker (or "FINISH"),
+# or None when it cannot decide.
+RouteRule = Callable[[dict], Optional[str]]
+
+# Agent responses containing these markers are treated as failed steps, which
+# always go back to the LLM for a decision.
+FAILURE_MARKERS = (
+    "Failed to",
+    "Error executing",
+    "Error:",
+    "error_type",
+    "执行失败",
+)
+
+
+# Matches a complete `"next": "<value>"` pair, honouring escaped quotes.
+_NEXT_FIELD_PATTERN = re.compile(r'"next"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class RouterStreamParser:
+    """Incrementally parse a streamed `{"next": ...}` routing response."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, content) -> Optional[str]:
+        """
+        Append a streamed chunk.
+
+        Args:
+            content: The chunk content
+
+        Returns:
+            The `next` value once it is complete, otherwise None
+        """
+        if not content:
+            return None
+        self.buffer += content if isinstance(content, str) else str(content)
+        match = _NEXT_FIELD_PATTERN.search(self.buffer)
+        if match is None:
+            return None
+        try:
+            return json.loads(f'"{match.group(1)}"')
+        except json.JSONDecodeError:
+            return match.group(1)
+
+    def finalize(self) -> str:
+        """Best-effort parse of the whole buffer after the stream ended."""
+        try:
+            response = json_repair.loads(self.buffer)
+        except Exception:
+            return ""
+        if isinstance(response, dict) and isinstance(response.get("next"), str):
+            return response["next"]
+        return ""
+
+
+def _message_name(message) -> Optional[str]:
+    if isinstance(message, BaseMessage):
+        return message.name
+    if isinstance(message, dict):
+        return message.get("name")
+    return None
+
+
+def _message_content(message) -> str:
+    content = (
+        message.content
+        if isinstance(message, BaseMessage)
+        else message.get("content") if isinstance(message, dict) else ""
+    )
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+def get_plan_steps(state: dict) -> list[str]:
+    """Return the agent names of the steps in `state["full_plan"]`."""
+    full_plan = state.get("full_plan")
+    if not full_plan:
+        return []
+    try:
+        plan = json_repair.loads(full_plan) if isinstance(full_plan, str) else full_plan
+    except Exception:
+        return []
+    if not isinstance(plan, dict) or not isinstance(plan.get("steps"), list):
+        return []
+    return [
+        step.get("agent_name")
+        for step in plan["steps"]
+        if isinstance(step, dict) and step.get("agent_name")
+    ]
+
+
+def is_failed_response(content: str) -> bool:
+    """Heuristically decide whether an agent response reports a failure."""
+    if not content or not content.strip():
+        return True
+    return any(marker in content for marker in FAILURE_MARKERS)
+
+
+def finish_after_reporter(state: dict) -> Optional[str]:
+    """The reporter is always the last step: once it has answered, finish."""
+    messages = state.get("messages") or []
+    if messages and _message_name(messages[-1]) == "reporter":
+        if not is_failed_response(_message_content(messages[-1])):
+            return "FINISH"
+    return None
+
+
+def advance_planned_step(state: dict) -> Optional[str]:
+    """Advance to the next planned agent when the current step just succeeded.
+
+    Agent responses after the latest plan are matched to plan steps in order.
+    The rule only fires when the most recent message completed a step (or is
+    the plan itself) and a further step exists.
+    """
+    steps = get_plan_steps(state)
+    messages = state.get("messages") or []
+    if not steps or not messages:
+        return None
+
+    plan_index = None
+    for index in range(len(messages) - 1, -1, -1):
+        if _message_name(messages[index]) == "planner":
+            plan_index = index
+            break
+    if plan_index is None:
+        return None
+
+    completed = 0
+    last_completed_message = plan_index
+    for index in range(plan_index + 1, len(messages)):
+        name = _message_name(messages[index])
+        if name is None:
+            continue
+        if completed < len(steps) and name == steps[completed]:
+            completed += 1
+            last_completed_message = index
+        else:
+            # Off-plan activity: the LLM has to judge what happens next.
+            return None
+
+    if last_completed_message != len(messages) - 1:
+        return None
+    if completed and is_failed_response(_message_content(messages[-1])):
+        return None
+    if completed >= len(steps):
+        return None
+    return steps[completed]
+
+
+DEFAULT_RULES: list[RouteRule] = [finish_after_reporter, advance_planned_step]
+
+
+class SupervisorPreRouter:
+    """Resolve trivial supervisor decisions without an LLM call."""
+
+    def __init__(
+        self,
+        rules: Optional[list[RouteRule]] = None,
+        enabled: bool = True,
+        audit_rate: float = 0.0,
+    ):
+        self.rules: list[RouteRule] = list(DEFAULT_RULES if rules is None else rules)
+        self.enabled = enabled
+        self.audit_rate = audit_rate
+        self._lock = threading.Lock()
+        self.stats = {
+            "decisions": 0,
+            "rule_hits": 0,
+            "llm_fallbacks": 0,
+            "audits": 0,
+            "disagreements": 0,
+        }
+        self.rule_hits: dict[str, int] = {}
+
+    def register(self, rule: RouteRule, index: Optional[int] = None) -> None:
+        """Add a routing rule; earlier rules take precedence."""
+        if index is None:
+            self.rules.append(rule)
+        else:
+            self.rules.insert(index, rule)
+
+    def route(self, state: dict) -> Optional[tuple[str, str]]:
+        """
+        Try to resolve the next worker deterministically.
+
+        Args:
+            state: The current graph state
+
+        Returns:
+            (rule_name, goto) when a rule decided, otherwise None
+        """
+        decision = None
+        if self.enabled:
+            valid_options = list(state.get("TEAM_MEMBERS") or []) + ["FINISH"]
+            for rule in self.rules:
+                try:
+                    goto = rule(state)
+                except Exception as e:
+                    logger.warning(f"Supervisor route rule {rule.__name__} failed: {e}")
+                    continue
+                # A rule must never pick an unknown worker or re-select the
+                # previous one (that would trip the repeat guard).
+                if goto is None or goto not in valid_options or goto == state.get("next"):
+                    continue
+                decision = (rule.__name__, goto)
+                break
+
+        with self._lock:
+            self.stats["decisions"] += 1
+            if decision is None:
+                self.stats["llm_fallbacks"] += 1
+            else:
+                self.stats["rule_hits"] += 1
+                self.rule_hits[decision[0]] = self.rule_hits.get(decision[0], 0) + 1
+            skip_rate = self.stats["rule_hits"] / self.stats["decisions"]
+
+        if decision is None:
+            logger.info(f"Supervisor pre-router deferred to LLM (skip_rate={skip_rate:.1%})")
+        else:
+            logger.info(
+                f"Supervisor pre-router resolved goto={decision[1]} via {decision[0]} "
+                f"(skip_rate={skip_rate:.1%})"
+            )
+        return decision
+
+    def should_audit(self) -> bool:
+        return self.audit_rate > 0 and random.random() < self.audit_rate
+
+    def record_audit(self, rule_name: str, rule_goto: str, llm_goto: str) -> None:
+        """Record an audit comparing a rule decision with the LLM's choice."""
+        with self._lock:
+            self.stats["audits"] += 1
+            if rule_goto != llm_goto:
+                self.stats["disagreements"] += 1
+        if rule_goto != llm_goto:
+            logger.warning(
+                f"Supervisor routing disagreement: rule {rule_name} chose {rule_goto}, "
+                f"LLM chose {llm_goto}"
+            )
+        else:
+            logger.info(f"Supervisor routing audit agreed: {rule_name} -> {rule_goto}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            decisions = self.stats["decisions"]
+            return {
+                **self.stats,
+                "skip_rate": self.stats["rule_hits"] / decisions if decisions else 0.0,
+                "rule_hits_by_rule": dict(self.rule_hits),
+            }
+
+
+supervisor_pre_router = SupervisorPreRouter(
+    enabled=SUPERVISOR_PRE_ROUTER_ENABLED,
+    audit_rate=SUPERVISOR_PRE_ROUTER_AUDIT_RATE,
+)
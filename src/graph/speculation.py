@@ -0,0 +1,232 @@
+"""
+Speculative execution of graph work.
+
+The planner only depends on the conversation, which the coordinator does not
+modify, so it can start while the coordinator is still deciding whether to
+hand off. `SpeculativeTask` runs such work in a background thread; the node
+that needs the result takes it over, everyone else cancels it. Each workflow
+keeps a small report of how much time speculation saved and how much work
+was thrown away.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.utils.workflow_context import bind_workflow_context, get_workflow_context
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculationCancelled(Exception):
+    """Raised inside speculative work once its result is no longer wanted."""
+
+
+class TokenUsageCounter(BaseCallbackHandler):
+    """Sums provider-reported token usage of the LLM calls it is attached to."""
+
+    def __init__(self):
+        self.total_tokens = 0
+        self.llm_calls = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.llm_calls += 1
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        if usage.get("total_tokens"):
+            self.total_tokens += int(usage["total_tokens"])
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if usage_metadata and usage_metadata.get("total_tokens"):
+                    self.total_tokens += int(usage_metadata["total_tokens"])
+                    return
+
+
+class SpeculativeTask:
+    """Run `fn(cancel_event, callbacks)` in a background thread.
+
+    The thread starts with an empty context on purpose: LangChain callbacks of
+    the node that launched the task must not pick up the speculative LLM
+    calls, otherwise they would be streamed to the client as that node's output.
+    Only the workflow context is carried over, so memo tables and metrics are shared.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[threading.Event, list], Any],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self._fn = fn
+        self._clock = clock
+        self.cancel_event = threading.Event()
+        self._workflow_context = get_workflow_context()
+        self.usage = TokenUsageCounter()
+        self._done = threading.Event()
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"speculative-{name}", daemon=True
+        )
+
+    def start(self) -> "SpeculativeTask":
+        self.started_at = self._clock()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        bind_workflow_context(self._workflow_context)
+        try:
+            self._result = self._fn(self.cancel_event, [self.usage])
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.finished_at = self._clock()
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds of work done so far (or in total once finished)."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else self._clock()
+        return max(0.0, end - self.started_at)
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Wait for the task and return its result, re-raising its error."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Speculative task {self.name} did not finish in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+# Pending speculative tasks and per-workflow reports, keyed by workflow_id.
+_tasks: Dict[str, SpeculativeTask] = {}
+_reports: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _new_report() -> Dict[str, Any]:
+    return {
+        "started": 0,
+        "used": 0,
+        "cancelled": 0,
+        "failed": 0,
+        "latency_saved_seconds": 0.0,
+        "wasted_seconds": 0.0,
+        "wasted_llm_calls": 0,
+        "wasted_tokens": 0,
+    }
+
+
+def _update_report(workflow_id: str, **deltas) -> None:
+    with _lock:
+        report = _reports.setdefault(workflow_id, _new_report())
+        for key, value in deltas.items():
+            report[key] += value
+
+
+def start_speculation(
+    workflow_id: str, name: str, fn: Callable[[threading.Event, list], Any]
+) -> SpeculativeTask:
+    """
+    Start speculative work for a workflow, replacing any unclaimed task.
+
+    Args:
+        workflow_id: Workflow the work belongs to
+        name: Short name used in logs, e.g. "planner"
+        fn: Callable receiving a cancel event and a callbacks list for its LLM calls
+
+    Returns:
+        The running task
+    """
+    cancel_speculation(workflow_id)
+    task = SpeculativeTask(name, fn)
+    with _lock:
+        _tasks[workflow_id] = task
+    _update_report(workflow_id, started=1)
+    logger.info(f"Speculative {name} started for workflow {workflow_id}")
+    return task.start()
+
+
+def take_speculation(workflow_id: Optional[str]) -> Optional[SpeculativeTask]:
+    """Claim the pending speculative task of a workflow, if any."""
+    if not workflow_id:
+        return None
+    with _lock:
+        return _tasks.pop(workflow_id, None)
+
+
+def cancel_speculation(workflow_id: Optional[str]) -> None:
+    """Cancel the pending speculative task of a workflow and book it as waste."""
+    task = take_speculation(workflow_id)
+    if task is None:
+        return
+    task.cancel()
+    _update_report(
+        workflow_id,
+        cancelled=1,
+        wasted_seconds=task.elapsed,
+        wasted_llm_calls=task.usage.llm_calls,
+        wasted_tokens=task.usage.total_tokens,
+    )
+    logger.info(
+        f"Speculative {task.name} cancelled for workflow {workflow_id} "
+        f"after {task.elapsed:.2f}s"
+    )
+
+
+def record_speculation_used(workflow_id: str, task: SpeculativeTask, waited: float) -> None:
+    """Book a claimed task whose result was used; `waited` is the time spent blocking on it."""
+    saved = max(0.0, task.elapsed - waited)
+    _update_report(workflow_id, used=1, latency_saved_seconds=saved)
+    logger.info(
+        f"Speculative {task.name} used for workflow {workflow_id}: "
+        f"saved {saved:.2f}s (waited {waited:.2f}s)"
+    )
+
+
+def record_speculation_failed(workflow_id: str, task: SpeculativeTask) -> None:
+    """Book a claimed task that failed; its work is wasted and redone inline."""
+    _update_report(
+        workflow_id,
+        failed=1,
+        wasted_seconds=task.elapsed,
+        wasted_llm_calls=task.usage.llm_calls,
+        wasted_tokens=task.usage.total_tokens,
+    )
+
+
+def pop_speculation_report(workflow_id: str) -> Optional[Dict[str, Any]]:
+    """Return and forget the speculation report of a finished workflow."""
+    cancel_speculation(workflow_id)
+    with _lock:
+        report = _reports.pop(workflow_id, None)
+    if report is not None:
+        report["latency_saved_seconds"] = round(report["latency_saved_seconds"], 3)
+        report["wasted_seconds"] = round(report["wasted_seconds"], 3)
+    return report
+
+
+def discard_speculation(workflow_id: Optional[str]) -> None:
+    """Cancel pending work and forget the report of a workflow that ended (finished, aborted or failed)."""
+    if workflow_id:
+        pop_speculation_report(workflow_id)
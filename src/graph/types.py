@@ -26,6 +26,8 @@ class State(MessagesState):
     full_plan: str
     deep_thinking_mode: bool
     search_before_planning: bool
+    speculative_planning: bool
+    workflow_id: str
     thread_id: str
     repeat_count: int
     parallel_tasks: list
@@ -2,6 +2,7 @@ from google.protobuf.any import is_type
 from langchain_openai import ChatOpenAI, AzureChatOpenAI
 from langchain_deepseek import ChatDeepSeek
 from src.llms.litellm_v2 import ChatLiteLLMV2 as ChatLiteLLM
+from src.llms.rate_limiter import rate_limit_kwargs
 from src.config import load_yaml_config
 from typing import Optional
 from litellm import LlmProviders
@@ -81,6 +82,7 @@ def create_azure_llm(
     api_version: str,
     api_key: str,
     temperature: float = 0.0,
+    **kwargs,
 ) -> AzureChatOpenAI:
     """
     create azure llm instance with specified configuration
@@ -91,6 +93,7 @@ def create_azure_llm(
         api_version=api_version,
         api_key=api_key,
         temperature=temperature,
+        **kwargs,
     )
 
 
@@ -139,6 +142,22 @@ def is_litellm_model(model_name: str) -> bool:
     )
 
 
+def get_provider_name(model_name: Optional[str], default: str = "openai") -> str:
+    """
+    Derive the provider name used to key client-side rate limits.
+
+    Args:
+        model_name: The model name, optionally prefixed with a LiteLLM provider
+        default: Provider to assume for un-prefixed model names
+
+    Returns:
+        str: The provider name
+    """
+    if is_litellm_model(model_name):
+        return model_name.split("/")[0]
+    return default
+
+
 def _create_llm_use_env(
     llm_type: LLMType,
 ) -> ChatOpenAI | ChatDeepSeek | AzureChatOpenAI | ChatLiteLLM:
@@ -149,18 +168,21 @@ def _create_llm_use_env(
                 azure_endpoint=AZURE_API_BASE,
                 api_version=AZURE_API_VERSION,
                 api_key=AZURE_API_KEY,
+                **rate_limit_kwargs("azure", AZURE_API_KEY),
             )
         elif is_litellm_model(REASONING_MODEL):
             llm = create_litellm_model(
                 model=REASONING_MODEL,
                 base_url=REASONING_BASE_URL,
                 api_key=REASONING_API_KEY,
+                **rate_limit_kwargs(get_provider_name(REASONING_MODEL), REASONING_API_KEY),
             )
         else:
             llm = create_deepseek_llm(
                 model=REASONING_MODEL,
                 base_url=REASONING_BASE_URL,
                 api_key=REASONING_API_KEY,
+                **rate_limit_kwargs("deepseek", REASONING_API_KEY),
             )
     elif llm_type == "basic":
         if BASIC_AZURE_DEPLOYMENT:
@@ -170,18 +192,21 @@ def _create_llm_use_env(
                 azure_endpoint=AZURE_API_BASE,
                 api_version=AZURE_API_VERSION,
                 api_key=AZURE_API_KEY,
+                **rate_limit_kwargs("azure", AZURE_API_KEY),
             )
         elif is_litellm_model(BASIC_MODEL):
             llm = create_litellm_model(
                 model=BASIC_MODEL,
                 base_url=BASIC_BASE_URL,
                 api_key=BASIC_API_KEY,
+                **rate_limit_kwargs(get_provider_name(BASIC_MODEL), BASIC_API_KEY),
             )
         else:
             llm = create_openai_llm(
                 model=BASIC_MODEL,
                 base_url=BASIC_BASE_URL,
                 api_key=BASIC_API_KEY,
+                **rate_limit_kwargs("openai", BASIC_API_KEY),
             )
     elif llm_type == "vision":
         if VL_AZURE_DEPLOYMENT:
@@ -190,18 +215,21 @@ def _create_llm_use_env(
                 azure_endpoint=AZURE_API_BASE,
                 api_version=AZURE_API_VERSION,
                 api_key=AZURE_API_KEY,
+                **rate_limit_kwargs("azure", AZURE_API_KEY),
             )
         elif is_litellm_model(VL_MODEL):
             llm = create_litellm_model(
                 model=VL_MODEL,
                 base_url=VL_BASE_URL,
                 api_key=VL_API_KEY,
+                **rate_limit_kwargs(get_provider_name(VL_MODEL), VL_API_KEY),
             )
         else:
             llm = create_openai_llm(
                 model=VL_MODEL,
                 base_url=VL_BASE_URL,
                 api_key=VL_API_KEY,
+                **rate_limit_kwargs("openai", VL_API_KEY),
             )
     else:
         raise ValueError(f"Unknown LLM type: {llm_type}")
@@ -219,7 +247,12 @@ def _create_llm_use_conf(llm_type: LLMType, conf: Dict[str, Any]) -> ChatLiteLLM
         raise ValueError(f"Unknown LLM type: {llm_type}")
     if not isinstance(llm_conf, dict):
         raise ValueError(f"Invalid LLM Conf: {llm_type}")
-    return ChatLiteLLM(**llm_conf)
+    return ChatLiteLLM(
+        **llm_conf,
+        **rate_limit_kwargs(
+            get_provider_name(llm_conf.get("model")), llm_conf.get("api_key")
+        ),
+    )
 
 
 def get_llm_by_type(
@@ -249,6 +282,13 @@ def get_llm_by_type(
                     # 过滤掉None值
                     llm_config = {k: v for k, v in llm_config.items() if v is not None}
                     if llm_config.get('model'):
+                        # 用户自带的API Key同样按 (provider, api_key) 共享限流队列
+                        llm_config.update(
+                            rate_limit_kwargs(
+                                get_provider_name(llm_config['model']),
+                                llm_config.get('api_key'),
+                            )
+                        )
                         return ChatLiteLLM(**llm_config)
         except Exception as e:
             logger.warning(f"获取用户LLM设置失败，将使用默认配置: {e}")
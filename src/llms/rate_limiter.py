@@ -0,0 +1,337 @@
+"""
+Client-side rate limiting for LLM providers.
+
+Every (provider, api_key) pair gets one shared limiter holding two token
+buckets: requests per minute and tokens per minute. Callers are served in
+strict arrival order, so concurrent workflows queue fairly in front of the
+provider instead of racing each other into 429s and litellm retry backoff.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from src.config.env import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_ESTIMATED_TOKENS_PER_REQUEST,
+)
+
+logger = logging.getLogger(__name__)
+
+# Waits longer than this are logged at INFO so saturation is visible in logs.
+SLOW_WAIT_LOG_THRESHOLD = 1.0
+
+
+class TokenBucket:
+    """A classic token bucket that refills continuously up to `capacity`."""
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated_at = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until `amount` tokens can be consumed (0 if available now)."""
+        self._refill()
+        # Never ask for more than a full bucket, otherwise a single huge request
+        # could wait forever.
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Debit (positive) or refund (negative) tokens after the fact.
+
+        The balance may go negative, which simply delays the next caller until
+        the debt has been refilled.
+        """
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """Fair FIFO rate limiter enforcing requests/min and tokens/min budgets.
+
+    Token usage is unknown before a call completes, so each request reserves
+    `estimated_tokens_per_request` tokens up front; `record_usage` reconciles
+    the reservation with the real usage reported by the provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        estimated_tokens_per_request: int = 2000,
+        clock: Callable[[], float] = time.monotonic,
+        poll_interval: float = 0.05,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.estimated_tokens_per_request = estimated_tokens_per_request
+        self._clock = clock
+        self._poll_interval = poll_interval
+
+        self._request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+            if requests_per_minute > 0
+            else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+            if tokens_per_minute > 0
+            else None
+        )
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._tickets = itertools.count()
+        self._queue: deque[int] = deque()
+        self.stats = {
+            "acquired": 0,
+            "waited": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "last_wait_seconds": 0.0,
+            "reported_tokens": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Queue helpers (all called with self._lock held)
+    # ------------------------------------------------------------------
+
+    def _time_until_ready(self) -> float:
+        wait = 0.0
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.time_until_available(1))
+        if self._token_bucket is not None:
+            wait = max(
+                wait,
+                self._token_bucket.time_until_available(
+                    self.estimated_tokens_per_request
+                ),
+            )
+        return wait
+
+    def _take(self) -> None:
+        if self._request_bucket is not None:
+            self._request_bucket.consume(1)
+        if self._token_bucket is not None:
+            self._token_bucket.consume(self.estimated_tokens_per_request)
+
+    def _try_acquire_locked(self, ticket: int) -> float:
+        """Return 0 and take capacity if `ticket` may proceed, else the wait hint."""
+        if self._queue[0] != ticket:
+            return self._poll_interval
+        wait = self._time_until_ready()
+        if wait <= 0:
+            self._take()
+            self._queue.popleft()
+            self._condition.notify_all()
+        return wait
+
+    def _leave_queue_locked(self, ticket: int) -> None:
+        try:
+            self._queue.remove(ticket)
+        except ValueError:
+            return
+        self._condition.notify_all()
+
+    def _record_wait_locked(self, waited: float) -> None:
+        self.stats["acquired"] += 1
+        self.stats["last_wait_seconds"] = waited
+        if waited > 0:
+            self.stats["waited"] += 1
+            self.stats["total_wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        if waited >= SLOW_WAIT_LOG_THRESHOLD:
+            logger.info(
+                f"LLM rate limiter {self.name}: request waited {waited:.2f}s in queue "
+                f"(queue_depth={len(self._queue)})"
+            )
+
+    # ------------------------------------------------------------------
+    # BaseRateLimiter interface
+    # ------------------------------------------------------------------
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        started = self._clock()
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            try:
+                while True:
+                    wait = self._try_acquire_locked(ticket)
+                    if wait <= 0:
+                        self._record_wait_locked(self._clock() - started)
+                        return True
+                    if not blocking:
+                        self._leave_queue_locked(ticket)
+                        return False
+                    self._condition.wait(timeout=wait)
+            except BaseException:
+                self._leave_queue_locked(ticket)
+                raise
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        started = self._clock()
+        with self._lock:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire_locked(ticket)
+                    if wait <= 0:
+                        self._record_wait_locked(self._clock() - started)
+                        return True
+                    if not blocking:
+                        self._leave_queue_locked(ticket)
+                        return False
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            with self._lock:
+                self._leave_queue_locked(ticket)
+            raise
+
+    # ------------------------------------------------------------------
+    # Usage reconciliation and stats
+    # ------------------------------------------------------------------
+
+    def record_usage(self, total_tokens: int) -> None:
+        """Reconcile the up-front reservation with the provider-reported usage."""
+        with self._condition:
+            self.stats["reported_tokens"] += total_tokens
+            if self._token_bucket is not None:
+                self._token_bucket.adjust(
+                    total_tokens - self.estimated_tokens_per_request
+                )
+                self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            acquired = self.stats["acquired"]
+            return {
+                "name": self.name,
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "queue_depth": len(self._queue),
+                "avg_wait_seconds": (
+                    self.stats["total_wait_seconds"] / acquired if acquired else 0.0
+                ),
+                **self.stats,
+            }
+
+
+class RateLimitUsageHandler(BaseCallbackHandler):
+    """Feeds provider-reported token usage back into a `ProviderRateLimiter`."""
+
+    def __init__(self, limiter: ProviderRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        total_tokens = _extract_total_tokens(response)
+        if total_tokens is not None:
+            self.limiter.record_usage(total_tokens)
+
+
+def _extract_total_tokens(response: LLMResult) -> Optional[int]:
+    llm_output = response.llm_output or {}
+    usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+    if usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage_metadata = getattr(message, "usage_metadata", None)
+            if usage_metadata and usage_metadata.get("total_tokens"):
+                return int(usage_metadata["total_tokens"])
+    return None
+
+
+# Shared limiters keyed by (provider, sha256(api_key)).
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str, api_key: Optional[str] = None
+) -> Optional[ProviderRateLimiter]:
+    """
+    Get the shared rate limiter for a provider key.
+
+    Args:
+        provider: Provider name, e.g. "openai", "deepseek" or a litellm prefix
+        api_key: API key the calls are billed against
+
+    Returns:
+        The limiter, or None when no requests/min or tokens/min budget is configured
+    """
+    if LLM_REQUESTS_PER_MINUTE <= 0 and LLM_TOKENS_PER_MINUTE <= 0:
+        return None
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+    key = (provider or "default", key_digest)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = ProviderRateLimiter(
+                name=f"{key[0]}:{key_digest}",
+                requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                estimated_tokens_per_request=LLM_ESTIMATED_TOKENS_PER_REQUEST,
+            )
+            _limiters[key] = limiter
+            logger.info(
+                f"Created LLM rate limiter {limiter.name}: "
+                f"rpm={LLM_REQUESTS_PER_MINUTE}, tpm={LLM_TOKENS_PER_MINUTE}"
+            )
+        return limiter
+
+
+def rate_limit_kwargs(provider: str, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Return chat model kwargs (`rate_limiter`, `callbacks`) for a provider key."""
+    limiter = get_rate_limiter(provider, api_key)
+    if limiter is None:
+        return {}
+    return {"rate_limiter": limiter, "callbacks": [RateLimitUsageHandler(limiter)]}
+
+
+def get_rate_limiter_stats() -> list[Dict[str, Any]]:
+    """Return queue and wait statistics for every active limiter."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.get_stats() for limiter in limiters]
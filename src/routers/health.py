@@ -220,6 +220,55 @@ async def get_cache_stats() -> Dict[str, Any]:
             "timestamp": datetime.now().isoformat()
         }
 
+@router.get("/llm-rate-limits")
+async def get_llm_rate_limit_stats() -> Dict[str, Any]:
+    """获取LLM客户端限流队列统计（排队等待时间等）"""
+    try:
+        from src.llms.rate_limiter import get_rate_limiter_stats
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "rate_limiters": get_rate_limiter_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取LLM限流统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/search-cache")
+async def get_search_cache_stats() -> Dict[str, Any]:
+    """获取搜索结果缓存统计（命中率等）"""
+    try:
+        from src.tools.search_cache import search_cache
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "search_cache": search_cache.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取搜索缓存统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/crawl-cache")
+async def get_crawl_cache_stats() -> Dict[str, Any]:
+    """获取爬取缓存统计（命中率、磁盘占用等）"""
+    try:
+        from src.crawler.cache import get_crawl_cache
+        crawl_cache = get_crawl_cache()
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "crawl_cache": crawl_cache.get_stats() if crawl_cache else "disabled"
+        }
+    except Exception as e:
+        logger.error(f"获取爬取缓存统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
 @router.post("/cache/clear")
 async def clear_cache() -> Dict[str, Any]:
     """清空缓存（管理员功能）"""
@@ -256,4 +305,89 @@ async def cleanup_cache() -> Dict[str, Any]:
             "success": False,
             "error": str(e),
             "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/extraction-pool")
+async def get_extraction_pool_stats() -> Dict[str, Any]:
+    """获取正文提取工作进程统计（任务数、超时、重启次数等）"""
+    try:
+        from src.crawler.extraction_pool import extraction_pool
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "extraction_pool": extraction_pool.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取正文提取进程池统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/python-sandbox")
+async def get_python_sandbox_stats() -> Dict[str, Any]:
+    """获取 Python 沙箱进程池统计（活跃会话、超时、崩溃次数等）"""
+    try:
+        from src.utils.python_sandbox import python_sandbox
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "python_sandbox": python_sandbox.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取 Python 沙箱统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/artifacts")
+async def get_artifact_store_stats() -> Dict[str, Any]:
+    """获取工具输出 artifact 存储统计（保存、读取、淘汰次数）"""
+    try:
+        from src.utils.artifact_store import artifact_store
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "artifacts": artifact_store.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取 artifact 存储统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/browser-pool")
+async def get_browser_pool_stats() -> Dict[str, Any]:
+    """获取浏览器池统计（运行中的浏览器、租用、复用与回收次数）及登录状态缓存统计"""
+    try:
+        from src.tools.browser_pool import browser_pool
+        from src.tools.browser_state import browser_state_store
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "browser_pool": browser_pool.get_stats(),
+            "browser_state": browser_state_store.get_stats() if browser_state_store else None
+        }
+    except Exception as e:
+        logger.error(f"获取浏览器池统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+
+@router.get("/history-renderer")
+async def get_history_renderer_stats() -> Dict[str, Any]:
+    """获取浏览器录像后台渲染统计（提交、完成、失败次数）及录像存储统计（数量、占用、淘汰次数）"""
+    try:
+        from src.tools.history_renderer import history_renderer
+        from src.utils.browser_history_store import browser_history_store
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "history_renderer": history_renderer.get_stats(),
+            "history_store": browser_history_store.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取浏览器录像渲染统计失败: {e}")
+        return {
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
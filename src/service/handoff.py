@@ -0,0 +1,65 @@
+"""
+Streaming detection of the coordinator's `handoff_to_planner` reply.
+"""
+
+HANDOFF_TOKEN = "handoff_to_planner"
+
+
+class HandoffPrefixMatcher:
+    """Hold back coordinator tokens only while they could still be a handoff.
+
+    Tokens are buffered as long as the accumulated (left-stripped) text is a
+    prefix of `handoff_to_planner`. The moment it can no longer be one, the
+    buffer is released and every later token passes straight through, so a
+    normal reply starts streaming on its first chunk regardless of how the
+    provider splits it. Once the full token has been seen, the rest of the
+    reply is suppressed.
+    """
+
+    PENDING = "pending"
+    STREAMING = "streaming"
+    HANDOFF = "handoff"
+
+    def __init__(self, token: str = HANDOFF_TOKEN):
+        self.token = token
+        self.state = self.PENDING
+        self._buffer = ""
+
+    @property
+    def is_handoff(self) -> bool:
+        return self.state == self.HANDOFF
+
+    def feed(self, content: str) -> str:
+        """
+        Process a streamed chunk.
+
+        Args:
+            content: The chunk text
+
+        Returns:
+            The text that can be sent to the client now (may be empty)
+        """
+        if self.state == self.STREAMING:
+            return content
+        if self.state == self.HANDOFF:
+            return ""
+
+        self._buffer += content
+        candidate = self._buffer.lstrip()
+        if candidate.startswith(self.token):
+            self.state = self.HANDOFF
+            self._buffer = ""
+            return ""
+        if self.token.startswith(candidate):
+            return ""
+        self.state = self.STREAMING
+        released, self._buffer = self._buffer, ""
+        return released
+
+    def flush(self) -> str:
+        """Release any text still held back when the stream ends."""
+        if self.state != self.PENDING:
+            return ""
+        self.state = self.STREAMING
+        released, self._buffer = self._buffer, ""
+        return released
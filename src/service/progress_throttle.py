@@ -0,0 +1,69 @@
+"""
+Rate limiting of `tool_progress` SSE events.
+"""
+
+import time
+from typing import Callable, Dict, Optional
+
+
+class ToolProgressThrottle:
+    """Coalesce progress updates per tool call into at most one event per interval.
+
+    A tool can publish many small updates (every output chunk of a build, every
+    crawled page); they are merged per `tool_call_id` and released when the
+    interval since the last event of that call has passed. Text is appended and
+    only its last `max_chars` characters are kept; other fields take their
+    latest value. Whatever is still held back is released by `flush` when the
+    tool finishes, so the final updates are never lost.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.5,
+        max_chars: int = 4000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval = min_interval
+        self.max_chars = max_chars
+        self.clock = clock
+        self._pending: Dict[str, dict] = {}
+        self._last_sent: Dict[str, float] = {}
+
+    def _merge(self, tool_call_id: str, data: dict) -> dict:
+        pending = self._pending.get(tool_call_id)
+        if pending is None:
+            merged = dict(data)
+        else:
+            merged = {**pending, **data}
+            merged["text"] = pending.get("text", "") + data.get("text", "")
+        text = merged.get("text", "")
+        if self.max_chars and len(text) > self.max_chars:
+            merged["text"] = text[-self.max_chars:]
+            merged["truncated"] = True
+        return merged
+
+    def feed(self, tool_call_id: str, data: dict) -> Optional[dict]:
+        """
+        Add an update of a tool call.
+
+        Args:
+            tool_call_id: The call the update belongs to
+            data: Event payload with a `text` field
+
+        Returns:
+            The payload to send now, or None while it is held back
+        """
+        merged = self._merge(tool_call_id, data)
+        now = self.clock()
+        last = self._last_sent.get(tool_call_id)
+        if last is not None and now - last < self.min_interval:
+            self._pending[tool_call_id] = merged
+            return None
+        self._pending.pop(tool_call_id, None)
+        self._last_sent[tool_call_id] = now
+        return merged
+
+    def flush(self, tool_call_id: str) -> Optional[dict]:
+        """Release what is held back for a finished tool call and forget it."""
+        self._last_sent.pop(tool_call_id, None)
+        return self._pending.pop(tool_call_id, None)
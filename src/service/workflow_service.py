@@ -2,12 +2,28 @@ import logging
 from typing import Optional
 import re
 import asyncio
+import time
 
 from src.config import TEAM_MEMBER_CONFIGRATIONS, TEAM_MEMBERS
+from src.config.env import (
+    SPECULATIVE_PLANNING_ENABLED,
+    WORKFLOW_TIME_BUDGET_SECONDS,
+    TOOL_PROGRESS_MIN_INTERVAL,
+    TOOL_PROGRESS_MAX_CHARS,
+)
 from src.graph import build_graph
+from src.graph.speculation import discard_speculation, pop_speculation_report
 from src.tools.browser import browser_tool
 from src.tools.smart_browser import smart_browser_tool
 from src.llms.llm import get_llm_by_type
+from src.service.handoff import HandoffPrefixMatcher
+from src.service.progress_throttle import ToolProgressThrottle
+from src.utils.tool_progress import TOOL_CACHE_HIT_EVENT, TOOL_PROGRESS_EVENT
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
 from langchain_community.adapters.openai import convert_message_to_dict
 import uuid
 
@@ -28,9 +44,6 @@ logger = logging.getLogger(__name__)
 # Create the graph
 graph = build_graph()
 
-# Cache for coordinator messages
-MAX_CACHE_SIZE = 3
-
 # Global variable to track current browser tool instance
 current_browser_tool: Optional[browser_tool] = None
 current_smart_browser_tool: Optional = None
@@ -45,6 +58,18 @@ def get_current_smart_browser_tool():
     return current_smart_browser_tool
 
 
+async def _propagate_abort(abort_event: asyncio.Event, workflow_context: WorkflowContext):
+    """Cancel running tools as soon as the abort is requested.
+
+    The event loop below only notices an abort between graph events, and a
+    tool that is running emits none; this fires the workflow's cancellation
+    token immediately instead.
+    """
+    await abort_event.wait()
+    logger.info("Abort signal received, cancelling running tools")
+    workflow_context.cancel()
+
+
 async def run_agent_workflow(
     user_input_messages: list,
     debug: Optional[bool] = False,
@@ -55,6 +80,8 @@ async def run_agent_workflow(
     user_id: Optional[int] = None,
     request_headers: Optional[dict] = None,
     thread_id: Optional[str] = None,
+    speculative_planning: Optional[bool] = None,
+    browser_history_format: Optional[str] = None,
 ):
     """Run the agent workflow to process and respond to user input messages.
 
@@ -72,6 +99,10 @@ async def run_agent_workflow(
         team_members: Optional list of specific team members to involve in the workflow.
             If None, uses default TEAM_MEMBERS configuration
         abort_event: Optional asyncio.Event that can be set to abort the workflow
+        speculative_planning: If True, starts the planner while the coordinator is
+            still deciding. None falls back to SPECULATIVE_PLANNING_ENABLED
+        browser_history_format: Recording of browser tasks ("gif", "webp" or "off").
+            None falls back to the user's browser settings, then BROWSER_HISTORY_FORMAT
 
     Returns:
         Yields various event dictionaries containing workflow state and progress information,
@@ -93,6 +124,8 @@ async def run_agent_workflow(
     logger.info(f"Starting workflow with user input: {user_input_messages}")
 
     workflow_id = str(uuid.uuid4())
+    if speculative_planning is None:
+        speculative_planning = SPECULATIVE_PLANNING_ENABLED
 
     team_members = team_members if team_members else TEAM_MEMBERS
 
@@ -150,30 +183,62 @@ async def run_agent_workflow(
 
     streaming_llm_agents = [*team_members, "planner", "coordinator"]
 
-    # Reset coordinator cache at the start of each workflow
     global current_browser_tool, current_smart_browser_tool
-    coordinator_cache = []
+    # Detects the coordinator's handoff reply without delaying normal replies
+    coordinator_matcher = HandoffPrefixMatcher()
+    coordinator_message_id = None
+    # 工具进度事件按 tool_call_id 合并限流，避免逐行输出刷屏
+    progress_throttle = ToolProgressThrottle(
+        min_interval=TOOL_PROGRESS_MIN_INTERVAL,
+        max_chars=TOOL_PROGRESS_MAX_CHARS,
+    )
+    # 命中工作流内工具缓存的 tool run_id，用于在 tool_call_result 中标注
+    cached_tool_runs = set()
     
     # Create browser tool with user-specific configuration
     if user_id:
         from src.tools.browser import create_browser_config, BrowserTool
-        from src.tools.browser import Browser
         from src.tools.smart_browser import SmartBrowserTool
-        # 传递request_headers以支持移动端检测
+        # 传递request_headers以支持移动端检测；浏览器在首次使用时从浏览器池租用
         user_browser_config = create_browser_config(user_id, request_headers=request_headers)
-        user_browser = Browser(config=user_browser_config)
         current_browser_tool = BrowserTool()
-        current_browser_tool.browser = user_browser
+        current_browser_tool.browser_config = user_browser_config
+        current_browser_tool.history_format = browser_history_format
         
         # Create smart browser tool with user-specific configuration
         current_smart_browser_tool = SmartBrowserTool()
-        current_smart_browser_tool.browser = user_browser
+        current_smart_browser_tool.history_format = browser_history_format
+    elif browser_history_format:
+        # 匿名请求指定了录像格式：使用独立的工具实例，避免影响共享实例
+        from src.tools.browser import BrowserTool
+        from src.tools.smart_browser import SmartBrowserTool
+        current_browser_tool = BrowserTool(history_format=browser_history_format)
+        current_smart_browser_tool = SmartBrowserTool(history_format=browser_history_format)
     else:
         current_browser_tool = browser_tool
         current_smart_browser_tool = smart_browser_tool
-    is_handoff_case = False
     is_workflow_triggered = False
 
+    # Nodes and tools reach per-workflow memo tables and metrics through this
+    workflow_context = WorkflowContext(
+        workflow_id=workflow_id,
+        thread_id=thread_id,
+        user_id=user_id,
+        deadline=(
+            time.monotonic() + WORKFLOW_TIME_BUDGET_SECONDS
+            if WORKFLOW_TIME_BUDGET_SECONDS > 0
+            else None
+        ),
+    )
+    context_token = bind_workflow_context(workflow_context)
+    abort_watcher = (
+        asyncio.create_task(_propagate_abort(abort_event, workflow_context))
+        if abort_event is not None
+        else None
+    )
+
+    # 正常结束时的推测执行报告；中止或出错时在 finally 中丢弃
+    speculation_report = None
     try:
         async for event in graph.astream_events(
             {
@@ -184,6 +249,8 @@ async def run_agent_workflow(
                 "messages": user_input_messages,
                 "deep_thinking_mode": deep_thinking_mode,
                 "search_before_planning": search_before_planning,
+                "speculative_planning": speculative_planning,
+                "workflow_id": workflow_id,
                 "user_id": user_id,
             },
             version="v2",
@@ -192,6 +259,8 @@ async def run_agent_workflow(
             # Check for abort signal
             if abort_event and abort_event.is_set():
                 logger.info("Abort signal received, terminating workflow")
+                # 通知仍在运行的工具（如 bash 子进程）立即停止
+                workflow_context.cancel()
                 if current_browser_tool:
                     await current_browser_tool.terminate()
                 if current_smart_browser_tool:
@@ -256,11 +325,26 @@ async def run_agent_workflow(
                     },
                 }
             elif kind == "on_chat_model_start" and node in streaming_llm_agents:
+                if node == "coordinator":
+                    coordinator_matcher = HandoffPrefixMatcher()
                 ydata = {
                     "event": "start_of_llm",
                     "data": {"agent_name": node},
                 }
             elif kind == "on_chat_model_end" and node in streaming_llm_agents:
+                if node == "coordinator":
+                    # A short reply that was still a possible handoff prefix
+                    # when the stream ended is a normal reply after all.
+                    pending_content = coordinator_matcher.flush()
+                    if pending_content:
+                        yield {
+                            "event": "message",
+                            "data": {
+                                "agent_name": node,
+                                "message_id": coordinator_message_id,
+                                "delta": {"content": pending_content},
+                            },
+                        }
                 ydata = {
                     "event": "end_of_llm",
                     "data": {"agent_name": node},
@@ -286,36 +370,20 @@ async def run_agent_workflow(
                 else:
                     # Check if the message is from the coordinator
                     if node == "coordinator":
-                        if len(coordinator_cache) < MAX_CACHE_SIZE:
-                            coordinator_cache.append(content)
-                            cached_content = "".join(coordinator_cache)
-                            if cached_content.startswith("handoff"):
-                                is_handoff_case = True
-                                continue
-                            if len(coordinator_cache) < MAX_CACHE_SIZE:
-                                continue
-                            # Send the cached message (non-handoff coordinator response)
-                            ydata = {
-                                "event": "message",
-                                "data": {
-                                    "agent_name": node,
-                                    "message_id": data["chunk"].id,
-                                    "delta": {"content": cached_content},
-                                },
-                            }
-                        elif not is_handoff_case:
-                            # Cache full, not a handoff: send token directly
-                            ydata = {
-                                "event": "message",
-                                "data": {
-                                    "agent_name": node,
-                                    "message_id": data["chunk"].id,
-                                    "delta": {"content": content},
-                                },
-                            }
-                        else:
-                            # is_handoff_case=True: suppress all coordinator tokens
+                        coordinator_message_id = data["chunk"].id
+                        # Held back only while it could still be handoff_to_planner;
+                        # suppressed entirely once the handoff is recognised.
+                        content = coordinator_matcher.feed(content)
+                        if not content:
                             continue
+                        ydata = {
+                            "event": "message",
+                            "data": {
+                                "agent_name": node,
+                                "message_id": data["chunk"].id,
+                                "delta": {"content": content},
+                            },
+                        }
                     else:
                         # For other agents, send the message directly
                         ydata = {
@@ -335,23 +403,47 @@ async def run_agent_workflow(
                         "tool_input": data.get("input"),
                     },
                 }
+            elif kind == "on_custom_event" and name == TOOL_PROGRESS_EVENT and node in team_members:
+                tool_call_id = f"{workflow_id}_{node}_{data.get('tool_name')}_{run_id}"
+                progress = progress_throttle.feed(tool_call_id, data)
+                if progress is None:
+                    continue
+                ydata = {
+                    "event": "tool_progress",
+                    "data": {"tool_call_id": tool_call_id, **progress},
+                }
+            elif kind == "on_custom_event" and name == TOOL_CACHE_HIT_EVENT:
+                cached_tool_runs.add(run_id)
+                continue
             elif kind == "on_tool_end" and node in team_members:
+                tool_call_id = f"{workflow_id}_{node}_{name}_{run_id}"
+                # Progress still held back by the throttle goes out before the result
+                progress = progress_throttle.flush(tool_call_id)
+                if progress is not None:
+                    yield {
+                        "event": "tool_progress",
+                        "data": {"tool_call_id": tool_call_id, **progress},
+                    }
                 ydata = {
                     "event": "tool_call_result",
                     "data": {
-                        "tool_call_id": f"{workflow_id}_{node}_{name}_{run_id}",
+                        "tool_call_id": tool_call_id,
                         "tool_name": name,
                         "tool_result": (
                             data["output"].content if data.get("output") and hasattr(data["output"], "content") 
                             else str(data["output"]) if data.get("output") else ""
                         ),
+                        "metadata": {"cache_hit": run_id in cached_tool_runs},
                     },
                 }
+                cached_tool_runs.discard(run_id)
             else:
                 continue
             yield ydata
+        speculation_report = pop_speculation_report(workflow_id)
     except asyncio.CancelledError:
         logger.info("Workflow cancelled, terminating browser agent if exists")
+        workflow_context.cancel()
         # Mark thread as interrupted in checkpointer
         try:
             await graph.aupdate_state(
@@ -372,6 +464,12 @@ async def run_agent_workflow(
                 logger.warning(f"终止智能浏览器工具时出现警告: {terminate_error}")
         raise
     finally:
+        if abort_watcher is not None:
+            abort_watcher.cancel()
+        reset_workflow_context(context_token)
+        # Speculative work left behind by an aborted or failed workflow is no longer
+        # needed; a finished workflow has already taken its report above
+        discard_speculation(workflow_id)
         # 确保在工作流结束时清理浏览器实例
         if current_browser_tool:
             try:
@@ -429,14 +527,22 @@ async def run_agent_workflow(
                 "content": str(getattr(msg, 'content', ''))
             }
     
+    final_state_data = {
+        "messages": [
+            safe_convert_message(msg)
+            for msg in data["output"].get("messages", [])
+        ],
+    }
+    if speculation_report:
+        logger.info(f"Speculative planning report for workflow {workflow_id}: {speculation_report}")
+        final_state_data["speculation"] = speculation_report
+    workflow_metrics = workflow_context.get_metrics()
+    if workflow_metrics:
+        logger.info(f"Workflow {workflow_id} metrics: {workflow_metrics}")
+        final_state_data["metrics"] = workflow_metrics
     yield {
         "event": "final_session_state",
-        "data": {
-            "messages": [
-                safe_convert_message(msg)
-                for msg in data["output"].get("messages", [])
-            ],
-        },
+        "data": final_state_data,
     }
 
 
@@ -133,6 +133,14 @@ class UserService:
             logger.warning("Invalid token")
             return None
     
+    @staticmethod
+    def get_user_id_from_authorization(authorization: Optional[str]) -> Optional[int]:
+        """从 "Bearer <token>" 格式的Authorization请求头解析用户ID，缺失或无效时返回None"""
+        if not authorization or not authorization.startswith("Bearer "):
+            return None
+        payload = UserService.verify_token(authorization[len("Bearer "):].strip())
+        return payload.get("user_id") if payload else None
+    
     @staticmethod
     def verify_token_with_details(token: str) -> Dict[str, Any]:
         """验证JWT token并返回详细信息"""
@@ -0,0 +1,38 @@
+import logging
+from typing import Annotated
+
+from langchain_core.tools import tool
+from .decorators import log_io
+
+from src.utils.artifact_store import artifact_store
+from src.utils.workflow_context import get_workflow_context
+
+logger = logging.getLogger(__name__)
+
+# Characters returned per call; longer artifacts are read in several calls
+READ_CHUNK_CHARS = 4000
+
+
+@tool
+@log_io(memoize=False)
+def read_artifact(
+    artifact_id: Annotated[str, "The artifact id given in a shortened tool result."],
+    offset: Annotated[int, "Character offset to start reading from."] = 0,
+) -> str:
+    """Use this to read the full output of an earlier tool call that was shortened, starting at the given offset."""
+    context = get_workflow_context()
+    workflow_id = context.workflow_id if context is not None else "default"
+    content = artifact_store.read(workflow_id, artifact_id.strip())
+    if content is None:
+        error_msg = f"Failed to read artifact. Error: unknown artifact {artifact_id!r}"
+        logger.error(error_msg)
+        return error_msg
+    offset = max(0, offset)
+    end = min(len(content), offset + READ_CHUNK_CHARS)
+    result = content[offset:end]
+    if end < len(content):
+        result += (
+            f"\n\n[Showing characters {offset}-{end} of {len(content)}; "
+            f"call read_artifact with offset={end} to continue.]"
+        )
+    return result
@@ -1,15 +1,35 @@
+import asyncio
 import logging
-import subprocess
+import queue
+from concurrent import futures
 from typing import Annotated
 from langchain_core.tools import tool
 from .decorators import log_io
 
+from src.config.env import BASH_MAX_OUTPUT_BYTES
+from src.utils.background_loop import background_loop
+from src.utils.cancellation import current_cancel_event, remaining_tool_time
+from src.utils.subprocess_runner import run_command
+from src.utils.tool_progress import publish_tool_progress
+
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# How often buffered output is flushed to the frontend (seconds)
+PROGRESS_INTERVAL = 0.5
+
+
+def _drain(chunks: "queue.Queue") -> str:
+    parts = []
+    while True:
+        try:
+            parts.append(chunks.get_nowait())
+        except queue.Empty:
+            return "".join(parts)
+
 
 @tool
-@log_io
+@log_io(memoize=False)
 def bash_tool(
     cmd: Annotated[str, "The bash command to be executed."],
     timeout: Annotated[
@@ -17,27 +37,53 @@ def bash_tool(
     ] = 120,
 ):
     """Use this to execute bash command and do necessary operations."""
+    remaining = remaining_tool_time()
+    if remaining is not None:
+        timeout = max(0, min(timeout, int(remaining)))
     logger.info(f"Executing Bash Command: {cmd} with timeout {timeout}s")
     try:
-        # Execute the command and capture output
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True, timeout=timeout
+        # Output arrives on the background loop; it is published from this
+        # thread, which carries the tool run the progress events belong to
+        chunks: "queue.Queue" = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            run_command(
+                cmd,
+                timeout,
+                max_output_bytes=BASH_MAX_OUTPUT_BYTES,
+                on_output=lambda stream, text: chunks.put(text),
+                cancel_event=current_cancel_event(),
+            ),
+            background_loop.loop,
         )
+        # A TimeoutError raised by run_command is indistinguishable from a wait
+        # that ran out, so poll for completion instead of catching it
+        while not futures.wait([future], PROGRESS_INTERVAL).done:
+            publish_tool_progress("bash_tool", _drain(chunks))
+        result = future.result()
+        publish_tool_progress("bash_tool", _drain(chunks))
+
+        if result.cancelled:
+            error_message = f"Command '{cmd}' was cancelled because the workflow was aborted."
+            logger.error(error_message)
+            return error_message
+        if result.timed_out:
+            # Handle timeout
+            error_message = (
+                f"Command '{cmd}' timed out after {timeout}s.\n"
+                f"Stdout: {result.stdout}\nStderr: {result.stderr}"
+            )
+            logger.error(error_message)
+            return error_message
+        if result.returncode != 0:
+            # If command fails, return error information
+            error_message = (
+                f"Command failed with exit code {result.returncode}.\n"
+                f"Stdout: {result.stdout}\nStderr: {result.stderr}"
+            )
+            logger.error(error_message)
+            return error_message
         # Return stdout as the result
         return result.stdout
-    except subprocess.CalledProcessError as e:
-        # If command fails, return error information
-        error_message = f"Command failed with exit code {
-            e.returncode}.\nStdout: {
-            e.stdout}\nStderr: {
-            e.stderr}"
-        logger.error(error_message)
-        return error_message
-    except subprocess.TimeoutExpired:
-        # Handle timeout exception
-        error_message = f"Command '{cmd}' timed out after {timeout}s."
-        logger.error(error_message)
-        return error_message
     except Exception as e:
         # Catch any other exceptions
         error_message = f"Error executing command: {str(e)}"
@@ -5,9 +5,9 @@ import os
 import signal
 import subprocess
 from pydantic import BaseModel, Field
-from typing import Optional, ClassVar, Type
+from typing import Callable, Optional, ClassVar, Type
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
+from browser_use import AgentHistoryList, BrowserConfig
 from browser_use import Agent as BrowserAgent
 from src.llms.llm import vl_llm
 from src.tools.decorators import create_logged_tool
@@ -26,7 +26,13 @@ from src.config import (
     BROWSER_HISTORY_DIR,
 )
 from src.tools.proxy_manager import ProxyManager
-import uuid
+from src.tools.browser_pool import browser_pool
+from src.tools.browser_state import apply_storage_state, browser_state_store, capture_storage_state, state_owner
+from src.tools.history_renderer import history_frames, history_renderer, new_history_path, resolve_history_format
+from src.utils.browser_history_store import browser_history_store
+from src.utils.cancellation import ToolCancelledError, await_cancellable, run_cancellable
+from src.utils.tool_progress import publish_tool_progress
+from src.utils.workflow_context import get_workflow_context
 import asyncio
 
 # Configure logging
@@ -84,6 +90,8 @@ def create_browser_config(user_id: int = None, target_url: str = None, request_h
     
     # 默认窗口大小
     window_size = '1920x1080'
+    # 用户设置的浏览器录像格式（gif/webp/off），为空时使用环境变量
+    history_format = None
     
     config = BrowserConfig(
         headless=headless_mode,  # 移动端强制无头模式，桌面端根据配置决定
@@ -124,6 +132,7 @@ def create_browser_config(user_id: int = None, target_url: str = None, request_h
                     
                     # 获取窗口大小设置
                     window_size = browser_settings.get('window_size', '1920x1080')
+                    history_format = browser_settings.get('history_format')
                     
                     proxy_strategy = browser_settings.get('proxy_strategy', proxy_strategy)
                     proxy_server = browser_settings.get('proxy_server')
@@ -161,6 +170,7 @@ def create_browser_config(user_id: int = None, target_url: str = None, request_h
     
     # 更新config对象的headless设置
     config.headless = headless_mode
+    config.history_format = history_format
     
     # 解析窗口大小并存储到config中（用于后续创建browser时使用）
     try:
@@ -240,6 +250,118 @@ def create_browser_config(user_id: int = None, target_url: str = None, request_h
 # expected_browser = Browser(config=browser_config)
 
 
+def browser_step_callback(tool_name: str):
+    """创建 browser-use 的单步回调，把每一步的目标和当前页面作为工具进度发布"""
+
+    def on_step(state, model_output, n_steps):
+        brain = getattr(model_output, "current_state", None)
+        goal = getattr(brain, "next_goal", None) or getattr(model_output, "next_goal", None)
+        url = getattr(state, "url", None)
+        text = f"Step {n_steps}: {goal or 'working'}"
+        if url:
+            text += f" ({url})"
+        publish_tool_progress(tool_name, text + "\n", step=n_steps, url=url)
+
+    return on_step
+
+
+def _is_successful(result) -> bool:
+    if not isinstance(result, AgentHistoryList) or not result.is_done():
+        return False
+    is_successful = getattr(result, "is_successful", None)
+    return is_successful is None or is_successful() is not False
+
+
+def _submit_recording(result, generated_gif_path: str, user_id: int = None) -> None:
+    """把录像交给后台渲染，并登记到录像索引（按用户配额与工作流归档）；在线程中调用"""
+    history_format = os.path.splitext(generated_gif_path)[1].lstrip(".")
+    context = get_workflow_context()
+    browser_history_store.register(
+        generated_gif_path, user_id=user_id, workflow_id=context.workflow_id if context else None
+    )
+
+    def on_rendered(future):
+        if future.cancelled() or future.exception() is not None:
+            browser_history_store.forget(generated_gif_path)
+        else:
+            browser_history_store.mark_rendered(generated_gif_path)
+
+    try:
+        future = history_renderer.submit(history_frames(result), generated_gif_path, history_format)
+    except Exception as e:
+        logger.warning(f"提交浏览器录像生成任务失败: {e}")
+        future = None
+    if future is None:
+        browser_history_store.forget(generated_gif_path)
+    else:
+        future.add_done_callback(on_rendered)
+
+
+async def run_browser_agent(
+    tool_name: str,
+    instruction: str,
+    browser_config: BrowserConfig,
+    generated_gif_path: str,
+    on_agent: Optional[Callable[[BrowserAgent], None]] = None,
+):
+    """
+    在浏览器池的事件循环上执行浏览器任务：租用预热浏览器的独立上下文，结束后归还。
+
+    必须运行在 browser_pool.loop 上（Playwright 对象绑定在该事件循环）。
+    登录状态与录像归属取自当前工作流上下文的用户。
+
+    Args:
+        tool_name: 发布进度时使用的工具名
+        instruction: 浏览器任务指令
+        browser_config: 浏览器配置（决定使用哪个预热浏览器及窗口大小）
+        generated_gif_path: 任务录像（.gif/.webp）的保存路径，为空时不录制；录像在后台生成
+        on_agent: 创建 agent 后的回调，便于调用方在中止时停止它
+
+    Returns:
+        browser_use agent 的运行结果
+    """
+    # 登录状态只属于当前工作流的用户；工具实例由并发的工作流共享，不能携带用户身份
+    user_id = state_owner()
+    state_store = browser_state_store if user_id else None
+    async with browser_pool.lease(browser_config) as lease:
+        if state_store is not None:
+            # 恢复用户上次成功任务后的 Cookie 与 localStorage，免去重复登录
+            saved_state = state_store.load(user_id)
+            if saved_state:
+                try:
+                    await apply_storage_state(lease.context, saved_state)
+                except Exception as e:
+                    logger.warning(f"恢复浏览器登录状态失败: {e}")
+        agent = BrowserAgent(
+            task=instruction,
+            llm=vl_llm,
+            browser=lease.browser,
+            browser_context=lease.context,
+            # 录像不在任务结束时内联编码，改为交给后台渲染进程
+            generate_gif=False,
+            register_new_step_callback=browser_step_callback(tool_name),
+        )
+        if on_agent is not None:
+            on_agent(agent)
+        result = await agent.run()
+        if generated_gif_path:
+            # 录像索引的读写与清理会访问磁盘，放到线程中执行，避免阻塞浏览器池事件循环上的其他任务
+            await asyncio.to_thread(_submit_recording, result, generated_gif_path, user_id)
+        if state_store is not None and _is_successful(result):
+            try:
+                state = await capture_storage_state(lease.context)
+                if state:
+                    state_store.save(user_id, state)
+            except Exception as e:
+                logger.warning(f"保存浏览器登录状态失败: {e}")
+        return result
+
+
+async def run_on_browser_loop(coro):
+    """从其他事件循环（异步节点）执行浏览器任务：浏览器对象绑定在浏览器池的事件循环上，任务提交到那里执行"""
+    return await await_cancellable(asyncio.wrap_future(browser_pool.loop.submit(coro)))
+
+
 class BrowserUseInput(BaseModel):
     """Input for WriteFileTool."""
 
@@ -254,7 +376,10 @@ class BrowserTool(BaseTool):
     )
 
     _agent: Optional[BrowserAgent] = None
-    browser: Optional[Browser] = None
+    # 用户专属浏览器配置（由workflow_service设置），为空时按调用参数创建
+    browser_config: Optional[BrowserConfig] = None
+    # 本次请求指定的录像格式（gif/webp/off），优先于用户设置与环境变量
+    history_format: Optional[str] = None
 
     def _generate_browser_result(
         self, result_content: str, generated_gif_path: str
@@ -264,53 +389,41 @@ class BrowserTool(BaseTool):
             "generated_gif_path": generated_gif_path,
         }
 
+    def _resolve_browser_config(self, user_id: int = None, request_headers: dict = None) -> BrowserConfig:
+        if self.browser_config is not None:
+            return self.browser_config
+        # 动态创建浏览器配置，传入请求头以检测移动端
+        return create_browser_config(user_id, request_headers=request_headers)
+
+    def _new_history_path(self, browser_config: BrowserConfig) -> Optional[str]:
+        history_format = resolve_history_format(self.history_format, getattr(browser_config, "history_format", None))
+        return new_history_path(BROWSER_HISTORY_DIR, history_format)
+
+    async def _run_browser_task(self, instruction: str, browser_config: BrowserConfig, generated_gif_path: str):
+        def on_agent(agent):
+            self._agent = agent
+
+        return await run_browser_agent(self.name, instruction, browser_config, generated_gif_path, on_agent=on_agent)
+
+    def _format_result(self, result, generated_gif_path: str) -> str:
+        if isinstance(result, AgentHistoryList):
+            result = result.final_result()
+        return json.dumps(self._generate_browser_result(result, generated_gif_path))
+
     def _run(self, instruction: str, user_id: int = None, request_headers: dict = None) -> str:
-        generated_gif_path = f"{BROWSER_HISTORY_DIR}/{uuid.uuid4()}.gif"
         """Run the browser task synchronously."""
-        
-        # 如果已经有browser实例（由workflow_service设置），使用它
-        if hasattr(self, 'browser') and self.browser:
-            browser_instance = self.browser
-        else:
-            # 否则动态创建浏览器配置，传入请求头以检测移动端
-            browser_config = create_browser_config(user_id, request_headers=request_headers)
-            browser_instance = Browser(config=browser_config)
-        
+        generated_gif_path = None
         try:
-            self._agent = BrowserAgent(
-                task=instruction,
-                llm=vl_llm,
-                browser=browser_instance,
-                generate_gif=generated_gif_path,
+            browser_config = self._resolve_browser_config(user_id, request_headers)
+            generated_gif_path = self._new_history_path(browser_config)
+            # 工作流中止或超时时取消浏览器任务，上下文随之关闭
+            result = run_cancellable(
+                self._run_browser_task(instruction, browser_config, generated_gif_path),
+                loop=browser_pool.loop,
             )
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(self._agent.run())
-
-                if isinstance(result, AgentHistoryList):
-                    return json.dumps(
-                        self._generate_browser_result(
-                            result.final_result(), generated_gif_path
-                        )
-                    )
-                else:
-                    return json.dumps(
-                        self._generate_browser_result(result, generated_gif_path)
-                    )
-            finally:
-                # 确保清理浏览器实例
-                # if self._agent and self._agent.browser:
-                #     try:
-                #         cleanup_loop = asyncio.new_event_loop()
-                #         asyncio.set_event_loop(cleanup_loop)
-                #         cleanup_loop.run_until_complete(self._agent.browser.close())
-                #         cleanup_loop.close()
-                #     except Exception as cleanup_error:
-                #         logger.warning(f"浏览器清理时出现警告: {cleanup_error}")
-                loop.close()
-                
+            return self._format_result(result, generated_gif_path)
+        except (ToolCancelledError, TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"浏览器任务执行失败: {str(e)}")
             return json.dumps({
@@ -321,8 +434,6 @@ class BrowserTool(BaseTool):
         finally:
             # 强制清理所有引用
             self._agent = None
-            if hasattr(self, 'browser'):
-                self.browser = None
 
     def _force_kill_chrome_processes(self):
         """为了安全起见，不再强制终止Chrome进程"""
@@ -334,60 +445,30 @@ class BrowserTool(BaseTool):
         return True
 
     async def terminate(self):
-        """Terminate the browser agent if it exists."""
-        
-        if self._agent and self._agent.browser:
+        """Stop the running browser agent; the pooled browser itself stays warm."""
+        if self._agent:
             try:
-                # 尝试优雅关闭浏览器
-                await self._agent.browser.close()
-                logger.info("浏览器实例已成功关闭")
+                # 浏览器由浏览器池管理，这里只停止agent，上下文在任务取消后归还
+                self._agent.stop()
+                logger.info("浏览器agent已停止")
             except Exception as e:
                 logger.warning(f"浏览器终止时出现警告: {str(e)}")
         
-        # 如果有独立的浏览器实例，也要清理
-        if hasattr(self, 'browser') and self.browser:
-            try:
-                await self.browser.close()
-                logger.info("独立浏览器实例已成功关闭")
-            except Exception as e:
-                logger.warning(f"独立浏览器终止时出现警告: {str(e)}")
-            finally:
-                self.browser = None
-        
         # 清理引用
         self._agent = None
 
     async def _arun(self, instruction: str, user_id: int = None) -> str:
         """Run the browser task asynchronously."""
-        generated_gif_path = f"{BROWSER_HISTORY_DIR}/{uuid.uuid4()}.gif"
-        
-        # 如果已经有browser实例（由workflow_service设置），使用它
-        if hasattr(self, 'browser') and self.browser:
-            browser_instance = self.browser
-        else:
-            # 否则动态创建浏览器配置
-            browser_config = create_browser_config(user_id)
-            browser_instance = Browser(config=browser_config)
-        
-        self._agent = BrowserAgent(
-            task=instruction,
-            llm=vl_llm,
-            browser=browser_instance,
-            generate_gif=generated_gif_path,  # Will be set per request
-        )
+        generated_gif_path = None
         try:
-            result = await self._agent.run()
-            if isinstance(result, AgentHistoryList):
-                return json.dumps(
-                    self._generate_browser_result(
-                        result.final_result(), generated_gif_path
-                    )
-                )
-            else:
-                return json.dumps(
-                    self._generate_browser_result(result, generated_gif_path)
-                )
+            browser_config = self._resolve_browser_config(user_id)
+            generated_gif_path = self._new_history_path(browser_config)
+            result = await run_on_browser_loop(
+                self._run_browser_task(instruction, browser_config, generated_gif_path)
+            )
+            return self._format_result(result, generated_gif_path)
         except Exception as e:
+            # 异步调用不经过 _call_in_scope，中止和超时也在这里返回错误结果
             logger.error(f"浏览器任务执行失败: {str(e)}")
             return json.dumps({
                 "result_content": f"浏览器任务执行失败: {str(e)}",
@@ -399,7 +480,7 @@ class BrowserTool(BaseTool):
             self._agent = None
 
 
-BrowserTool = create_logged_tool(BrowserTool)
+BrowserTool = create_logged_tool(BrowserTool, memoize=False)
 browser_tool = BrowserTool()
 
 if __name__ == "__main__":
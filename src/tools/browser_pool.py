@@ -0,0 +1,434 @@
+"""
+Warm browser processes shared across workflows.
+
+Launching Chromium takes seconds and a few hundred MB, and doing it for every
+workflow made the browser tool slow to start. The pool keeps up to
+`max_browsers` browser processes running on its own event loop thread and
+leases an isolated context (own cookies, storage and viewport) to each browser
+task. Browsers are keyed by what is fixed per process (headless mode, proxy,
+executable); the viewport belongs to the context, so it can differ per lease.
+
+Browsers are launched lazily on the first lease that needs them, closed after
+`max_uses` leases or `idle_ttl` seconds without use, and the idle ones are
+recycled when the browser processes together use more than `max_memory_mb`
+(measured at most every `memory_check_interval` seconds, off the loop).
+While every browser is busy with other settings, up to `max_overflow` extra
+browsers are launched; further leases wait for one to be returned.
+
+Launching and closing browsers take seconds, so they happen outside the
+pool's lock: a lease reserves a placeholder entry, launches, and leases for
+the same settings that arrive meanwhile wait for that launch.
+
+Playwright objects are bound to the loop they were created on, so everything
+that touches a leased browser runs on `browser_pool.loop`.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.config.env import (
+    BROWSER_POOL_IDLE_TTL,
+    BROWSER_POOL_MAX_BROWSERS,
+    BROWSER_POOL_MAX_MEMORY_MB,
+    BROWSER_POOL_MAX_OVERFLOW,
+    BROWSER_POOL_MAX_USES,
+    BROWSER_POOL_MEMORY_CHECK_INTERVAL,
+)
+from src.utils.background_loop import BackgroundLoop
+
+logger = logging.getLogger(__name__)
+
+# Process names of browsers started by Playwright
+BROWSER_PROCESS_NAMES = ("chrom", "headless_shell")
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """Launch settings that are fixed for the lifetime of a browser process."""
+
+    headless: bool = True
+    chrome_instance_path: Optional[str] = None
+    proxy: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def from_config(cls, config: Any) -> "BrowserProfile":
+        proxy = getattr(config, "proxy", None) or {}
+        if not isinstance(proxy, dict):
+            proxy = {key: getattr(proxy, key, None) for key in ("server", "username", "password")}
+        return cls(
+            headless=bool(getattr(config, "headless", True)),
+            chrome_instance_path=getattr(config, "chrome_instance_path", None),
+            proxy=tuple(sorted((k, str(v)) for k, v in proxy.items() if v)),
+        )
+
+
+@dataclass
+class BrowserLease:
+    """A browser and the context leased from it for one task."""
+
+    browser: Any
+    context: Any
+    profile: BrowserProfile
+
+
+@dataclass
+class _PooledBrowser:
+    # None while the browser is being launched
+    browser: Any
+    profile: BrowserProfile
+    uses: int = 0
+    active: int = 0
+    last_used: float = 0.0
+    # Closed as soon as its last lease is returned
+    retiring: bool = False
+    # Set when the launch finished (successfully or not)
+    ready: Optional[asyncio.Event] = None
+
+
+async def _launch_browser(config: Any) -> Any:
+    from browser_use import Browser
+
+    browser = Browser(config=config)
+    # browser_use starts Playwright on first use; do it now so the lease is warm
+    launch = getattr(browser, "get_playwright_browser", None)
+    if launch is not None:
+        await launch()
+    return browser
+
+
+async def _new_context(browser: Any, config: Any) -> Any:
+    from browser_use.browser.context import BrowserContextConfig
+
+    viewport = getattr(config, "viewport", None)
+    context_config = (
+        BrowserContextConfig(browser_window_size=viewport) if viewport else BrowserContextConfig()
+    )
+    return await browser.new_context(context_config)
+
+
+def browser_memory_bytes() -> int:
+    """Resident memory of the browser processes started by this process (0 without /proc)."""
+    parents: Dict[int, int] = {}
+    rss: Dict[int, int] = {}
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return 0
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The name is in parentheses and may contain spaces
+        name = stat[stat.find("(") + 1:stat.rfind(")")].lower()
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[pid] = int(fields[1])
+        if any(marker in name for marker in BROWSER_PROCESS_NAMES):
+            rss[pid] = int(fields[21]) * page_size
+    total = 0
+    me = os.getpid()
+    for pid, size in rss.items():
+        parent = parents.get(pid)
+        while parent and parent != me:
+            parent = parents.get(parent)
+        if parent == me:
+            total += size
+    return total
+
+
+class BrowserPool:
+    """Bounded set of warm browsers that lease isolated contexts to browser tasks."""
+
+    def __init__(
+        self,
+        max_browsers: int = 2,
+        max_uses: int = 20,
+        max_memory_mb: int = 2048,
+        idle_ttl: float = 600,
+        max_overflow: int = 2,
+        memory_check_interval: float = 30,
+        browser_factory: Callable[[Any], Awaitable[Any]] = _launch_browser,
+        context_factory: Callable[[Any, Any], Awaitable[Any]] = _new_context,
+        memory_probe: Callable[[], int] = browser_memory_bytes,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_browsers: Browsers kept running
+            max_uses: Leases served by one browser before it is replaced (0 = unlimited)
+            max_memory_mb: Memory of all browsers above which idle ones are recycled (0 = no limit)
+            idle_ttl: Seconds an unused browser is kept (0 = until shutdown)
+            max_overflow: Extra browsers launched while all are busy with other settings;
+                they close when returned, and further leases wait
+            memory_check_interval: Minimum seconds between memory measurements
+            browser_factory: Launches a browser for a browser_use BrowserConfig
+            context_factory: Opens a context on a browser for a BrowserConfig
+            memory_probe: Returns the bytes used by the browser processes
+            clock: Time source for idle tracking
+        """
+        self.max_browsers = max(1, max_browsers)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.idle_ttl = idle_ttl
+        self.max_overflow = max(0, max_overflow)
+        self.memory_check_interval = memory_check_interval
+        self._browser_factory = browser_factory
+        self._context_factory = context_factory
+        self._memory_probe = memory_probe
+        self._clock = clock
+        self._browsers: List[_PooledBrowser] = []
+        self._condition: Optional[asyncio.Condition] = None
+        self._last_memory_check: Optional[float] = None
+        self.loop = BackgroundLoop("browser-loop")
+        self.stats = {
+            "launches": 0,
+            "launch_failures": 0,
+            "leases": 0,
+            "reuses": 0,
+            "waits": 0,
+            "retired_max_uses": 0,
+            "retired_idle": 0,
+            "retired_memory": 0,
+            "retired_errors": 0,
+            "retired_overflow": 0,
+            "overflow_launches": 0,
+        }
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created on first use so it binds to the loop the pool runs on
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def lease(self, config: Any) -> AsyncIterator[BrowserLease]:
+        """
+        Lease a fresh context on a warm browser matching the configuration.
+
+        Args:
+            config: browser_use BrowserConfig (headless, proxy, chrome_instance_path, viewport)
+
+        Yields:
+            The browser and its context; the context is closed when the block exits
+        """
+        profile = BrowserProfile.from_config(config)
+        entry = await self._acquire(profile, config)
+        context = None
+        healthy = False
+        try:
+            context = await self._context_factory(entry.browser, config)
+            healthy = True
+            yield BrowserLease(entry.browser, context, profile)
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    healthy = False
+                    logger.warning(f"关闭浏览器上下文失败: {e}")
+            await self._release(entry, healthy)
+
+    async def _acquire(self, profile: BrowserProfile, config: Any) -> _PooledBrowser:
+        condition = self._get_condition()
+        to_close: List[_PooledBrowser] = []
+        launch = False
+        async with condition:
+            while True:
+                to_close.extend(self._detach_expired())
+                candidates = [
+                    b for b in self._browsers
+                    if b.profile == profile and not b.retiring
+                    and (not self.max_uses or b.uses < self.max_uses)
+                ]
+                if candidates:
+                    entry = min(candidates, key=lambda b: b.active)
+                    self.stats["reuses"] += 1
+                    break
+                # Make room by closing idle browsers launched for other settings
+                idle = sorted(
+                    (b for b in self._browsers if b.active == 0 and b.browser is not None),
+                    key=lambda b: b.last_used,
+                )
+                while len(self._browsers) >= self.max_browsers and idle:
+                    to_close.append(self._detach(idle.pop(0), "retired_idle"))
+                if len(self._browsers) < self.max_browsers + self.max_overflow:
+                    if len(self._browsers) >= self.max_browsers:
+                        self.stats["overflow_launches"] += 1
+                        logger.info(f"浏览器池已满 ({self.max_browsers})，临时启动额外的浏览器")
+                    # Reserve the slot now; the launch itself happens outside the lock
+                    entry = _PooledBrowser(browser=None, profile=profile, ready=asyncio.Event())
+                    self._browsers.append(entry)
+                    launch = True
+                    break
+                # Every browser (overflow included) is busy with other settings
+                self.stats["waits"] += 1
+                await condition.wait()
+            entry.uses += 1
+            entry.active += 1
+            entry.last_used = self._clock()
+            self.stats["leases"] += 1
+        await self._close(to_close)
+
+        try:
+            if launch:
+                await self._launch(entry, config)
+            elif entry.browser is None:
+                # Another lease is launching this browser
+                await entry.ready.wait()
+                if entry.browser is None:
+                    raise RuntimeError("浏览器启动失败")
+        except BaseException:
+            async with condition:
+                entry.active -= 1
+                condition.notify_all()
+            raise
+        return entry
+
+    async def _launch(self, entry: _PooledBrowser, config: Any) -> None:
+        try:
+            entry.browser = await self._browser_factory(config)
+        except BaseException:
+            async with self._get_condition():
+                if entry in self._browsers:
+                    self._browsers.remove(entry)
+                self.stats["launch_failures"] += 1
+            raise
+        finally:
+            entry.ready.set()
+        self.stats["launches"] += 1
+        logger.info(f"浏览器池启动新浏览器 (headless={entry.profile.headless})，当前 {len(self._browsers)} 个")
+
+    async def _release(self, entry: _PooledBrowser, healthy: bool) -> None:
+        condition = self._get_condition()
+        to_close: List[_PooledBrowser] = []
+        async with condition:
+            entry.active -= 1
+            entry.last_used = self._clock()
+            if not healthy:
+                entry.retiring = True
+                reason = "retired_errors"
+            elif self.max_uses and entry.uses >= self.max_uses:
+                entry.retiring = True
+                reason = "retired_max_uses"
+            else:
+                reason = "retired_overflow"
+            if entry.active == 0 and entry in self._browsers:
+                over_capacity = len(self._browsers) > self.max_browsers
+                if entry.retiring or over_capacity:
+                    to_close.append(self._detach(entry, reason))
+            condition.notify_all()
+        await self._close(to_close)
+        await self._check_memory()
+        if self.idle_ttl > 0:
+            asyncio.get_running_loop().call_later(
+                self.idle_ttl, lambda: asyncio.ensure_future(self.prune())
+            )
+
+    def _detach(self, entry: _PooledBrowser, reason: str) -> _PooledBrowser:
+        """Take a browser out of the pool (caller holds the lock); close it with `_close`."""
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+        self.stats[reason] += 1
+        logger.info(f"浏览器池关闭浏览器 ({reason})，已服务 {entry.uses} 次")
+        return entry
+
+    async def _close(self, entries: List[_PooledBrowser]) -> None:
+        for entry in entries:
+            try:
+                await entry.browser.close()
+            except Exception as e:
+                logger.warning(f"关闭浏览器失败: {e}")
+
+    def _detach_expired(self) -> List[_PooledBrowser]:
+        if self.idle_ttl <= 0:
+            return []
+        now = self._clock()
+        return [
+            self._detach(entry, "retired_idle")
+            for entry in list(self._browsers)
+            if entry.active == 0 and entry.browser is not None and now - entry.last_used >= self.idle_ttl
+        ]
+
+    async def _check_memory(self) -> None:
+        if self.max_memory_mb <= 0 or not self._browsers:
+            return
+        now = self._clock()
+        if self._last_memory_check is not None and now - self._last_memory_check < self.memory_check_interval:
+            return
+        self._last_memory_check = now
+        # Walking /proc takes a while with many processes; keep it off the browser loop
+        used = await asyncio.to_thread(self._memory_probe)
+        limit = self.max_memory_mb * 1024 * 1024
+        if used <= limit:
+            return
+        logger.warning(f"浏览器进程内存 {used // (1024 * 1024)}MB 超过上限 {self.max_memory_mb}MB，回收浏览器")
+        condition = self._get_condition()
+        # Browsers that served the most tasks have grown the most
+        for entry in sorted(self._browsers, key=lambda b: b.uses, reverse=True):
+            async with condition:
+                if entry not in self._browsers or entry.browser is None:
+                    continue
+                if entry.active:
+                    entry.retiring = True
+                    continue
+                self._detach(entry, "retired_memory")
+                condition.notify_all()
+            await self._close([entry])
+            if await asyncio.to_thread(self._memory_probe) <= limit:
+                return
+
+    async def prune(self) -> None:
+        """Close browsers that have been idle longer than the TTL."""
+        condition = self._get_condition()
+        async with condition:
+            expired = self._detach_expired()
+            if expired:
+                condition.notify_all()
+        await self._close(expired)
+
+    async def aclose(self) -> None:
+        """Close all browsers."""
+        condition = self._get_condition()
+        async with condition:
+            entries = [
+                self._detach(entry, "retired_idle")
+                for entry in list(self._browsers)
+                if entry.browser is not None
+            ]
+            condition.notify_all()
+        await self._close(entries)
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Close all browsers from synchronous code (application shutdown)."""
+        if not self._browsers:
+            return
+        try:
+            self.loop.run(self.aclose(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"关闭浏览器池失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "browsers": len(self._browsers),
+            "active_leases": sum(b.active for b in self._browsers),
+            "max_browsers": self.max_browsers,
+            "max_overflow": self.max_overflow,
+        }
+
+
+browser_pool = BrowserPool(
+    max_browsers=BROWSER_POOL_MAX_BROWSERS,
+    max_uses=BROWSER_POOL_MAX_USES,
+    max_memory_mb=BROWSER_POOL_MAX_MEMORY_MB,
+    idle_ttl=BROWSER_POOL_IDLE_TTL,
+    max_overflow=BROWSER_POOL_MAX_OVERFLOW,
+    memory_check_interval=BROWSER_POOL_MEMORY_CHECK_INTERVAL,
+)
@@ -0,0 +1,256 @@
+"""
+Per-user browser storage state (cookies and localStorage), encrypted at rest.
+
+Every browser task starts from a fresh context, so tasks against sites that
+need a login repeated the login flow (and the vision-LLM steps it takes) every
+time. When enabled, the state of a user's context is saved after a successful
+task and loaded into the next context leased for that user. The user is the
+owner of the workflow the task runs in (`state_owner()`).
+
+States are Fernet tokens under `<directory>/<user_id>.state`. The token's
+timestamp gives the expiry: a state older than the TTL is discarded on load.
+States larger than the size limit drop their biggest localStorage origins
+first and are not saved at all if the cookies alone are too large.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from src.config.env import (
+    BROWSER_STATE_DIR,
+    BROWSER_STATE_ENABLED,
+    BROWSER_STATE_KEY,
+    BROWSER_STATE_MAX_KB,
+    BROWSER_STATE_TTL,
+)
+from src.utils.workflow_context import get_workflow_context
+
+logger = logging.getLogger(__name__)
+
+# Restores saved localStorage entries of the page's origin before its scripts
+# run, without overwriting what the site has stored since
+_LOCAL_STORAGE_SCRIPT = """
+(() => {
+  const saved = %s;
+  const items = saved[window.location.origin];
+  if (!items) return;
+  for (const [name, value] of items) {
+    try {
+      if (window.localStorage.getItem(name) === null) window.localStorage.setItem(name, value);
+    } catch (e) {}
+  }
+})();
+"""
+
+
+def resolve_state_key(key: Optional[str], fallback_secret: Optional[str]) -> Optional[bytes]:
+    """
+    Pick the Fernet key of the store.
+
+    Args:
+        key: A Fernet key (BROWSER_STATE_KEY)
+        fallback_secret: Secret to derive a key from when no key is configured
+
+    Returns:
+        The key, or None when neither is configured
+    """
+    if key:
+        return key.encode()
+    if fallback_secret:
+        digest = hashlib.sha256(f"browser-state:{fallback_secret}".encode()).digest()
+        return base64.urlsafe_b64encode(digest)
+    return None
+
+
+class BrowserStateStore:
+    """Encrypted per-user storage states with expiry and a size limit."""
+
+    def __init__(
+        self,
+        directory: str,
+        key: bytes,
+        ttl: float = 7 * 86400,
+        max_bytes: int = 512 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            directory: Where the encrypted states are kept
+            key: Fernet key
+            ttl: Seconds a saved state stays usable
+            max_bytes: Upper bound of one user's state (serialized JSON)
+            clock: Time source (stamped into the tokens)
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._fernet = Fernet(key)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "misses": 0, "saves": 0, "expired": 0, "oversized": 0, "errors": 0}
+
+    def _path(self, user_id: Any) -> str:
+        name = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(user_id))
+        return os.path.join(self.directory, f"{name}.state")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def load(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the user's saved storage state, None if there is none or it expired."""
+        path = self._path(user_id)
+        try:
+            with open(path, "rb") as f:
+                token = f.read()
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except OSError as e:
+            self._count("errors")
+            logger.warning(f"读取浏览器登录状态失败: {e}")
+            return None
+        try:
+            data = self._fernet.decrypt_at_time(token, int(self.ttl), int(self._clock()))
+            state = json.loads(data)
+        except (InvalidToken, ValueError):
+            # Expired, or written with another key: either way it is of no use
+            self._count("expired")
+            self.delete(user_id)
+            return None
+        self._count("loads")
+        return state
+
+    def save(self, user_id: Any, state: Dict[str, Any]) -> bool:
+        """
+        Save a user's storage state, replacing the previous one.
+
+        Returns:
+            True when saved, False when it was too large or could not be written
+        """
+        state = self._fit(self._drop_expired_cookies(state))
+        if state is None:
+            self._count("oversized")
+            logger.info(f"用户 {user_id} 的浏览器登录状态超过 {self.max_bytes} 字节，不予保存")
+            return False
+        data = json.dumps(state, ensure_ascii=False).encode("utf-8")
+        token = self._fernet.encrypt_at_time(data, int(self._clock()))
+        path = self._path(user_id)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            # Only the server process may read the states
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._count("errors")
+            logger.warning(f"保存浏览器登录状态失败: {e}")
+            return False
+        self._count("saves")
+        return True
+
+    def delete(self, user_id: Any) -> None:
+        try:
+            os.remove(self._path(user_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除浏览器登录状态失败: {e}")
+
+    def _drop_expired_cookies(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        now = self._clock()
+        cookies = [
+            c for c in state.get("cookies", [])
+            if not (isinstance(c.get("expires"), (int, float)) and 0 < c["expires"] < now)
+        ]
+        return {"cookies": cookies, "origins": list(state.get("origins", []))}
+
+    def _fit(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Drop the largest localStorage origins until the state fits; None if it never does."""
+        origins = sorted(state["origins"], key=lambda o: len(json.dumps(o, ensure_ascii=False)))
+        while True:
+            candidate = {"cookies": state["cookies"], "origins": origins}
+            if len(json.dumps(candidate, ensure_ascii=False).encode("utf-8")) <= self.max_bytes:
+                return candidate
+            if not origins:
+                return None
+            origins = origins[:-1]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+def state_owner() -> Optional[int]:
+    """
+    The user whose storage state the running browser task may load and save.
+
+    Taken from the workflow being executed: tool instances are shared by
+    concurrent workflows, so they must not carry the owner of a session.
+    """
+    context = get_workflow_context()
+    return context.user_id if context is not None else None
+
+
+def _playwright_context(context: Any) -> Any:
+    """The Playwright context behind a browser_use context (or the object itself)."""
+    session = getattr(context, "session", None)
+    return getattr(session, "context", None) or context
+
+
+async def apply_storage_state(context: Any, state: Dict[str, Any]) -> None:
+    """Load saved cookies and localStorage into a freshly leased context."""
+    get_session = getattr(context, "get_session", None)
+    if get_session is not None:
+        # browser_use creates the Playwright context on first use
+        await get_session()
+    target = _playwright_context(context)
+    if state.get("cookies"):
+        await target.add_cookies(state["cookies"])
+    local_storage = {
+        origin["origin"]: [[item["name"], item["value"]] for item in origin.get("localStorage", [])]
+        for origin in state.get("origins", [])
+        if origin.get("origin") and origin.get("localStorage")
+    }
+    if local_storage:
+        await target.add_init_script(_LOCAL_STORAGE_SCRIPT % json.dumps(local_storage))
+
+
+async def capture_storage_state(context: Any) -> Optional[Dict[str, Any]]:
+    """Read cookies and localStorage of a context, None if it never opened a page."""
+    if getattr(context, "session", True) is None:
+        return None
+    return await _playwright_context(context).storage_state()
+
+
+def _create_store() -> Optional[BrowserStateStore]:
+    if not BROWSER_STATE_ENABLED:
+        return None
+    key = resolve_state_key(BROWSER_STATE_KEY, os.getenv("JWT_SECRET_KEY"))
+    if key is None:
+        logger.warning("未配置 BROWSER_STATE_KEY 或 JWT_SECRET_KEY，浏览器登录状态缓存已停用")
+        return None
+    try:
+        return BrowserStateStore(
+            BROWSER_STATE_DIR,
+            key,
+            ttl=BROWSER_STATE_TTL,
+            max_bytes=BROWSER_STATE_MAX_KB * 1024,
+        )
+    except ValueError as e:
+        logger.warning(f"BROWSER_STATE_KEY 无效，浏览器登录状态缓存已停用: {e}")
+        return None
+
+
+# None when the cache is disabled
+browser_state_store = _create_store()
@@ -1,11 +1,28 @@
 import logging
+import time
 from typing import Annotated, Optional
 
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import tool
 from .decorators import log_io
 
-from src.crawler import Crawler
+from src.config.env import (
+    CRAWL_MANY_MAX_URLS,
+    CRAWL_MANY_TIME_BUDGET,
+    CRAWL_CHUNK_TOKENS,
+    CRAWL_TOKEN_BUDGET,
+)
+from src.crawler import Article, Crawler
+from src.crawler.batch import iter_crawl_many
+from src.utils.cancellation import (
+    current_cancel_event,
+    current_tool_scope,
+    remaining_tool_time,
+    run_cancellable,
+)
+from src.utils.dedup import find_duplicate_article
+from src.utils.tool_progress import publish_tool_progress
+from src.utils.workflow_context import get_workflow_context
 
 logger = logging.getLogger(__name__)
 
@@ -61,24 +78,137 @@ def create_crawler_config(user_id: Optional[int] = None):
     return config
 
 
+def render_article(article: Article, query: Optional[str] = None, page: int = 1) -> list[dict]:
+    """
+    Render one token-budgeted page of an article as message content.
+
+    Long articles are chunked and ranked against `query`; only the best chunks
+    that fit CRAWL_TOKEN_BUDGET are returned, with a note on how to get more.
+    Near-duplicates of a page already read in this workflow are not repeated.
+    """
+    original = find_duplicate_article(article.body_markdown, article.url)
+    if original is not None:
+        logger.info(f"跳过重复页面 {article.url}，与 {original} 内容近似")
+        return [{
+            "type": "text",
+            "text": f"# {article.title}\n\nThis page is a near-duplicate of {original}, "
+                    "which was already retrieved in this session; its content is omitted.",
+        }]
+    chunk_page = article.chunk_page(query, page, CRAWL_TOKEN_BUDGET, CRAWL_CHUNK_TOKENS)
+    if chunk_page.page == 1 and chunk_page.pages <= 1:
+        # 全文在预算内，原样返回
+        return article.to_message()
+    if not chunk_page.chunks:
+        return [{
+            "type": "text",
+            "text": f"# {article.title}\n\nNo more content: the article has {chunk_page.pages} page(s).",
+        }]
+
+    markdown = f"# {article.title}\n\n{chunk_page.to_markdown()}"
+    if chunk_page.has_more:
+        markdown += (
+            f"\n\n[Page {chunk_page.page} of {chunk_page.pages}: {len(chunk_page.chunks)} of "
+            f"{chunk_page.total_chunks} sections, most relevant first. To read more, call "
+            f"crawl_tool with the same url and query and page={chunk_page.page + 1}.]"
+        )
+    return article.to_message(markdown)
+
+
+def _remember(article: Article) -> None:
+    """Keep crawled articles for the rest of the workflow so paging is free."""
+    context = get_workflow_context()
+    if context is not None:
+        context.memo_for("crawl")[article.url] = article
+
+
 @tool
 @log_io
 def crawl_tool(
     url: Annotated[str, "The url to crawl."],
+    query: Annotated[Optional[str], "What you are looking for; the most relevant parts of long pages are returned first."] = None,
+    page: Annotated[int, "Page of a long article to return, starting at 1."] = 1,
     user_id: Annotated[Optional[int], "User ID for personalized configuration"] = None,
 ) -> HumanMessage:
     """Use this to crawl a url and get a readable content in markdown format."""
     try:
-        config = create_crawler_config(user_id)
-        crawler = Crawler(config)
-        article = crawler.crawl(url)
+        context = get_workflow_context()
+        article = context.memo_for("crawl").get(url) if context is not None else None
+        if article is None:
+            config = create_crawler_config(user_id)
+            crawler = Crawler(config)
+            # 在共享事件循环上执行，工作流中止或超时时立即取消
+            scope = current_tool_scope()
+            article = run_cancellable(crawler.acrawl(url, scope.deadline if scope else None))
         
         if article is None:
             error_msg = "Failed to crawl. Unable to extract content from the URL."
             logger.error(error_msg)
             return error_msg
-            
-        return {"role": "user", "content": article.to_message()}
+
+        _remember(article)
+        return {"role": "user", "content": render_article(article, query, page)}
+    except BaseException as e:
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+@tool
+@log_io
+def crawl_many(
+    urls: Annotated[list[str], "The urls to crawl (at most 10)."],
+    query: Annotated[Optional[str], "What you are looking for; the most relevant parts of long pages are returned first."] = None,
+    user_id: Annotated[Optional[int], "User ID for personalized configuration"] = None,
+) -> HumanMessage:
+    """Use this to crawl several urls concurrently and get their readable content in markdown format."""
+    try:
+        urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+        urls = urls[:CRAWL_MANY_MAX_URLS]
+        if not urls:
+            return "Failed to crawl. Error: no urls provided"
+
+        budget = CRAWL_MANY_TIME_BUDGET
+        remaining = remaining_tool_time()
+        if remaining is not None:
+            budget = min(budget, remaining)
+        deadline = time.monotonic() + budget
+
+        context = get_workflow_context()
+        if context is not None:
+            context.incr("crawl_many_pages", len(urls))
+
+        config = create_crawler_config(user_id)
+        crawler = Crawler(config)
+        content = []
+        succeeded = 0
+        # 按完成顺序逐页收集，慢页面不会阻塞已完成的结果
+        results = iter_crawl_many(crawler, urls, deadline, cancel_event=current_cancel_event())
+        for done, result in enumerate(results, start=1):
+            status = "failed" if result.article is None else f"{result.elapsed:.1f}s"
+            publish_tool_progress(
+                "crawl_many",
+                f"[{done}/{len(urls)}] {result.url} ({status})\n",
+                done=done,
+                total=len(urls),
+            )
+            if result.article is None:
+                logger.warning(f"crawl_many 爬取失败 ({result.error}): {result.url}")
+                content.append({
+                    "type": "text",
+                    "text": f"## Source: {result.url}\n\nFailed to crawl ({result.error}).",
+                })
+                continue
+            succeeded += 1
+            logger.info(f"crawl_many 完成 {result.url}，耗时 {result.elapsed:.2f}s")
+            _remember(result.article)
+            content.append({"type": "text", "text": f"## Source: {result.url}"})
+            content.extend(render_article(result.article, query))
+
+        if succeeded == 0:
+            error_msg = "Failed to crawl. Unable to extract content from any of the URLs."
+            logger.error(error_msg)
+            return error_msg
+        return {"role": "user", "content": content}
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
@@ -1,22 +1,109 @@
 import logging
 import functools
-from typing import Any, Callable, Type, TypeVar
+import inspect
+import json
+from typing import Any, Callable, ClassVar, Optional, Tuple, Type, TypeVar
+
+from src.config.env import TOOL_MEMO_ENABLED
+from src.utils.cancellation import ToolCancelledError, tool_scope
+from src.utils.result_governor import result_governor
+from src.utils.tool_progress import publish_tool_cache_hit
+from src.utils.workflow_context import get_workflow_context
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
-
-def log_io(func: Callable) -> Callable:
+# Tools report failures as strings; those are not memoized so a retry reaches the tool again
+_ERROR_PREFIXES = ("Failed", "Error")
+_MISSING = object()
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def memo_key(tool_name: str, arguments: Any) -> str:
+    """Key of a tool call: the tool name and its canonicalized arguments."""
+    return tool_name + ":" + json.dumps(
+        _canonical(arguments), sort_keys=True, ensure_ascii=False, default=repr
+    )
+
+
+def _memo_lookup(tool_name: str, arguments: Any) -> Tuple[Optional[str], Any]:
+    """Return (key, cached result or _MISSING); the key is None outside a workflow."""
+    context = get_workflow_context()
+    if not TOOL_MEMO_ENABLED or context is None:
+        return None, _MISSING
+    key = memo_key(tool_name, arguments)
+    cached = context.memo_for("tool_calls").get(key, _MISSING)
+    if cached is not _MISSING:
+        context.incr("tool_cache_hits")
+        logger.info(f"Tool {tool_name} 命中工作流内缓存，跳过重复调用")
+        publish_tool_cache_hit(tool_name)
+    return key, cached
+
+
+def _memo_store(key: Optional[str], result: Any) -> None:
+    context = get_workflow_context()
+    if key is None or context is None:
+        return
+    if isinstance(result, str) and result.startswith(_ERROR_PREFIXES):
+        return
+    context.memo_for("tool_calls")[key] = result
+
+
+def _govern(tool_name: str, result: Any) -> Any:
+    """Fit the result into the tool's size budget before it enters the conversation."""
+    context = get_workflow_context()
+    return result_governor.govern(
+        tool_name, result, context.workflow_id if context is not None else None
+    )
+
+
+def _call_in_scope(tool_name: str, call: Callable[[], Any]) -> Any:
+    """Run the tool under its deadline and the workflow's cancellation token."""
+    with tool_scope(tool_name) as scope:
+        if scope.cancelled:
+            return f"Failed to run {tool_name}. Error: the workflow was aborted"
+        try:
+            return call()
+        except ToolCancelledError as e:
+            logger.info(f"Tool {tool_name} cancelled: {e}")
+            return f"Failed to run {tool_name}. Error: {e}"
+        except TimeoutError as e:
+            logger.warning(f"Tool {tool_name} timed out: {e}")
+            return f"Failed to run {tool_name}. Error: {e}"
+
+
+def log_io(func: Optional[Callable] = None, *, memoize: bool = True) -> Callable:
     """
     A decorator that logs the input parameters and output of a tool function.
 
+    The call runs in a tool scope with its own deadline that is cancelled
+    with the workflow (see cancellation). Results over the tool's size budget
+    are shortened (see result_governor).
+    Within a workflow, repeated calls with the same arguments (e.g. the same
+    search query after a replan) return the earlier result. Tools with side
+    effects opt out with `@log_io(memoize=False)`.
+
     Args:
         func: The tool function to be decorated
+        memoize: Reuse results of identical calls within a workflow
 
     Returns:
         The wrapped function with input/output logging
     """
+    if func is None:
+        return functools.partial(log_io, memoize=memoize)
+
+    signature = inspect.signature(func)
 
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -27,12 +114,22 @@ def log_io(func: Callable) -> Callable:
         )
         logger.info(f"Tool {func_name} called with parameters: {params}")
 
+        key = None
+        if memoize:
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            key, cached = _memo_lookup(func_name, bound.arguments)
+            if cached is not _MISSING:
+                return cached
+
         # Execute the function
-        result = func(*args, **kwargs)
+        result = _call_in_scope(func_name, lambda: func(*args, **kwargs))
 
         # Log the output
         logger.info(f"Tool {func_name} returned: {result}")
 
+        result = _govern(func_name, result)
+        _memo_store(key, result)
         return result
 
     return wrapper
@@ -41,6 +138,9 @@ def log_io(func: Callable) -> Callable:
 class LoggedToolMixin:
     """A mixin class that adds logging functionality to any tool."""
 
+    # Reuse results of identical calls within a workflow (see log_io)
+    memoize_calls: ClassVar[bool] = True
+
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
         tool_name = self.__class__.__name__.replace("Logged", "")
@@ -52,26 +152,35 @@ class LoggedToolMixin:
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """Override _run method to add logging."""
         self._log_operation("_run", *args, **kwargs)
-        result = super()._run(*args, **kwargs)
+        key = None
+        if self.memoize_calls:
+            key, cached = _memo_lookup(self.name, {"args": args, "kwargs": kwargs})
+            if cached is not _MISSING:
+                return cached
+        result = _call_in_scope(self.name, lambda: super(LoggedToolMixin, self)._run(*args, **kwargs))
         logger.info(
             f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
         )
+        result = _govern(self.name, result)
+        _memo_store(key, result)
         return result
 
 
-def create_logged_tool(base_tool_class: Type[T]) -> Type[T]:
+def create_logged_tool(base_tool_class: Type[T], memoize: bool = True) -> Type[T]:
     """
     Factory function to create a logged version of any tool class.
 
     Args:
         base_tool_class: The original tool class to be enhanced with logging
+        memoize: Reuse results of identical calls within a workflow; pass False
+            for tools with side effects
 
     Returns:
         A new class that inherits from both LoggedToolMixin and the base tool class
     """
 
     class LoggedTool(LoggedToolMixin, base_tool_class):
-        pass
+        memoize_calls: ClassVar[bool] = memoize
 
     # Set a more descriptive name for the class
     LoggedTool.__name__ = f"Logged{base_tool_class.__name__}"
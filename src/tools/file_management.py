@@ -5,5 +5,5 @@ from .decorators import create_logged_tool
 logger = logging.getLogger(__name__)
 
 # Initialize file management tool with logging
-LoggedWriteFile = create_logged_tool(WriteFileTool)
+LoggedWriteFile = create_logged_tool(WriteFileTool, memoize=False)
 write_file_tool = LoggedWriteFile()
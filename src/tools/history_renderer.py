@@ -0,0 +1,233 @@
+"""
+Background rendering of browser task recordings.
+
+browser_use encoded the history GIF inline, so every browser task result
+waited for it. Agents now run without it; when a recording is wanted the
+tool hands the step screenshots to this renderer and returns right away with
+the path the file will appear at. Encoding runs in worker processes (it is
+CPU-bound), frames are capped in count and width, and the file is written
+under a temporary name and renamed, so readers never see a partial file.
+
+Formats: "gif", or "webp" (animated WebP: several times smaller and faster
+to encode). "off" disables recording.
+"""
+
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.config.env import (
+    BROWSER_HISTORY_FORMAT,
+    BROWSER_HISTORY_FRAME_MS,
+    BROWSER_HISTORY_MAX_FRAMES,
+    BROWSER_HISTORY_MAX_WIDTH,
+    BROWSER_HISTORY_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FORMATS = ("gif", "webp")
+HISTORY_OFF = "off"
+_OFF_VALUES = {"off", "none", "false", "0", ""}
+# Height of the caption bar drawn under each frame
+CAPTION_HEIGHT = 36
+
+
+def normalize_history_format(value: Any) -> Optional[str]:
+    """Map a configured value to "gif", "webp" or "off"; None when it is not recognised."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "gif" if value else HISTORY_OFF
+    text = str(value).strip().lower()
+    if text in _OFF_VALUES:
+        return HISTORY_OFF
+    return text if text in HISTORY_FORMATS else None
+
+
+def resolve_history_format(*candidates: Any) -> str:
+    """The first recognised format among the candidates (request, user setting, ...), else the default."""
+    for candidate in candidates:
+        history_format = normalize_history_format(candidate)
+        if history_format is not None:
+            return history_format
+    return normalize_history_format(BROWSER_HISTORY_FORMAT) or "gif"
+
+
+def new_history_path(directory: str, history_format: str) -> Optional[str]:
+    """Path for a new recording, None when recording is off."""
+    if history_format not in HISTORY_FORMATS:
+        return None
+    return f"{directory}/{uuid.uuid4()}.{history_format}"
+
+
+def select_frames(frames: Sequence[Any], max_frames: int) -> List[Any]:
+    """Keep at most `max_frames` evenly spaced frames, always including the last one."""
+    frames = list(frames)
+    if max_frames <= 0 or len(frames) <= max_frames:
+        return frames
+    if max_frames == 1:
+        return frames[-1:]
+    step = (len(frames) - 1) / (max_frames - 1)
+    return [frames[round(i * step)] for i in range(max_frames)]
+
+
+def render_history(
+    screenshots: List[str],
+    captions: List[str],
+    output_path: str,
+    history_format: str,
+    frame_ms: int,
+    max_width: int,
+) -> str:
+    """Encode base64 screenshots into an animated GIF/WebP; executes in a worker process."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=18)
+    except TypeError:
+        font = ImageFont.load_default()
+    frames = []
+    for screenshot, caption in zip(screenshots, captions):
+        image = Image.open(io.BytesIO(base64.b64decode(screenshot))).convert("RGB")
+        if max_width and image.width > max_width:
+            image = image.resize((max_width, max(1, round(image.height * max_width / image.width))))
+        if caption:
+            framed = Image.new("RGB", (image.width, image.height + CAPTION_HEIGHT), "black")
+            framed.paste(image, (0, 0))
+            ImageDraw.Draw(framed).text((10, image.height + 8), caption[:160], fill="white", font=font)
+            image = framed
+        frames.append(image)
+    if not frames:
+        raise ValueError("no screenshots to render")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    options = {"save_all": True, "append_images": frames[1:], "duration": frame_ms, "loop": 0}
+    if history_format == "webp":
+        frames[0].save(tmp_path, format="WEBP", quality=60, method=4, **options)
+    else:
+        frames[0].save(tmp_path, format="GIF", **options)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def history_frames(history: Any) -> List[Dict[str, str]]:
+    """Screenshot and goal of each step of a browser_use AgentHistoryList."""
+    frames = []
+    for item in getattr(history, "history", None) or []:
+        screenshot = getattr(getattr(item, "state", None), "screenshot", None)
+        if not isinstance(screenshot, str) or not screenshot:
+            continue
+        brain = getattr(getattr(item, "model_output", None), "current_state", None)
+        frames.append({"screenshot": screenshot, "caption": getattr(brain, "next_goal", None) or ""})
+    return frames
+
+
+class HistoryRenderer:
+    """Renders recordings off the request path, in a small process pool."""
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        frame_ms: int = 1000,
+        max_frames: int = 60,
+        max_width: int = 1280,
+        mp_context: str = "spawn",
+    ):
+        """
+        Args:
+            max_workers: Worker processes (0 renders on a background thread instead)
+            frame_ms: Display time of each frame
+            max_frames: Longer recordings keep evenly spaced frames (0 = all)
+            max_width: Wider screenshots are scaled down (0 = keep)
+            mp_context: multiprocessing start method for the workers
+        """
+        self.max_workers = max_workers
+        self.frame_ms = frame_ms
+        self.max_frames = max_frames
+        self.max_width = max_width
+        self.mp_context = mp_context
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "rendered": 0, "failed": 0, "skipped": 0}
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.max_workers <= 0:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-render")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.mp_context),
+                    )
+            return self._executor
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def submit(self, frames: List[Dict[str, str]], output_path: str, history_format: str) -> Optional[Future]:
+        """
+        Queue a recording without waiting for it.
+
+        Args:
+            frames: {"screenshot": base64 PNG, "caption": text} per step
+            output_path: Where the file appears once rendered
+            history_format: "gif" or "webp"
+
+        Returns:
+            The pending render, or None when there is nothing to render
+        """
+        frames = select_frames(frames, self.max_frames)
+        if not frames or history_format not in HISTORY_FORMATS:
+            self._count("skipped")
+            return None
+        self._count("submitted")
+        future = self._get_executor().submit(
+            render_history,
+            [frame["screenshot"] for frame in frames],
+            [frame.get("caption") or "" for frame in frames],
+            output_path,
+            history_format,
+            self.frame_ms,
+            self.max_width,
+        )
+        future.add_done_callback(lambda f: self._on_done(f, output_path))
+        return future
+
+    def _on_done(self, future: Future, output_path: str) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._count("rendered")
+            logger.info(f"浏览器操作录像已生成: {output_path}")
+        else:
+            self._count("failed")
+            logger.warning(f"浏览器操作录像生成失败 ({output_path}): {error}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"max_workers": self.max_workers, "running": self._executor is not None, **self.stats}
+
+
+history_renderer = HistoryRenderer(
+    max_workers=BROWSER_HISTORY_WORKERS,
+    frame_ms=BROWSER_HISTORY_FRAME_MS,
+    max_frames=BROWSER_HISTORY_MAX_FRAMES,
+    max_width=BROWSER_HISTORY_MAX_WIDTH,
+)
@@ -4,13 +4,28 @@ from langchain_core.tools import tool
 from langchain_experimental.utilities import PythonREPL
 from .decorators import log_io
 
+from src.config.env import PYTHON_SANDBOX_ENABLED
+from src.utils.cancellation import current_cancel_event, remaining_tool_time
+from src.utils.python_sandbox import python_sandbox, session_key
+from src.utils.tool_progress import publish_tool_progress
+from src.utils.workflow_context import get_workflow_context
+
 # Initialize REPL and logger
+# 未启用沙箱时退回进程内共享的 REPL
 repl = PythonREPL()
 logger = logging.getLogger(__name__)
 
 
+def _session_id() -> str:
+    """Sandbox session of the current user's conversation thread."""
+    context = get_workflow_context()
+    if context is None:
+        return "default"
+    return session_key(context.user_id, context.thread_id, context.workflow_id)
+
+
 @tool
-@log_io
+@log_io(memoize=False)
 def python_repl_tool(
     code: Annotated[
         str, "The python code to execute to do further analysis or calculation."
@@ -25,11 +40,30 @@ def python_repl_tool(
 
     logger.info("Executing Python code")
     try:
-        result = repl.run(code)
-        # Check if the result is an error message by looking for typical error patterns
-        if isinstance(result, str) and ("Error" in result or "Exception" in result):
-            logger.error(result)
-            return f"Error executing code:\n```python\n{code}\n```\nError: {result}"
+        if PYTHON_SANDBOX_ENABLED:
+            # 每个会话线程使用独立的沙箱进程，变量在同一线程的多次调用间保留
+            remaining = remaining_tool_time()
+            execution = python_sandbox.run(
+                _session_id(),
+                code,
+                timeout=None if remaining is None else min(python_sandbox.timeout, remaining),
+                on_output=lambda text: publish_tool_progress("python_repl_tool", text),
+                cancel_event=current_cancel_event(),
+            )
+            context = get_workflow_context()
+            if context is not None:
+                context.incr("python_runs")
+            if not execution.ok:
+                logger.error(execution.error)
+                error = f"{execution.output}\n{execution.error}" if execution.output else execution.error
+                return f"Error executing code:\n```python\n{code}\n```\nError: {error}"
+            result = execution.output
+        else:
+            result = repl.run(code)
+            # Check if the result is an error message by looking for typical error patterns
+            if isinstance(result, str) and ("Error" in result or "Exception" in result):
+                logger.error(result)
+                return f"Error executing code:\n```python\n{code}\n```\nError: {result}"
         logger.info("Code execution successful")
     except BaseException as e:
         error_msg = repr(e)
@@ -1,33 +1,21 @@
 import logging
 import os
-from typing import Annotated, Optional, Type, TypeVar
+from typing import Annotated, Optional
 
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
-from .decorators import log_io, create_logged_tool
+from .decorators import log_io
+from .search_cache import cached_search, lookup_search, store_search
+from .tavily_client import run_search, run_search_many
 from src.tools.browser import create_browser_config
 from src.config import TAVILY_MAX_RESULTS
+from src.utils.dedup import dedup_search_results
+from src.utils.ranking import merge_search_results
+from src.utils.workflow_context import get_workflow_context
 
 logger = logging.getLogger(__name__)
 
-T = TypeVar('T')
-
-class LoggedToolMixin:
-    """Mixin class to add logging capabilities to tools."""
-    
-    def invoke(self, *args, **kwargs):
-        """Override invoke method to add logging."""
-        logger.info(f"Invoking {self.__class__.__name__} with args: {args}, kwargs: {kwargs}")
-        try:
-            result = super().invoke(*args, **kwargs)
-            logger.info(f"{self.__class__.__name__} completed successfully")
-            return result
-        except Exception as e:
-            logger.error(f"{self.__class__.__name__} failed with error: {e}")
-            raise
-
-# Initialize Tavily search tool with logging
-LoggedTavilySearch = create_logged_tool(TavilySearchResults)
+# search_many 单次最多并发的查询数
+SEARCH_MANY_MAX_QUERIES = 5
 
 def create_search_config(user_id: Optional[int] = None):
     """创建搜索配置，支持用户设置覆盖环境变量"""
@@ -67,15 +55,67 @@ def search(
     """Use this to search the internet for information."""
     try:
         config = create_search_config(user_id)
-        
-        # 使用LoggedTavilySearch创建实例，使用用户配置的API密钥
-        tavily_tool = LoggedTavilySearch(
-            name="tavily_search",
-            max_results=config['max_results'],
-            tavily_api_key=config['tavily_api_key']
-        )
-        results = tavily_tool.invoke({"query": query})
-        return results
+
+        def fetch():
+            # 复用共享连接池的异步客户端，使用用户配置的API密钥
+            return run_search(query, config['tavily_api_key'], config['max_results'])
+
+        # 相同查询在同一工作流内直接复用，跨工作流走 TTL 缓存
+        results = cached_search(query, config['max_results'], fetch)
+        # 折叠本工作流内已见过的镜像/转载内容
+        return dedup_search_results(results)
+    except BaseException as e:
+        error_msg = f"Failed to search. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+@tool
+@log_io
+def search_many(
+    queries: Annotated[list[str], "Several different phrasings of the search query (at most 5)."],
+    user_id: Annotated[Optional[int], "User ID for personalized configuration"] = None,
+) -> str:
+    """Search the internet with several queries concurrently. Results are merged, deduplicated by URL and ranked by relevance."""
+    try:
+        config = create_search_config(user_id)
+        max_results = config['max_results']
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        queries = queries[:SEARCH_MANY_MAX_QUERIES]
+        if not queries:
+            return "Failed to search. Error: no queries provided"
+
+        results_by_query = {}
+        misses = []
+        for query in queries:
+            key, cached = lookup_search(query, max_results)
+            if cached is not None:
+                results_by_query[query] = cached
+            else:
+                misses.append((query, key))
+
+        if misses:
+            context = get_workflow_context()
+            if context is not None:
+                context.incr("search_api_calls", len(misses))
+            fetched = run_search_many(
+                [query for query, _ in misses], config['tavily_api_key'], max_results
+            )
+            for (query, key), results in zip(misses, fetched):
+                if isinstance(results, BaseException):
+                    logger.warning(f"search_many 查询失败: {query}: {results!r}")
+                    continue
+                store_search(key, results)
+                results_by_query[query] = results
+
+        if not results_by_query:
+            return "Failed to search. Error: all queries failed"
+        searched = [query for query in queries if query in results_by_query]
+        return dedup_search_results(merge_search_results(
+            searched,
+            [results_by_query[query] for query in searched],
+            limit=max_results * 2,
+        ))
     except BaseException as e:
         error_msg = f"Failed to search. Error: {repr(e)}"
         logger.error(error_msg)
@@ -0,0 +1,300 @@
+"""
+Search result cache for the Tavily search tool.
+
+Two layers sit in front of the search API:
+
+1. A per-workflow memo (exact dedup within one run), stored on the
+   `WorkflowContext`. The planner's `search_before_planning` query and the
+   researcher's first query are frequently identical.
+2. A shared TTL tier: an in-memory LRU backed by an on-disk SQLite table, so
+   repeated queries across workflows and restarts skip the network call.
+
+Keys are derived from the normalized query plus `max_results`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config.env import (
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_MAX_SIZE,
+    SEARCH_CACHE_DB_PATH,
+)
+from src.utils.workflow_context import get_workflow_context
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share a key."""
+    return " ".join(str(query).split()).casefold()
+
+
+def make_cache_key(query: str, max_results: int) -> str:
+    raw = f"{max_results}\x00{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """In-memory LRU with TTL, optionally backed by a SQLite table."""
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_size: int = 512,
+        db_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            ttl: Seconds a result stays valid; 0 disables caching
+            max_size: Maximum number of in-memory entries
+            db_path: SQLite file for the shared tier, None for memory only
+            clock: Time source (wall clock, since entries survive restarts)
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.db_path = db_path
+        self._clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memo_hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+        if self.enabled and db_path:
+            self._init_db()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # ------------------------------------------------------------------
+    # SQLite tier
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self) -> None:
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    "key TEXT PRIMARY KEY, results TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+        except Exception as e:
+            logger.warning(f"搜索缓存磁盘层初始化失败，仅使用内存缓存: {e}")
+            self.db_path = None
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT results, expires_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            results, expires_at = row
+            if expires_at <= self._clock():
+                return None
+            return expires_at, json.loads(results)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"读取搜索缓存失败: {e}")
+            return None
+
+    def _disk_set(self, key: str, expires_at: float, results: Any) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, results, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(results, ensure_ascii=False), expires_at),
+                )
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"写入搜索缓存失败: {e}")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached results for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.db_path:
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._remember(key, *entry)
+                self._count("disk_hits")
+                return entry[1]
+
+        self._count("misses")
+        return None
+
+    def _remember(self, key: str, expires_at: float, results: Any) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, results)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def set(self, key: str, results: Any) -> None:
+        if not self.enabled:
+            return
+        expires_at = self._clock() + self.ttl
+        self._remember(key, expires_at, results)
+        if self.db_path:
+            self._disk_set(key, expires_at, results)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM search_cache")
+            except Exception as e:
+                logger.warning(f"清空搜索缓存失败: {e}")
+
+    def cleanup_expired(self) -> None:
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+            except Exception as e:
+                logger.warning(f"清理过期搜索缓存失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = (
+                self.stats["memo_hits"]
+                + self.stats["memory_hits"]
+                + self.stats["disk_hits"]
+            )
+            total_requests = hits + self.stats["misses"]
+            hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+            return {
+                "cache_size": len(self._memory),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "disk_enabled": bool(self.db_path),
+                **self.stats,
+                "hit_rate": f"{hit_rate:.2f}%",
+            }
+
+
+search_cache = SearchCache(
+    ttl=SEARCH_CACHE_TTL,
+    max_size=SEARCH_CACHE_MAX_SIZE,
+    db_path=SEARCH_CACHE_DB_PATH or None,
+)
+
+
+def lookup_search(
+    query: str, max_results: int, cache: Optional[SearchCache] = None
+) -> Tuple[str, Optional[Any]]:
+    """
+    Look a search up in the workflow memo and then the shared cache.
+
+    Args:
+        query: The search query
+        max_results: Result count requested from the provider
+        cache: Cache to use, defaults to the shared `search_cache`
+
+    Returns:
+        (cache key, cached results or None)
+    """
+    cache = cache or search_cache
+    key = make_cache_key(query, max_results)
+    context = get_workflow_context()
+    if context is not None:
+        context.incr("search_requests")
+        memo = context.memo_for("search")
+        if key in memo:
+            cache._count("memo_hits")
+            context.incr("search_memo_hits")
+            logger.info(f"搜索命中工作流内缓存: {query}")
+            return key, memo[key]
+
+    results = cache.get(key)
+    if results is not None:
+        if context is not None:
+            context.incr("search_cache_hits")
+            context.memo_for("search")[key] = results
+        logger.info(f"搜索命中共享缓存: {query}")
+    return key, results
+
+
+def store_search(key: str, results: Any, cache: Optional[SearchCache] = None) -> None:
+    """Remember a fresh search result; only list results (successful searches) are kept."""
+    if not isinstance(results, list):
+        return
+    (cache or search_cache).set(key, results)
+    context = get_workflow_context()
+    if context is not None:
+        context.memo_for("search")[key] = results
+
+
+def cached_search(
+    query: str,
+    max_results: int,
+    fetch: Callable[[], Any],
+    cache: Optional[SearchCache] = None,
+) -> Any:
+    """
+    Run a search through the workflow memo and the shared cache.
+
+    Args:
+        query: The search query
+        max_results: Result count requested from the provider
+        fetch: Performs the actual API call
+        cache: Cache to use, defaults to the shared `search_cache`
+
+    Returns:
+        The search results
+    """
+    key, results = lookup_search(query, max_results, cache)
+    if results is not None:
+        return results
+    context = get_workflow_context()
+    if context is not None:
+        context.incr("search_api_calls")
+    results = fetch()
+    store_search(key, results, cache)
+    return results
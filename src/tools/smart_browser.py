@@ -1,18 +1,19 @@
 import logging
 import json
 import os
-import asyncio
-import uuid
 import logging
 from typing import Optional, Dict, Any
 from urllib.parse import urlparse
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
+from browser_use import AgentHistoryList, BrowserConfig
 from browser_use import Agent as BrowserAgent
-from src.llms.llm import vl_llm
-from src.tools.browser import create_browser_config
+from src.tools.browser import create_browser_config, run_browser_agent, run_on_browser_loop
+from src.tools.browser_pool import browser_pool
+from src.tools.history_renderer import new_history_path, resolve_history_format
 from src.tools.proxy_manager import ProxyManager
+from src.utils.cancellation import ToolCancelledError, run_cancellable
+from src.utils.workflow_context import get_workflow_context
 from src.config import BROWSER_HISTORY_DIR
 
 logger = logging.getLogger(__name__)
@@ -35,13 +36,8 @@ class SmartBrowserTool(BaseTool):
     
     # 添加字段类型注解
     _agent: Optional['BrowserAgent'] = None
-    browser: Optional['Browser'] = None
-    _abort_event: Optional[asyncio.Event] = None
-    _current_task: Optional[asyncio.Task] = None
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._abort_event = asyncio.Event()
+    # 本次请求指定的录像格式（gif/webp/off）
+    history_format: Optional[str] = None
     
     def _extract_url_from_instruction(self, instruction: str) -> Optional[str]:
         """从指令中提取URL"""
@@ -102,22 +98,30 @@ class SmartBrowserTool(BaseTool):
         
         return result
     
-    def _run(self, instruction: str, target_url: str = None, user_id: int = None) -> str:
-        """运行智能浏览器任务"""
-        generated_gif_path = f"{BROWSER_HISTORY_DIR}/{uuid.uuid4()}.gif"
+    async def _browse(self, instruction: str, target_url: str = None, user_id: int = None) -> str:
+        """在浏览器池的事件循环上运行智能浏览器任务，代理失败时回退直连"""
+        generated_gif_path = None
+        # 浏览器配置按当前工作流的用户读取（工具实例由并发的工作流共享）
+        context = get_workflow_context()
+        user_id = user_id or (context.user_id if context is not None else None)
         
         # 如果没有提供target_url，尝试从指令中提取
         if not target_url:
             target_url = self._extract_url_from_instruction(instruction)
         
         proxy_info = {}
+        browser_config = None
+
+        def on_agent(agent):
+            self._agent = agent
         
         try:
-            # 重置中止事件
-            self._abort_event.clear()
-            
             # 创建智能浏览器配置
             browser_config = self._create_smart_browser_config(user_id=user_id, target_url=target_url)
+            history_format = resolve_history_format(
+                self.history_format, getattr(browser_config, 'history_format', None)
+            )
+            generated_gif_path = new_history_path(BROWSER_HISTORY_DIR, history_format)
             
             # 记录代理信息
             if hasattr(browser_config, 'proxy') and browser_config.proxy:
@@ -136,165 +140,29 @@ class SmartBrowserTool(BaseTool):
                 }
                 logger.info(f"直连访问 {target_url}")
             
-            # 创建浏览器实例
-            browser_instance = Browser(config=browser_config)
-            
-            # 创建浏览器代理
-            self._agent = BrowserAgent(
-                task=instruction,
-                llm=vl_llm,
-                browser=browser_instance,
-                generate_gif=generated_gif_path,
+            # 从浏览器池租用与代理配置匹配的预热浏览器
+            result = await run_browser_agent(
+                self.name, instruction, browser_config, generated_gif_path, on_agent=on_agent
             )
-            
-            # 运行任务
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            try:
-                # 创建可中止的任务
-                async def run_with_abort_check():
-                    # 创建浏览器任务
-                    browser_task = asyncio.create_task(self._agent.run())
-                    self._current_task = browser_task
-                    
-                    # 创建中止检查任务
-                    abort_task = asyncio.create_task(self._abort_event.wait())
-                    
-                    try:
-                        # 等待任务完成或中止信号
-                        done, pending = await asyncio.wait(
-                            [browser_task, abort_task],
-                            return_when=asyncio.FIRST_COMPLETED
-                        )
-                        
-                        # 取消未完成的任务
-                        for task in pending:
-                            task.cancel()
-                            try:
-                                await task
-                            except asyncio.CancelledError:
-                                pass
-                        
-                        # 检查是否被中止
-                        if abort_task in done:
-                            logger.info("智能浏览器任务被中止")
-                            # 确保浏览器任务被取消
-                            if not browser_task.done():
-                                browser_task.cancel()
-                                try:
-                                    await browser_task
-                                except asyncio.CancelledError:
-                                    pass
-                            raise asyncio.CancelledError("任务被用户中止")
-                        
-                        # 返回浏览器任务结果
-                        return browser_task.result()
-                    
-                    finally:
-                        self._current_task = None
-                
-                result = loop.run_until_complete(run_with_abort_check())
-                
-                if isinstance(result, AgentHistoryList):
-                    return json.dumps(
-                        self._generate_browser_result(
-                            result.final_result(), 
-                            generated_gif_path,
-                            proxy_info
-                        )
-                    )
-                else:
-                    return json.dumps(
-                        self._generate_browser_result(
-                            result, 
-                            generated_gif_path,
-                            proxy_info
-                        )
-                    )
-            
-            except asyncio.CancelledError:
-                logger.info("智能浏览器任务被中止")
-                return json.dumps({
-                    "result_content": "浏览器任务已被用户中止",
-                    "generated_gif_path": generated_gif_path,
-                    "error_type": "cancelled",
-                    "proxy_info": proxy_info
-                })
-            
-            finally:
-                # 清理浏览器实例
-                # if self._agent and self._agent.browser:
-                #     try:
-                #         cleanup_loop = asyncio.new_event_loop()
-                #         asyncio.set_event_loop(cleanup_loop)
-                #         cleanup_loop.run_until_complete(self._agent.browser.close())
-                #         cleanup_loop.close()
-                #     except Exception as cleanup_error:
-                #         logger.warning(f"浏览器清理时出现警告: {cleanup_error}")
-                loop.close()
+            return json.dumps(self._generate_browser_result(self._final_result(result), generated_gif_path, proxy_info))
         
         except Exception as e:
             logger.error(f"智能浏览器启动失败: {str(e)}")
             
             # 检查是否是代理连接问题
-            if "proxy" in str(e).lower() or "connection" in str(e).lower():
+            if browser_config is not None and ("proxy" in str(e).lower() or "connection" in str(e).lower()):
                 logger.warning("检测到代理连接问题，尝试直连")
                 try:
-                    # 尝试直连模式
+                    # 尝试直连模式（保留窗口大小）
                     direct_config = BrowserConfig(headless=browser_config.headless)
-                    browser_instance = Browser(config=direct_config)
-                    
-                    self._agent = BrowserAgent(
-                        task=instruction,
-                        llm=vl_llm,
-                        browser=browser_instance,
-                        generate_gif=generated_gif_path,
+                    direct_config.viewport = getattr(browser_config, 'viewport', None)
+                    result = await run_browser_agent(
+                        self.name, instruction, direct_config, generated_gif_path, on_agent=on_agent
+                    )
+                    proxy_info["fallback_to_direct"] = True
+                    return json.dumps(
+                        self._generate_browser_result(self._final_result(result), generated_gif_path, proxy_info)
                     )
-                    
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    try:
-                        result = loop.run_until_complete(self._agent.run())
-                        proxy_info["fallback_to_direct"] = True
-                        
-                        if isinstance(result, AgentHistoryList):
-                            return json.dumps(
-                                self._generate_browser_result(
-                                    result.final_result(), 
-                                    generated_gif_path,
-                                    proxy_info
-                                )
-                            )
-                        else:
-                            return json.dumps(
-                                self._generate_browser_result(
-                                    result, 
-                                    generated_gif_path,
-                                    proxy_info
-                                )
-                            )
-                    except asyncio.CancelledError:
-                        logger.info("智能浏览器直连模式任务被中止")
-                        return json.dumps({
-                            "result_content": "浏览器任务已被用户中止",
-                            "generated_gif_path": generated_gif_path,
-                            "error_type": "cancelled",
-                            "proxy_info": proxy_info
-                        })
-                    
-                    finally:
-                        # if self._agent and self._agent.browser:
-                        #     try:
-                        #         cleanup_loop = asyncio.new_event_loop()
-                        #         asyncio.set_event_loop(cleanup_loop)
-                        #         cleanup_loop.run_until_complete(self._agent.browser.close())
-                        #         cleanup_loop.close()
-                        #     except Exception as cleanup_error:
-                        #         logger.warning(f"浏览器清理时出现警告: {cleanup_error}")
-                        loop.close()
-                
                 except Exception as fallback_error:
                     logger.error(f"直连模式也失败: {str(fallback_error)}")
                     return json.dumps({
@@ -310,6 +178,35 @@ class SmartBrowserTool(BaseTool):
                 "error_type": "execution_failed",
                 "proxy_info": proxy_info
             })
+        finally:
+            self._agent = None
+
+    @staticmethod
+    def _final_result(result):
+        return result.final_result() if isinstance(result, AgentHistoryList) else result
+
+    def _run(self, instruction: str, target_url: str = None, user_id: int = None) -> str:
+        """运行智能浏览器任务（同步调用，任务在浏览器池的事件循环上执行）"""
+        try:
+            # 工作流中止或超时时取消任务，租用的浏览器上下文随之归还
+            return run_cancellable(self._browse(instruction, target_url, user_id), loop=browser_pool.loop)
+        except ToolCancelledError:
+            logger.info("智能浏览器任务被中止")
+            return json.dumps({
+                "result_content": "浏览器任务已被用户中止",
+                "error_type": "cancelled",
+            })
+
+    async def _arun(self, instruction: str, target_url: str = None, user_id: int = None) -> str:
+        """运行智能浏览器任务（异步节点中直接等待，无需占用线程）"""
+        try:
+            return await run_on_browser_loop(self._browse(instruction, target_url, user_id))
+        except ToolCancelledError:
+            logger.info("智能浏览器任务被中止")
+            return json.dumps({
+                "result_content": "浏览器任务已被用户中止",
+                "error_type": "cancelled",
+            })
     
     def test_proxy_connectivity(self, target_url: str, user_id: int = None) -> Dict[str, Any]:
         """测试代理连接性"""
@@ -359,33 +256,17 @@ class SmartBrowserTool(BaseTool):
             }
     
     async def terminate(self):
-        """中止智能浏览器任务"""
+        """中止智能浏览器任务（浏览器由浏览器池管理，保持预热）"""
         try:
-            # 设置中止事件
-            if self._abort_event:
-                self._abort_event.set()
-                logger.info("智能浏览器中止信号已发送")
-            
-            # 如果有正在运行的任务，取消它
-            if self._current_task and not self._current_task.done():
-                self._current_task.cancel()
-                logger.info("智能浏览器当前任务已取消")
-            
-            # 关闭浏览器实例
-            if self._agent and self._agent.browser:
-                try:
-                    await self._agent.browser.close()
-                    logger.info("智能浏览器实例已关闭")
-                except Exception as e:
-                    logger.warning(f"关闭智能浏览器时出现警告: {str(e)}")
-            
-            # 清理引用
-            self._agent = None
-            self.browser = None
-            self._current_task = None
-            
+            # 停止正在运行的agent；任务本身随工作流中止信号取消
+            if self._agent:
+                self._agent.stop()
+                logger.info("智能浏览器agent已停止")
         except Exception as e:
             logger.error(f"智能浏览器终止时出现错误: {str(e)}")
+        finally:
+            # 清理引用
+            self._agent = None
 
 # 创建工具实例
 smart_browser_tool = SmartBrowserTool()
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Async Tavily search client with a shared connection pool.
+
+`TavilySearchResults` opens a new HTTP session for every call. This client
+keeps one pooled `httpx.AsyncClient` on the shared background loop, so
+concurrent queries reuse keep-alive connections to the API.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.utils.cancellation import run_cancellable
+
+logger = logging.getLogger(__name__)
+
+TAVILY_API_URL = "https://api.tavily.com"
+
+
+class AsyncTavilyClient:
+    """Pooled async client for the Tavily search endpoint."""
+
+    def __init__(
+        self,
+        base_url: str = TAVILY_API_URL,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily inside the loop that will use it
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def search(
+        self,
+        query: str,
+        api_key: str,
+        max_results: int = 5,
+        search_depth: str = "advanced",
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one search.
+
+        Args:
+            query: The search query
+            api_key: Tavily API key
+            max_results: Maximum number of results
+            search_depth: "basic" or "advanced"
+
+        Returns:
+            Results shaped like `TavilySearchResults` output (title, url, content, score)
+        """
+        response = await self._get_client().post(
+            "/search",
+            json={
+                "api_key": api_key,
+                "query": query,
+                "max_results": max_results,
+                "search_depth": search_depth,
+            },
+        )
+        response.raise_for_status()
+        return [
+            {
+                "title": result.get("title", ""),
+                "url": result.get("url", ""),
+                "content": result.get("content", ""),
+                "score": result.get("score", 0),
+            }
+            for result in response.json().get("results", [])
+        ]
+
+    async def search_many(
+        self, queries: List[str], api_key: str, max_results: int = 5
+    ) -> List[Any]:
+        """Run queries concurrently; each entry is a result list or the raised exception."""
+        return await asyncio.gather(
+            *(self.search(query, api_key, max_results) for query in queries),
+            return_exceptions=True,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+tavily_client = AsyncTavilyClient()
+
+
+def run_search(query: str, api_key: str, max_results: int = 5, timeout: float = 60.0):
+    """Synchronous wrapper running a search on the shared background loop (cancelled with the workflow)."""
+    return run_cancellable(tavily_client.search(query, api_key, max_results), timeout)
+
+
+def run_search_many(
+    queries: List[str], api_key: str, max_results: int = 5, timeout: float = 60.0
+) -> List[Any]:
+    """Synchronous wrapper running several searches concurrently on the background loop."""
+    return run_cancellable(
+        tavily_client.search_many(queries, api_key, max_results), timeout
+    )
@@ -0,0 +1,160 @@
+"""
+On-disk store for full tool outputs that were cut down before entering the conversation.
+
+Artifacts are plain UTF-8 text files under `<directory>/<workflow_id>/`, named
+by a hash of their content, so storing the same output twice costs nothing.
+They are only readable from the workflow that produced them. Files older than
+the TTL are removed, and the oldest files go first when the store grows past
+its size limit.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.config.env import ARTIFACT_DIR, ARTIFACT_MAX_MB, ARTIFACT_TTL
+
+logger = logging.getLogger(__name__)
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+# Pruning walks the whole directory, so it runs at most this often (seconds)
+PRUNE_INTERVAL = 60
+
+
+def _safe(name: str) -> str:
+    return _SAFE_NAME.sub("_", name) or "_"
+
+
+class ArtifactStore:
+    """Write-once text artifacts scoped per workflow, bounded by TTL and total size."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 86400,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            directory: Store root directory
+            max_bytes: Upper bound for all artifacts on disk
+            ttl: Seconds an artifact is kept
+            clock: Time source (compared with file modification times)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.stats = {"stores": 0, "reads": 0, "evictions": 0, "errors": 0}
+
+    def _path(self, workflow_id: str, artifact_id: str) -> str:
+        return os.path.join(self.directory, _safe(workflow_id), f"{_safe(artifact_id)}.txt")
+
+    def put(self, workflow_id: str, tool_name: str, content: str) -> Optional[str]:
+        """
+        Store a full tool output.
+
+        Args:
+            workflow_id: Workflow the output belongs to
+            tool_name: Tool that produced it (becomes part of the id)
+            content: The full output
+
+        Returns:
+            The artifact id, or None when it could not be written
+        """
+        data = content.encode("utf-8")
+        artifact_id = f"{_safe(tool_name)}-{hashlib.sha256(data).hexdigest()[:16]}"
+        path = self._path(workflow_id, artifact_id)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.warning(f"保存工具输出 artifact 失败: {e}")
+            return None
+        with self._lock:
+            self.stats["stores"] += 1
+        self._maybe_prune()
+        return artifact_id
+
+    def read(
+        self, workflow_id: str, artifact_id: str, offset: int = 0, length: Optional[int] = None
+    ) -> Optional[str]:
+        """Return `length` characters of an artifact starting at `offset`, None if unknown."""
+        try:
+            with open(self._path(workflow_id, artifact_id), encoding="utf-8") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        with self._lock:
+            self.stats["reads"] += 1
+        offset = max(0, offset)
+        return content[offset:] if length is None else content[offset:offset + max(0, length)]
+
+    def size(self, workflow_id: str, artifact_id: str) -> Optional[int]:
+        """Length of an artifact in characters, None if unknown."""
+        content = self.read(workflow_id, artifact_id)
+        return None if content is None else len(content)
+
+    def _maybe_prune(self) -> None:
+        now = self._clock()
+        with self._lock:
+            if now - self._last_prune < PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        try:
+            self.prune()
+        except OSError as e:
+            logger.warning(f"清理工具输出 artifact 失败: {e}")
+
+    def prune(self) -> int:
+        """Remove expired artifacts, then the oldest ones above the size limit."""
+        now = self._clock()
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.ttl and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            with self._lock:
+                self.stats["evictions"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+artifact_store = ArtifactStore(
+    ARTIFACT_DIR,
+    max_bytes=ARTIFACT_MAX_MB * 1024 * 1024,
+    ttl=ARTIFACT_TTL,
+)
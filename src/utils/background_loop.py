@@ -0,0 +1,116 @@
+"""
+A long-lived asyncio event loop running in a daemon thread.
+
+Agent tools are synchronous and execute on executor threads, each without a
+running loop. Async clients (and their connection pools) are bound to the loop
+they were created on, so they live on this shared loop instead, and sync code
+submits coroutines to it with `BackgroundLoop.run`. Submitted coroutines run in
+a copy of the caller's context, so the workflow context, the tool scope and
+LangChain's run tree stay visible to them.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """Lazily started event loop thread shared by sync callers."""
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._start()
+            return self._loop
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run_forever():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run_forever, name=self.name, daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        logger.info(f"Background event loop {self.name} started")
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the loop in a copy of the caller's context.
+
+        Cancelling the returned future cancels the task.
+        """
+        loop = self.loop
+        context = contextvars.copy_context()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def on_done(task: asyncio.Task) -> None:
+            if future.cancelled():
+                return
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start() -> None:
+            if future.cancelled():
+                coro.close()
+                return
+            task = loop.create_task(coro, context=context)
+            task.add_done_callback(on_done)
+            future.add_done_callback(
+                lambda f: loop.call_soon_threadsafe(task.cancel) if f.cancelled() else None
+            )
+
+        loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the background loop and wait for its result.
+
+        Args:
+            coro: The coroutine to run
+            timeout: Seconds to wait; on expiry the coroutine is cancelled
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            TimeoutError: If the coroutine did not finish within `timeout`
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundLoop.run() called from its own loop thread")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Background task did not finish within {timeout}s")
+
+
+# Shared loop for pooled network clients (search, crawling, ...)
+background_loop = BackgroundLoop("io-loop")
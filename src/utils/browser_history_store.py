@@ -0,0 +1,256 @@
+"""
+Retention and indexing of browser task recordings.
+
+Recordings used to accumulate in BROWSER_HISTORY_DIR forever. The store keeps
+an index (`index.json` in the same directory) of who produced each recording
+and in which workflow, so recordings can be listed per workflow and disk use
+can be bounded per user: when a user's recordings exceed the quota, their
+oldest ones are removed. Recordings older than the TTL are removed for
+everyone, including files from before the index existed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config.env import (
+    BROWSER_HISTORY_TTL_DAYS,
+    BROWSER_HISTORY_USER_QUOTA_MB,
+)
+from src.config.tools import BROWSER_HISTORY_DIR
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+# Pruning walks the whole directory, so it runs at most this often (seconds)
+PRUNE_INTERVAL = 300
+# Registered recordings that never appeared (failed renders) are forgotten after this long
+PENDING_GRACE_SECONDS = 3600
+RECORDING_EXTENSIONS = (".gif", ".webp")
+
+
+class BrowserHistoryStore:
+    """Index of recordings by user and workflow, with per-user quotas and a TTL."""
+
+    def __init__(
+        self,
+        directory: str,
+        user_quota_bytes: int = 200 * 1024 * 1024,
+        ttl: float = 30 * 86400,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            directory: Where recordings (and the index) are kept
+            user_quota_bytes: Disk each user's recordings may use (0 = unlimited);
+                anonymous workflows share one quota
+            ttl: Seconds a recording is kept (0 = forever)
+            clock: Time source (compared with file modification times)
+        """
+        self.directory = directory
+        self.user_quota_bytes = user_quota_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._last_prune = 0.0
+        self.stats = {"registered": 0, "rendered": 0, "quota_evictions": 0, "expired": 0}
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _entries(self) -> Dict[str, Dict[str, Any]]:
+        """The index, loaded on first use (caller holds the lock)."""
+        if self._index is None:
+            try:
+                with open(self._index_path, encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"浏览器录像索引损坏，将重新建立: {e}")
+                self._index = {}
+        return self._index
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index or {}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            logger.warning(f"保存浏览器录像索引失败: {e}")
+
+    def register(self, path: str, user_id: Any = None, workflow_id: Optional[str] = None) -> None:
+        """Record a recording that is about to be rendered."""
+        with self._lock:
+            self._entries()[os.path.basename(path)] = {
+                "user_id": user_id,
+                "workflow_id": workflow_id,
+                "created": self._clock(),
+                "size": 0,
+            }
+            self.stats["registered"] += 1
+            self._save()
+        self._maybe_prune()
+
+    def mark_rendered(self, path: str) -> None:
+        """Record the size of a finished recording and enforce its owner's quota."""
+        filename = os.path.basename(path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            entry = self._entries().get(filename)
+            if entry is None:
+                return
+            entry["size"] = size
+            self.stats["rendered"] += 1
+            self._enforce_quota(entry["user_id"], keep=filename)
+            self._save()
+
+    def forget(self, path: str) -> None:
+        """Drop a recording that failed to render from the index."""
+        with self._lock:
+            if self._entries().pop(os.path.basename(path), None) is not None:
+                self._save()
+
+    def _enforce_quota(self, user_id: Any, keep: str) -> None:
+        if self.user_quota_bytes <= 0:
+            return
+        owned = sorted(
+            ((name, entry) for name, entry in self._entries().items() if entry["user_id"] == user_id),
+            key=lambda item: item[1]["created"],
+        )
+        total = sum(entry["size"] for _, entry in owned)
+        for name, entry in owned:
+            if total <= self.user_quota_bytes:
+                break
+            if name == keep:
+                continue
+            self._remove(name)
+            total -= entry["size"]
+            self.stats["quota_evictions"] += 1
+        if total > self.user_quota_bytes:
+            logger.warning(f"用户 {user_id} 的单个浏览器录像已超过配额 {self.user_quota_bytes} 字节")
+
+    def _remove(self, filename: str) -> None:
+        self._entries().pop(filename, None)
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除浏览器录像失败: {e}")
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries().get(filename)
+            return dict(entry) if entry is not None else None
+
+    def is_pending(self, filename: str) -> bool:
+        """Whether a recording is registered but not rendered yet."""
+        with self._lock:
+            entry = self._entries().get(filename)
+            if entry is None or entry["size"]:
+                return False
+            created = entry["created"]
+        if self._clock() - created > PENDING_GRACE_SECONDS:
+            return False
+        return not os.path.exists(os.path.join(self.directory, filename))
+
+    async def wait_until_rendered(self, filename: str, timeout: float, poll_interval: float = 0.25) -> bool:
+        """
+        Wait for a recording that is still rendering.
+
+        Args:
+            filename: The recording
+            timeout: Seconds to wait at most
+            poll_interval: Seconds between checks
+
+        Returns:
+            True once the file exists; False if it is unknown, failed or still rendering at the timeout
+        """
+        path = os.path.join(self.directory, filename)
+        deadline = time.monotonic() + timeout
+        while True:
+            if os.path.exists(path):
+                return True
+            if not self.is_pending(filename) or time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+
+    def list_workflow(self, workflow_id: str) -> List[Dict[str, Any]]:
+        """Recordings of a workflow, oldest first; `ready` is False while still rendering."""
+        with self._lock:
+            items = [
+                {"filename": name, **entry}
+                for name, entry in self._entries().items()
+                if entry["workflow_id"] == workflow_id
+            ]
+        for item in items:
+            item["ready"] = os.path.exists(os.path.join(self.directory, item["filename"]))
+        return sorted(items, key=lambda item: item["created"])
+
+    def _maybe_prune(self) -> None:
+        now = self._clock()
+        with self._lock:
+            if now - self._last_prune < PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        self.prune()
+
+    def prune(self) -> int:
+        """Remove expired recordings and forget failed renders."""
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            entries = self._entries()
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            present = set()
+            for name in names:
+                if not name.endswith(RECORDING_EXTENSIONS):
+                    continue
+                present.add(name)
+                path = os.path.join(self.directory, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if self.ttl > 0 and now - mtime > self.ttl:
+                    self._remove(name)
+                    removed += 1
+            for name, entry in list(entries.items()):
+                if name not in present and now - entry["created"] > PENDING_GRACE_SECONDS:
+                    entries.pop(name)
+            self.stats["expired"] += removed
+            self._save()
+        if removed:
+            logger.info(f"已清理 {removed} 个过期的浏览器录像")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries()
+            return {
+                **self.stats,
+                "recordings": len(entries),
+                "bytes": sum(entry["size"] for entry in entries.values()),
+            }
+
+
+browser_history_store = BrowserHistoryStore(
+    BROWSER_HISTORY_DIR,
+    user_quota_bytes=BROWSER_HISTORY_USER_QUOTA_MB * 1024 * 1024,
+    ttl=BROWSER_HISTORY_TTL_DAYS * 86400,
+)
@@ -0,0 +1,219 @@
+"""
+Per-tool deadlines and cooperative cancellation.
+
+The tool wrappers in `src/tools/decorators.py` open a `ToolScope` around each
+call. A scope combines the tool's own time limit with the workflow budget,
+and it shares the workflow's cancel event, which is set the moment the
+workflow is aborted. Code running inside a tool does not block
+uninterruptibly. It either:
+- waits through `run_cancellable`, which submits a coroutine to the shared
+  background loop and cancels it on abort or deadline;
+- uses `await_cancellable` on its own loop; or
+- passes the scope's deadline and cancel event down (bash subprocesses,
+  sandbox workers).
+
+An abort therefore stops running tools within a fraction of a second instead
+of after they finish on their own.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Iterator, Optional
+
+from src.config.env import TOOL_TIMEOUT_SECONDS, TOOL_TIMEOUTS
+from src.utils.background_loop import BackgroundLoop, background_loop
+from src.utils.workflow_context import get_workflow_context
+
+logger = logging.getLogger(__name__)
+
+# How often blocked waits check for an abort (seconds)
+CANCEL_POLL_SECONDS = 0.1
+
+
+class ToolCancelledError(Exception):
+    """The workflow was aborted while the tool was running."""
+
+
+def parse_tool_timeouts(spec: str) -> Dict[str, float]:
+    """Parse "tool=seconds,tool=seconds" into a dict, skipping malformed entries."""
+    timeouts = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"忽略无效的工具超时配置: {item!r}")
+    return timeouts
+
+
+_TOOL_TIMEOUTS = parse_tool_timeouts(TOOL_TIMEOUTS)
+
+
+@dataclass
+class ToolScope:
+    """Deadline and cancellation token of one running tool call."""
+
+    tool_name: str
+    # time.monotonic() value the call may not run past; None = unlimited
+    deadline: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None when unlimited."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Raise if the call was cancelled or ran out of time."""
+        if self.cancelled:
+            raise ToolCancelledError(f"{self.tool_name} was cancelled because the workflow was aborted")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise TimeoutError(f"{self.tool_name} exceeded its time limit")
+
+
+_current_scope: ContextVar[Optional[ToolScope]] = ContextVar("current_tool_scope", default=None)
+
+
+def _earliest(*deadlines: Optional[float]) -> Optional[float]:
+    values = [d for d in deadlines if d is not None]
+    return min(values) if values else None
+
+
+@contextmanager
+def tool_scope(tool_name: str, timeout: Optional[float] = None) -> Iterator[ToolScope]:
+    """
+    Bind the scope of a tool call for the code running inside it.
+
+    Args:
+        tool_name: Name of the tool
+        timeout: Seconds the call may take; the configured limit of the tool when None
+
+    Yields:
+        The scope, bounded by the workflow's budget and sharing its cancel event
+    """
+    if timeout is None:
+        timeout = _TOOL_TIMEOUTS.get(tool_name, TOOL_TIMEOUT_SECONDS)
+    context = get_workflow_context()
+    scope = ToolScope(
+        tool_name=tool_name,
+        deadline=_earliest(
+            time.monotonic() + timeout if timeout and timeout > 0 else None,
+            context.deadline if context is not None else None,
+        ),
+        cancel_event=context.cancel_event if context is not None else threading.Event(),
+    )
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def current_tool_scope() -> Optional[ToolScope]:
+    """Return the scope of the tool call being executed, if any."""
+    return _current_scope.get()
+
+
+def remaining_tool_time() -> Optional[float]:
+    """Seconds left for the running tool call (or the workflow), None when unlimited."""
+    scope = current_tool_scope()
+    if scope is not None:
+        return scope.remaining()
+    context = get_workflow_context()
+    return context.remaining_time() if context is not None else None
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """The cancel event of the running tool call or workflow, if any."""
+    scope = current_tool_scope()
+    if scope is not None:
+        return scope.cancel_event
+    context = get_workflow_context()
+    return context.cancel_event if context is not None else None
+
+
+def run_cancellable(
+    coro: Awaitable[Any],
+    timeout: Optional[float] = None,
+    loop: BackgroundLoop = background_loop,
+) -> Any:
+    """
+    Run a coroutine on a background loop, waiting in a cancellable way.
+
+    Args:
+        coro: The coroutine to run
+        timeout: Seconds to wait at most; also bounded by the tool's deadline
+        loop: The loop to run on (the shared I/O loop by default)
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        ToolCancelledError: If the workflow was aborted; the coroutine is cancelled
+        TimeoutError: If the deadline passed; the coroutine is cancelled
+    """
+    scope = current_tool_scope()
+    deadline = _earliest(
+        time.monotonic() + timeout if timeout is not None else None,
+        scope.deadline if scope is not None else None,
+    )
+    cancel_event = current_cancel_event()
+    future = loop.submit(coro)
+    while True:
+        wait = CANCEL_POLL_SECONDS
+        if deadline is not None:
+            wait = min(wait, max(0.0, deadline - time.monotonic()))
+        # concurrent.futures.TimeoutError is the builtin TimeoutError, so a wait
+        # that ran out looks like a coroutine that raised it; check for completion
+        futures.wait([future], wait)
+        if future.done():
+            return future.result()
+        if cancel_event is not None and cancel_event.is_set():
+            future.cancel()
+            raise ToolCancelledError("Cancelled because the workflow was aborted")
+        if deadline is not None and time.monotonic() >= deadline:
+            future.cancel()
+            raise TimeoutError("Background task did not finish before the tool's deadline")
+
+
+async def await_cancellable(awaitable: Awaitable[Any], scope: Optional[ToolScope] = None) -> Any:
+    """
+    Await on the caller's loop, cancelling the awaitable on abort or deadline.
+
+    Args:
+        awaitable: What to await
+        scope: The tool scope to follow; the current one when None
+    """
+    scope = scope or current_tool_scope()
+    task = asyncio.ensure_future(awaitable)
+    if scope is None:
+        return await task
+    try:
+        while not task.done():
+            wait = CANCEL_POLL_SECONDS
+            remaining = scope.remaining()
+            if remaining is not None:
+                wait = min(wait, remaining)
+            await asyncio.wait({task}, timeout=wait)
+            if not task.done():
+                scope.check()
+        return task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
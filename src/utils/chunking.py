@@ -0,0 +1,175 @@
+"""
+Markdown chunking and query-aware pagination of long documents.
+
+Crawled pages are split into heading-aware chunks, ranked against the query
+with BM25 (see `src.utils.ranking`) and packed into pages that fit a token
+budget. Page 1 holds the most relevant chunks; later pages hold the rest in
+decreasing relevance, so callers can fetch more on demand.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from .ranking import bm25_scores
+
+_CJK_PATTERN = re.compile(r"[一-鿿]")
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s+\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per four other characters."""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    # Nearest heading above the chunk, repeated when the chunk is shown alone
+    heading: str = ""
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.display_text)
+
+    @property
+    def display_text(self) -> str:
+        if self.heading and not self.text.startswith(self.heading):
+            return f"{self.heading}\n\n{self.text}"
+        return self.text
+
+
+@dataclass
+class ChunkPage:
+    chunks: List[Chunk]
+    page: int
+    pages: int
+    total_chunks: int
+
+    @property
+    def has_more(self) -> bool:
+        return self.page < self.pages
+
+    def to_markdown(self) -> str:
+        """Selected chunks in document order; gaps between them are marked."""
+        parts = []
+        previous = None
+        for chunk in sorted(self.chunks, key=lambda c: c.index):
+            if previous is not None and chunk.index != previous + 1:
+                parts.append("...")
+            parts.append(chunk.display_text if previous != chunk.index - 1 else chunk.text)
+            previous = chunk.index
+        return "\n\n".join(parts)
+
+
+def _split_block(block: str, max_tokens: int) -> List[str]:
+    """Split one oversized block on line and sentence boundaries, then hard."""
+    pieces = re.split(r"(?<=[\n。！？.!?])\s*", block)
+    out, current = [], ""
+    for piece in pieces:
+        while estimate_tokens(piece) > max_tokens:
+            # No boundary to cut at; fall back to a character cut
+            size = max(1, len(piece) * max_tokens // estimate_tokens(piece))
+            if current:
+                out.append(current)
+                current = ""
+            out.append(piece[:size])
+            piece = piece[size:]
+        if current and estimate_tokens(current) + estimate_tokens(piece) > max_tokens:
+            out.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip() if current else piece
+    if current:
+        out.append(current)
+    return out
+
+
+def chunk_markdown(markdown: str, max_tokens: int = 256) -> List[Chunk]:
+    """
+    Split markdown into chunks of at most roughly `max_tokens` tokens.
+
+    Chunks follow paragraph boundaries and never span a heading, so each one
+    stays about a single topic.
+
+    Args:
+        markdown: The document
+        max_tokens: Target upper bound per chunk
+
+    Returns:
+        Chunks in document order
+    """
+    chunks: List[Chunk] = []
+    heading = ""
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(Chunk(len(chunks), "\n\n".join(current), heading))
+        current, current_tokens = [], 0
+
+    for block in re.split(r"\n\s*\n", markdown or ""):
+        block = block.strip()
+        if not block:
+            continue
+        if _HEADING_PATTERN.match(block):
+            flush()
+            heading = block.splitlines()[0]
+        for piece in _split_block(block, max_tokens):
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > max_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += tokens
+    flush()
+    return chunks
+
+
+def paginate_chunks(
+    chunks: List[Chunk],
+    query: Optional[str],
+    token_budget: int,
+    page: int = 1,
+) -> ChunkPage:
+    """
+    Rank chunks against `query` and return one token-budgeted page of them.
+
+    Without a query the chunks keep document order, so pages read like the
+    original document.
+
+    Args:
+        chunks: Chunks from `chunk_markdown`
+        query: What the caller is looking for
+        token_budget: Maximum estimated tokens per page
+        page: 1-based page number
+
+    Returns:
+        The requested page (empty when past the last page)
+    """
+    if not chunks:
+        return ChunkPage([], page, 0, 0)
+    scores = bm25_scores(query or "", [c.display_text for c in chunks])
+    # Stable: equal scores keep document order
+    order = np.argsort(-scores, kind="stable")
+
+    pages: List[List[Chunk]] = [[]]
+    used = 0
+    for i in order:
+        chunk = chunks[int(i)]
+        if pages[-1] and used + chunk.tokens > token_budget:
+            pages.append([])
+            used = 0
+        pages[-1].append(chunk)
+        used += chunk.tokens
+
+    selected = pages[page - 1] if 1 <= page <= len(pages) else []
+    return ChunkPage(selected, page, len(pages), len(chunks))
@@ -0,0 +1,178 @@
+"""
+Near-duplicate detection for content gathered during one workflow.
+
+Mirrors and syndicated copies of an article differ only in boilerplate, so
+they are detected by SimHash: a 64-bit fingerprint over word shingles whose
+Hamming distance stays small for near-identical texts. Fingerprints are
+indexed by bands (pigeonhole: two fingerprints within distance d agree exactly
+on at least one of d + 1 bands), so a lookup only compares a few candidates.
+
+Search and crawl tools share one index per workflow through
+`get_workflow_dedup_index()`, and record how much they dropped in the
+workflow metrics.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.env import DEDUP_ENABLED, DEDUP_MAX_DISTANCE
+from .ranking import tokenize
+from .workflow_context import get_workflow_context
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 2
+# Below this many tokens fingerprints are too noisy to compare
+MIN_TOKENS = 8
+
+_BIT_POSITIONS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of `text`, or None when it is too short to fingerprint."""
+    tokens = tokenize(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles: Dict[str, int] = {}
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        shingle = " ".join(tokens[i:i + SHINGLE_SIZE])
+        shingles[shingle] = shingles.get(shingle, 0) + 1
+
+    hashes = np.array([_hash64(s) for s in shingles], dtype=np.uint64)
+    weights = np.array(list(shingles.values()), dtype=np.int64)
+    # shingles x bits matrix of +1/-1 votes, weighted by shingle frequency
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    votes = ((bits * 2 - 1) * weights[:, None]).sum(axis=0)
+    return int(sum(1 << i for i in np.flatnonzero(votes > 0)))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class NearDuplicateIndex:
+    """Banded SimHash index mapping fingerprints to the source that introduced them."""
+
+    max_distance: int = 6
+    checked: int = 0
+    duplicates: int = 0
+    _fingerprints: List[Tuple[int, str]] = field(default_factory=list)
+    _bands: Dict[Tuple[int, int], List[int]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        bands = self.max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        keys = []
+        for band in range(bands):
+            shift = band * width
+            bits = FINGERPRINT_BITS - shift if band == bands - 1 else width
+            keys.append((band, (fingerprint >> shift) & ((1 << bits) - 1)))
+        return keys
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Return the source of a stored near-duplicate of `fingerprint`, if any."""
+        seen = set()
+        for key in self._band_keys(fingerprint):
+            for i in self._bands.get(key, ()):
+                if i in seen:
+                    continue
+                seen.add(i)
+                stored, source = self._fingerprints[i]
+                if hamming_distance(stored, fingerprint) <= self.max_distance:
+                    return source
+        return None
+
+    def add(self, fingerprint: int, source: str) -> None:
+        i = len(self._fingerprints)
+        self._fingerprints.append((fingerprint, source))
+        for key in self._band_keys(fingerprint):
+            self._bands.setdefault(key, []).append(i)
+
+    def check(self, text: str, source: str) -> Optional[str]:
+        """
+        Register `text` from `source` unless it duplicates earlier content.
+
+        Returns:
+            The source of the earlier copy when `text` is a near-duplicate from
+            a different source, otherwise None (and the text is registered)
+        """
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            self.checked += 1
+            original = self.find(fingerprint)
+            if original is not None and original != source:
+                self.duplicates += 1
+                return original
+            if original is None:
+                self.add(fingerprint, source)
+            return None
+
+    @property
+    def duplicate_ratio(self) -> float:
+        return self.duplicates / self.checked if self.checked else 0.0
+
+
+def get_workflow_dedup_index() -> Optional[NearDuplicateIndex]:
+    """The dedup index of the current workflow; None outside a workflow or when disabled."""
+    context = get_workflow_context()
+    if context is None or not DEDUP_ENABLED:
+        return None
+    memo = context.memo_for("dedup")
+    index = memo.get("index")
+    if index is None:
+        index = memo.setdefault("index", NearDuplicateIndex(DEDUP_MAX_DISTANCE))
+    return index
+
+
+def record_dedup_metrics(index: NearDuplicateIndex) -> None:
+    context = get_workflow_context()
+    if context is not None:
+        context.set_metric("dedup_checked", index.checked)
+        context.set_metric("dedup_duplicates", index.duplicates)
+        context.set_metric("duplicate_ratio", round(index.duplicate_ratio, 4))
+
+
+def dedup_search_results(results: List[dict]) -> List[dict]:
+    """
+    Drop search results that near-duplicate content already seen in the workflow.
+
+    The kept copy lists the URLs of dropped ones under `duplicates`.
+    """
+    index = get_workflow_dedup_index()
+    if index is None or not isinstance(results, list):
+        return results
+    kept: Dict[str, dict] = {}
+    out = []
+    for result in results:
+        url = result.get("url") or ""
+        text = f"{result.get('title') or ''} {result.get('content') or ''}"
+        original = index.check(text, url)
+        if original is None:
+            # Copy: results may be shared with the search cache
+            kept[url] = dict(result)
+            out.append(kept[url])
+        elif original in kept:
+            kept[original].setdefault("duplicates", []).append(url)
+    record_dedup_metrics(index)
+    return out
+
+
+def find_duplicate_article(text: str, url: str) -> Optional[str]:
+    """Return the URL of an earlier near-identical page in this workflow, if any."""
+    index = get_workflow_dedup_index()
+    if index is None:
+        return None
+    original = index.check(text, url)
+    record_dedup_metrics(index)
+    return original
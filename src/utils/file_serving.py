@@ -0,0 +1,119 @@
+"""
+Serving immutable files with validators and byte ranges.
+
+Browser recordings are written once under a unique name and never change,
+so a strong ETag derived from size and modification time identifies their
+content. Clients revalidate with If-None-Match (304, no body) and fetch
+parts with a single `Range: bytes=...` request (206), which is what players
+and download managers use to resume large files.
+"""
+
+import os
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """Strong ETag of a write-once file."""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range` header.
+
+    Args:
+        header: The header value, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-500"
+        size: Length of the file
+
+    Returns:
+        Inclusive (start, end) offsets, or None when the header is absent or not a
+        single byte range (the full file is sent then)
+
+    Raises:
+        ValueError: If the range lies outside the file (416)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, separator, end_text = header[len("bytes="):].strip().partition("-")
+    if not separator or not all(t.isdigit() or t == "" for t in (start_text, end_text)):
+        return None
+    if not start_text:
+        if not end_text:
+            return None
+        suffix = int(end_text)
+        if suffix == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(0, size - suffix), size - 1
+    start = int(start_text)
+    if end_text and int(end_text) < start:
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = int(end_text) if end_text else size - 1
+    return start, min(end, size - 1)
+
+
+def _read(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request: Request, path: str, media_type: str, cache_control: str) -> Response:
+    """
+    Respond with a file, honouring If-None-Match and single byte ranges.
+
+    Args:
+        request: The incoming request
+        path: The file to send (must exist)
+        media_type: Content type of the file
+        cache_control: Cache-Control value for the file
+
+    Returns:
+        A 200, 206, 304 or 416 response
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = stat.st_size
+    byte_range = None
+    # A range for an older version of the file is ignored (RFC 9110 If-Range)
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_read(path, 0, size), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read(path, start, end - start + 1), status_code=206, media_type=media_type, headers=headers
+    )
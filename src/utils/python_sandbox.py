@@ -0,0 +1,412 @@
+"""
+Per-session Python execution in isolated, pre-forked worker processes.
+
+Every session (one conversation thread) gets a sticky worker process with its
+own globals, so variables survive between tool calls of that thread but never
+leak into another user's. Workers are forked from a forkserver that has numpy
+and pandas pre-imported, and a few spare workers are kept started, so a new
+session starts warm. Each call has a timeout (the worker is killed and the
+session reset when it overruns), workers run under an address-space limit,
+and idle sessions are evicted.
+"""
+
+import contextlib
+import io
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from src.config.env import (
+    PYTHON_SANDBOX_MAX_WORKERS,
+    PYTHON_SANDBOX_SPARES,
+    PYTHON_SANDBOX_IDLE_TTL,
+    PYTHON_SANDBOX_TIMEOUT,
+    PYTHON_SANDBOX_MEMORY_MB,
+)
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = ["numpy", "pandas"]
+# Output beyond this many characters is cut, so one print() cannot flood the prompt
+MAX_OUTPUT_CHARS = 20000
+# Partial output of a running call is sent back at most this often (seconds)
+STREAM_INTERVAL = 0.2
+# How often a waiting call checks its cancel event (seconds)
+CANCEL_POLL_SECONDS = 0.1
+
+
+@dataclass
+class ExecutionResult:
+    output: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _limit_memory(memory_mb: int) -> None:
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not available on this platform; run without the limit
+        pass
+
+
+def session_key(user_id: Optional[int], thread_id: Optional[str], workflow_id: str) -> str:
+    """
+    Sandbox session of a workflow.
+
+    thread_id comes from the client and is not unique across users, so a
+    session is the thread of a signed-in user. Anonymous workflows (and
+    workflows without a thread) get a session of their own.
+    """
+    if user_id is not None and thread_id:
+        return f"user-{user_id}:{thread_id}"
+    return f"workflow-{workflow_id}"
+
+
+class _StreamingBuffer(io.StringIO):
+    """Captures output; a background thread sends new parts back while the code runs."""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+        self.sent = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            return super().write(text)
+
+    def _flush_loop(self) -> None:
+        while not self.done.wait(STREAM_INTERVAL):
+            if self.sent >= MAX_OUTPUT_CHARS:
+                continue
+            with self.lock:
+                new = self.getvalue()[self.sent:MAX_OUTPUT_CHARS]
+            if new:
+                self.sent += len(new)
+                try:
+                    self.conn.send(("out", new))
+                except (EOFError, OSError):
+                    return
+
+    def stop(self) -> None:
+        self.done.set()
+        self.flusher.join()
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    """Worker loop: execute code strings in one persistent namespace."""
+    _limit_memory(memory_mb)
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        code, stream = request
+        buffer = _StreamingBuffer(conn) if stream else io.StringIO()
+        error = None
+        try:
+            with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+                exec(code, namespace)
+        except MemoryError:
+            error = f"MemoryError: exceeded the {memory_mb} MB memory limit"
+        except BaseException as e:
+            tb = traceback.format_exception(type(e), e, e.__traceback__)
+            # Drop the frame of this worker loop
+            error = "".join(tb[:1] + tb[2:]).strip() or repr(e)
+        if stream:
+            buffer.stop()
+        output = buffer.getvalue()
+        if len(output) > MAX_OUTPUT_CHARS:
+            output = output[:MAX_OUTPUT_CHARS] + f"\n... [output truncated, {len(output)} characters]"
+        try:
+            conn.send(("done", output, error))
+        except (EOFError, OSError):
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, memory_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, memory_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # Calls that acquired the worker and have not finished; only changed
+        # under the pool lock, so eviction never picks a worker about to run
+        self.users = 0
+        # Set when the last call was abandoned because it was cancelled
+        self.cancelled = False
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def execute(
+        self,
+        code: str,
+        timeout: float,
+        on_output: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[ExecutionResult]:
+        """Run code; None when the worker timed out, was cancelled or died (it is then unusable)."""
+        deadline = time.monotonic() + timeout
+        try:
+            self.conn.send((code, on_output is not None))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if cancel_event is not None and cancel_event.is_set():
+                    self.cancelled = True
+                    return None
+                if not self.conn.poll(min(remaining, CANCEL_POLL_SECONDS)):
+                    continue
+                message = self.conn.recv()
+                if message[0] == "done":
+                    _, output, error = message
+                    return ExecutionResult(output, error)
+                on_output(message[1])
+        except (EOFError, OSError, BrokenPipeError):
+            return None
+
+    def kill(self) -> None:
+        with contextlib.suppress(Exception):
+            self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class PythonSandboxPool:
+    """Sticky session -> worker mapping with spares, idle eviction and timeouts."""
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        spares: int = 1,
+        idle_ttl: float = 900,
+        timeout: float = 60,
+        memory_mb: int = 2048,
+        mp_context: str = "forkserver",
+    ):
+        """
+        Args:
+            max_workers: Sessions with a live worker at once
+            spares: Started workers kept waiting for new sessions
+            idle_ttl: Seconds after which an idle session is evicted
+            timeout: Default seconds one call may run
+            memory_mb: Address-space limit per worker (0 = unlimited)
+            mp_context: multiprocessing start method
+        """
+        self.max_workers = max(1, max_workers)
+        self.spares = max(0, spares)
+        self.idle_ttl = idle_ttl
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._ctx = multiprocessing.get_context(mp_context)
+        if mp_context == "forkserver":
+            self._ctx.set_forkserver_preload(PRELOAD_MODULES)
+        self._sessions: Dict[str, _Worker] = {}
+        self._spare_workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._refilling = False
+        self.stats = {
+            "runs": 0,
+            "timeouts": 0,
+            "cancellations": 0,
+            "crashes": 0,
+            "evictions": 0,
+            "sessions": 0,
+        }
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.memory_mb)
+
+    def warm(self) -> None:
+        """Start the spare workers now (and with them the forkserver)."""
+        with self._lock:
+            missing = self.spares - len(self._spare_workers)
+        for _ in range(max(0, missing)):
+            worker = self._spawn()
+            with self._lock:
+                self._spare_workers.append(worker)
+
+    def _refill_spares(self) -> None:
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+
+        def refill():
+            try:
+                self.warm()
+            except Exception as e:
+                logger.warning(f"Python 沙箱预备进程启动失败: {e}")
+            finally:
+                with self._lock:
+                    self._refilling = False
+
+        threading.Thread(target=refill, name="python-sandbox-spares", daemon=True).start()
+
+    def _evict_idle(self, now: float) -> List[_Worker]:
+        """Detach idle and dead sessions; caller kills them outside the lock."""
+        evicted = []
+        for session_id, worker in list(self._sessions.items()):
+            idle = now - worker.last_used > self.idle_ttl and worker.users == 0
+            if idle or not worker.is_alive():
+                evicted.append(self._sessions.pop(session_id))
+                self.stats["evictions"] += 1
+        return evicted
+
+    def _acquire(self, session_id: str) -> Optional[_Worker]:
+        to_kill: List[_Worker] = []
+        created = False
+        with self._lock:
+            to_kill += self._evict_idle(time.monotonic())
+            worker = self._sessions.get(session_id)
+            if worker is None:
+                if len(self._sessions) >= self.max_workers:
+                    # Make room by evicting the least recently used idle session
+                    idle = [
+                        (w.last_used, sid) for sid, w in self._sessions.items()
+                        if w.users == 0
+                    ]
+                    if idle:
+                        _, victim = min(idle)
+                        to_kill.append(self._sessions.pop(victim))
+                        self.stats["evictions"] += 1
+            if worker is None and len(self._sessions) < self.max_workers:
+                while self._spare_workers and worker is None:
+                    spare = self._spare_workers.pop()
+                    if spare.is_alive():
+                        worker = spare
+                    else:
+                        to_kill.append(spare)
+                if worker is None:
+                    # Forking from the preloaded forkserver is cheap
+                    worker = self._spawn()
+                self._sessions[session_id] = worker
+                self.stats["sessions"] += 1
+                created = True
+            if worker is not None:
+                worker.users += 1
+        for dead in to_kill:
+            dead.kill()
+        if created and self.spares:
+            self._refill_spares()
+        return worker
+
+    def run(
+        self,
+        session_id: str,
+        code: str,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> ExecutionResult:
+        """
+        Execute `code` in the session's worker.
+
+        Args:
+            session_id: Sticky session key (e.g. the conversation thread id)
+            code: Python source to execute
+            timeout: Seconds allowed; the pool default when None
+            on_output: Called in this thread with new output while the code runs
+            cancel_event: Stops the call (killing the worker) when set
+
+        Returns:
+            Captured stdout/stderr and the error traceback, if any
+        """
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire(session_id)
+        if worker is None:
+            return ExecutionResult("", "Sandbox is busy: every worker is running code, try again later")
+        try:
+            with worker.lock:
+                worker.last_used = time.monotonic()
+                result = worker.execute(code, timeout, on_output, cancel_event)
+                worker.last_used = time.monotonic()
+        finally:
+            with self._lock:
+                worker.users -= 1
+        with self._lock:
+            self.stats["runs"] += 1
+        if result is not None:
+            return result
+
+        alive = worker.is_alive()
+        with self._lock:
+            if worker.cancelled:
+                self.stats["cancellations"] += 1
+            else:
+                self.stats["timeouts" if alive else "crashes"] += 1
+            if self._sessions.get(session_id) is worker:
+                del self._sessions[session_id]
+        worker.kill()
+        if worker.cancelled:
+            return ExecutionResult("", "Cancelled: the workflow was aborted; session state was reset")
+        if alive:
+            return ExecutionResult("", f"TimeoutError: execution exceeded {timeout}s; session state was reset")
+        return ExecutionResult(
+            "",
+            f"Worker process died (exit code {worker.process.exitcode}), possibly by exceeding "
+            f"the {self.memory_mb} MB memory limit; session state was reset",
+        )
+
+    def reset(self, session_id: str) -> None:
+        """Drop a session and its state."""
+        with self._lock:
+            worker = self._sessions.pop(session_id, None)
+        if worker is not None:
+            worker.kill()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._sessions.values()) + self._spare_workers
+            self._sessions, self._spare_workers = {}, []
+        for worker in workers:
+            worker.kill()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "spare_workers": len(self._spare_workers),
+                "max_workers": self.max_workers,
+                **self.stats,
+            }
+
+
+python_sandbox = PythonSandboxPool(
+    max_workers=PYTHON_SANDBOX_MAX_WORKERS,
+    spares=PYTHON_SANDBOX_SPARES,
+    idle_ttl=PYTHON_SANDBOX_IDLE_TTL,
+    timeout=PYTHON_SANDBOX_TIMEOUT,
+    memory_mb=PYTHON_SANDBOX_MEMORY_MB,
+)
@@ -0,0 +1,120 @@
+"""
+Lightweight local ranking helpers.
+"""
+
+import re
+from collections import Counter
+from typing import Optional, Sequence
+from urllib.parse import urlsplit, urlunsplit
+
+import numpy as np
+
+# Latin words/numbers as tokens; CJK text has no spaces, so each ideograph is a token.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+def bm25_scores(
+    query: str,
+    documents: Sequence[str],
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> np.ndarray:
+    """
+    Score documents against a query with Okapi BM25.
+
+    Args:
+        query: The query text
+        documents: The documents to score
+        k1: Term frequency saturation
+        b: Length normalization strength
+
+    Returns:
+        An array with one score per document (higher is more relevant)
+    """
+    if not documents:
+        return np.zeros(0)
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    if not query_terms:
+        return np.zeros(len(documents))
+
+    doc_tokens = [tokenize(doc) for doc in documents]
+    lengths = np.array([len(tokens) for tokens in doc_tokens], dtype=float)
+    avg_length = lengths.mean() or 1.0
+
+    # Term frequency matrix: documents x query terms
+    counts = [Counter(tokens) for tokens in doc_tokens]
+    tf = np.array(
+        [[count[term] for term in query_terms] for count in counts],
+        dtype=float,
+    )
+    df = (tf > 0).sum(axis=0)
+    n = len(documents)
+    idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    scores = (tf * (k1 + 1)) / (tf + norm[:, None])
+    return scores @ idf
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for deduplication (case-insensitive host, no fragment or trailing slash)."""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def merge_search_results(
+    queries: Sequence[str],
+    result_lists: Sequence[Sequence[dict]],
+    limit: Optional[int] = None,
+) -> list[dict]:
+    """
+    Merge results of several queries, deduplicate them by URL and rank them.
+
+    Results are ranked with BM25 over title and snippet against all queries
+    combined; the provider score breaks ties.
+
+    Args:
+        queries: The queries that were searched
+        result_lists: One result list per query (dicts with url/title/content/score)
+        limit: Maximum number of results to return
+
+    Returns:
+        Ranked results, each annotated with the `queries` that found it
+    """
+    merged: dict[str, dict] = {}
+    for query, results in zip(queries, result_lists):
+        for result in results or []:
+            url = result.get("url")
+            if not url:
+                continue
+            key = normalize_url(url)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = {**result, "queries": [query]}
+                continue
+            if query not in existing["queries"]:
+                existing["queries"].append(query)
+            # Keep the longer snippet and the best provider score
+            if len(result.get("content") or "") > len(existing.get("content") or ""):
+                existing["content"] = result.get("content")
+            existing["score"] = max(existing.get("score") or 0, result.get("score") or 0)
+
+    results = list(merged.values())
+    if not results:
+        return []
+    scores = bm25_scores(
+        " ".join(queries),
+        [f"{r.get('title') or ''} {r.get('content') or ''}" for r in results],
+    )
+    order = sorted(
+        range(len(results)),
+        key=lambda i: (scores[i], len(results[i]["queries"]), results[i].get("score") or 0),
+        reverse=True,
+    )
+    ranked = [results[i] for i in order]
+    return ranked[:limit] if limit else ranked
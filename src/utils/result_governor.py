@@ -0,0 +1,223 @@
+"""
+Size limits for tool results before they enter the conversation.
+
+Every tool message stays in `State.messages` and is resent on each later
+supervisor and reporter call, so an oversized result is paid for many times.
+The governor checks a result against its tool's token and byte budget; when
+it is over, the full output is saved to the artifact store and the message
+keeps the head and tail of the text plus a reference the agent can follow
+with `read_artifact`.
+
+Results keep their shape: plain strings are cut directly, JSON object strings
+(e.g. the browser tool's result) and multimodal messages (e.g. crawled pages)
+have each text field cut in proportion to its size, and lists of search
+results have their `content` fields cut.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.config.env import (
+    TOOL_RESULT_GOVERNOR_ENABLED,
+    TOOL_RESULT_MAX_TOKENS,
+    TOOL_RESULT_MAX_BYTES,
+    TOOL_RESULT_TOKEN_BUDGETS,
+)
+from src.utils.artifact_store import ArtifactStore, artifact_store
+from src.utils.chunking import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Joins the text fields of one result into its artifact
+PART_SEPARATOR = "\n\n"
+# Share of a cut text kept from its beginning; the rest comes from its end
+HEAD_RATIO = 0.75
+# Shorter texts (headings, source lines) are never cut
+MIN_CUT_CHARS = 500
+
+
+@dataclass(frozen=True)
+class ResultBudget:
+    max_tokens: int
+    max_bytes: int
+
+
+def parse_token_budgets(spec: str) -> Dict[str, int]:
+    """Parse "tool=tokens,tool=tokens" into a dict, skipping malformed entries."""
+    budgets = {}
+    for item in spec.split(","):
+        name, _, tokens = item.partition("=")
+        try:
+            budgets[name.strip()] = int(tokens)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"忽略无效的工具结果预算配置: {item!r}")
+    return budgets
+
+
+def char_budget(text: str, max_tokens: int, max_bytes: int) -> Optional[int]:
+    """Characters of `text` that fit both budgets, None when all of it fits."""
+    tokens = estimate_tokens(text)
+    size = len(text.encode("utf-8"))
+    if tokens <= max_tokens and size <= max_bytes:
+        return None
+    ratio = min(
+        max_tokens / tokens if tokens else 1.0,
+        max_bytes / size if size else 1.0,
+    )
+    return max(0, int(len(text) * ratio))
+
+
+class ResultGovernor:
+    """Per-tool token and byte budgets with overflow saved as artifacts."""
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        default_budget: ResultBudget,
+        token_budgets: Optional[Dict[str, int]] = None,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            store: Where full outputs of cut results are kept
+            default_budget: Budget of tools without an entry in `token_budgets`
+            token_budgets: Token budgets by tool name (0 = unlimited)
+            enabled: Pass results through untouched when False
+        """
+        self.store = store
+        self.default_budget = default_budget
+        self.token_budgets = token_budgets or {}
+        self.enabled = enabled
+
+    def budget_for(self, tool_name: str) -> Optional[ResultBudget]:
+        max_tokens = self.token_budgets.get(tool_name, self.default_budget.max_tokens)
+        if max_tokens <= 0:
+            return None
+        # A larger token budget implies a proportionally larger byte budget
+        scale = max_tokens / self.default_budget.max_tokens if self.default_budget.max_tokens else 1
+        return ResultBudget(max_tokens, max(1, int(self.default_budget.max_bytes * max(1.0, scale))))
+
+    def govern(self, tool_name: str, result: Any, workflow_id: Optional[str] = None) -> Any:
+        """
+        Fit a tool result into the tool's budget.
+
+        Args:
+            tool_name: Name of the tool that produced the result
+            result: The result as returned by the tool
+            workflow_id: Workflow the artifact is stored for
+
+        Returns:
+            The result unchanged when it fits, otherwise a cut copy of the same shape
+        """
+        budget = self.budget_for(tool_name) if self.enabled else None
+        if budget is None:
+            return result
+        try:
+            return self._govern(tool_name, result, workflow_id or "default", budget)
+        except Exception as e:
+            # Never fail a tool call because of the governor
+            logger.warning(f"工具结果裁剪失败 ({tool_name}): {e}")
+            return result
+
+    def _govern(self, tool_name: str, result: Any, workflow_id: str, budget: ResultBudget) -> Any:
+        if isinstance(result, str):
+            if result.lstrip().startswith("{"):
+                try:
+                    parsed = json.loads(result)
+                except ValueError:
+                    parsed = None
+                if isinstance(parsed, dict):
+                    fields = [k for k, v in parsed.items() if isinstance(v, str)]
+                    texts = self._fit(tool_name, [parsed[k] for k in fields], workflow_id, budget)
+                    if texts is None:
+                        return result
+                    return json.dumps({**parsed, **dict(zip(fields, texts))}, ensure_ascii=False)
+            texts = self._fit(tool_name, [result], workflow_id, budget)
+            return result if texts is None else texts[0]
+
+        if isinstance(result, dict) and isinstance(result.get("content"), list):
+            parts = result["content"]
+            indexes = [
+                i for i, part in enumerate(parts)
+                if isinstance(part, dict) and part.get("type") == "text" and isinstance(part.get("text"), str)
+            ]
+            texts = self._fit(tool_name, [parts[i]["text"] for i in indexes], workflow_id, budget)
+            if texts is None:
+                return result
+            content = list(parts)
+            for i, text in zip(indexes, texts):
+                content[i] = {**parts[i], "text": text}
+            return {**result, "content": content}
+
+        if isinstance(result, list):
+            indexes = [
+                i for i, item in enumerate(result)
+                if isinstance(item, dict) and isinstance(item.get("content"), str)
+            ]
+            texts = self._fit(tool_name, [result[i]["content"] for i in indexes], workflow_id, budget)
+            if texts is None:
+                return result
+            items = list(result)
+            for i, text in zip(indexes, texts):
+                items[i] = {**result[i], "content": text}
+            return items
+
+        return result
+
+    def _fit(
+        self, tool_name: str, texts: List[str], workflow_id: str, budget: ResultBudget
+    ) -> Optional[List[str]]:
+        """Cut each text in proportion to its size; None when they fit together."""
+        full = PART_SEPARATOR.join(texts)
+        if char_budget(full, budget.max_tokens, budget.max_bytes) is None:
+            return None
+        artifact_id = self.store.put(workflow_id, tool_name, full)
+        large = [text for text in texts if len(text) >= MIN_CUT_CHARS]
+        # Short texts are kept whole; the large ones share what is left of the budget
+        spare_tokens = budget.max_tokens - sum(estimate_tokens(t) for t in texts if len(t) < MIN_CUT_CHARS)
+        spare_bytes = budget.max_bytes - sum(len(t.encode("utf-8")) for t in texts if len(t) < MIN_CUT_CHARS)
+        large_tokens = max(1, sum(estimate_tokens(t) for t in large))
+        large_bytes = max(1, sum(len(t.encode("utf-8")) for t in large))
+        cut = []
+        offset = 0
+        for text in texts:
+            keep = None
+            if len(text) >= MIN_CUT_CHARS:
+                share_tokens = max(0, spare_tokens) * estimate_tokens(text) / large_tokens
+                share_bytes = max(0, spare_bytes) * len(text.encode("utf-8")) / large_bytes
+                keep = char_budget(text, int(share_tokens), int(share_bytes))
+            cut.append(text if keep is None else self._cut(text, keep, artifact_id, offset))
+            offset += len(text) + len(PART_SEPARATOR)
+        logger.info(
+            f"工具 {tool_name} 结果超出预算 ({budget.max_tokens} tokens)，"
+            f"完整内容已保存为 artifact {artifact_id}"
+        )
+        return cut
+
+    @staticmethod
+    def _cut(text: str, keep: int, artifact_id: Optional[str], offset: int) -> str:
+        head_len = int(keep * HEAD_RATIO)
+        tail_len = keep - head_len
+        head = text[:head_len]
+        tail = text[len(text) - tail_len:] if tail_len else ""
+        omitted = len(text) - head_len - tail_len
+        if artifact_id is None:
+            marker = f"[... {omitted} characters omitted ...]"
+        else:
+            marker = (
+                f"[... {omitted} characters omitted. Full output saved as artifact "
+                f'"{artifact_id}"; call read_artifact(artifact_id="{artifact_id}", '
+                f"offset={offset + head_len}) to read the rest ...]"
+            )
+        return f"{head}\n\n{marker}\n\n{tail}"
+
+
+result_governor = ResultGovernor(
+    artifact_store,
+    ResultBudget(TOOL_RESULT_MAX_TOKENS, TOOL_RESULT_MAX_BYTES),
+    token_budgets=parse_token_budgets(TOOL_RESULT_TOKEN_BUDGETS),
+    enabled=TOOL_RESULT_GOVERNOR_ENABLED,
+)
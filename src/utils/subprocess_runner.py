@@ -0,0 +1,169 @@
+"""
+Async shell command execution with bounded output and process-group kill.
+
+Commands run in their own session (process group), so a timeout or an abort
+kills everything they spawned, not just the shell. Output is streamed to an
+optional callback as it arrives, while only a bounded head and tail of it is
+kept in memory for the final result.
+"""
+
+import asyncio
+import os
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+READ_CHUNK_SIZE = 4096
+# Grace period between SIGTERM and SIGKILL
+KILL_GRACE_SECONDS = 2.0
+CANCEL_POLL_SECONDS = 0.2
+
+
+class HeadTailBuffer:
+    """Keeps the first and last `max_bytes / 2` bytes of a stream."""
+
+    def __init__(self, max_bytes: int = 64 * 1024):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail: deque = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        while self.tail and self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    @property
+    def omitted(self) -> int:
+        return max(0, self.total - len(self.head) - min(self.tail_size, self.tail_limit))
+
+    def getvalue(self) -> str:
+        tail = b"".join(self.tail)[-self.tail_limit:] if self.tail_limit else b""
+        head_text = self.head.decode("utf-8", errors="replace")
+        tail_text = tail.decode("utf-8", errors="replace")
+        if self.omitted:
+            return f"{head_text}\n... [{self.omitted} bytes omitted] ...\n{tail_text}"
+        return head_text + tail_text
+
+
+@dataclass
+class CommandResult:
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    cancelled: bool = False
+    duration: float = 0.0
+
+
+def _kill_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> None:
+    _kill_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        _kill_group(process, signal.SIGKILL)
+        await process.wait()
+
+
+async def run_command(
+    cmd: str,
+    timeout: float,
+    max_output_bytes: int = 64 * 1024,
+    on_output: Optional[Callable[[str, str], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> CommandResult:
+    """
+    Run a shell command in its own process group.
+
+    Args:
+        cmd: The shell command
+        timeout: Seconds before the process group is killed
+        max_output_bytes: Bytes of stdout (and, separately, stderr) kept, head and tail
+        on_output: Called with ("stdout" | "stderr", text) for every chunk read
+        cancel_event: Kills the process group when set
+
+    Returns:
+        Exit code (None when killed) and the retained output
+    """
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_shell(
+        cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        stdin=asyncio.subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    buffers = {"stdout": HeadTailBuffer(max_output_bytes), "stderr": HeadTailBuffer(max_output_bytes)}
+
+    async def pump(stream: asyncio.StreamReader, name: str) -> None:
+        while True:
+            data = await stream.read(READ_CHUNK_SIZE)
+            if not data:
+                return
+            buffers[name].write(data)
+            if on_output is not None:
+                on_output(name, data.decode("utf-8", errors="replace"))
+
+    readers = asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"))
+    timed_out = cancelled = False
+    deadline = started + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(readers), min(remaining, CANCEL_POLL_SECONDS)
+                )
+                break
+            except asyncio.TimeoutError:
+                continue
+        if timed_out or cancelled:
+            await _terminate(process)
+            try:
+                # A detached grandchild may still hold the pipes open
+                await asyncio.wait_for(readers, KILL_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await readers
+        await process.wait()
+    except BaseException:
+        # Our caller was cancelled: never leave the group running
+        await asyncio.shield(_terminate(process))
+        readers.cancel()
+        raise
+
+    return CommandResult(
+        returncode=None if (timed_out or cancelled) else process.returncode,
+        stdout=buffers["stdout"].getvalue(),
+        stderr=buffers["stderr"].getvalue(),
+        timed_out=timed_out,
+        cancelled=cancelled,
+        duration=time.monotonic() - started,
+    )
@@ -0,0 +1,52 @@
+"""
+Progress reporting from inside running tools.
+
+Tools call `publish_tool_progress` from the thread executing the tool; the
+update is dispatched as a LangChain custom event attached to the tool's run,
+and `run_agent_workflow` turns it into a `tool_progress` SSE event for the
+same `tool_call_id` as the surrounding `tool_call` / `tool_call_result`.
+A memoized call announces itself the same way, so its result can be marked
+as a cache hit.
+"""
+
+import logging
+from typing import Any
+
+from langchain_core.callbacks.manager import dispatch_custom_event
+
+logger = logging.getLogger(__name__)
+
+TOOL_PROGRESS_EVENT = "tool_progress"
+TOOL_CACHE_HIT_EVENT = "tool_cache_hit"
+
+
+def publish_tool_progress(tool_name: str, text: str, **extra: Any) -> None:
+    """
+    Publish a progress update of the running tool.
+
+    Args:
+        tool_name: Name of the tool, as in its `tool_call` event
+        text: The update (e.g. new output lines)
+        **extra: Additional fields for the frontend
+    """
+    if not text:
+        return
+    try:
+        dispatch_custom_event(
+            TOOL_PROGRESS_EVENT, {"tool_name": tool_name, "text": text, **extra}
+        )
+    except RuntimeError:
+        # Not running inside a tool run (e.g. called directly); nothing to report to
+        pass
+    except Exception as e:
+        logger.debug(f"Failed to publish progress of {tool_name}: {e}")
+
+
+def publish_tool_cache_hit(tool_name: str) -> None:
+    """Mark the running tool call as answered from the workflow's memo."""
+    try:
+        dispatch_custom_event(TOOL_CACHE_HIT_EVENT, {"tool_name": tool_name})
+    except RuntimeError:
+        pass
+    except Exception as e:
+        logger.debug(f"Failed to publish cache hit of {tool_name}: {e}")
@@ -0,0 +1,94 @@
+"""
+Per-workflow context shared by nodes and tools.
+
+`run_agent_workflow` binds a `WorkflowContext` before streaming the graph.
+LangGraph copies the current context into node and tool executions, so any
+code running on behalf of the workflow can reach its memo tables and metric
+counters through `get_workflow_context()` without threading extra arguments
+through tool signatures.
+"""
+
+import threading
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class WorkflowContext:
+    """State that lives exactly as long as one workflow run."""
+
+    workflow_id: str
+    thread_id: Optional[str] = None
+    user_id: Optional[int] = None
+    # time.monotonic() value after which the workflow is out of budget
+    deadline: Optional[float] = None
+    metrics: Dict[str, float] = field(default_factory=dict)
+    memo: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Set when the workflow is aborted; long-running tools poll it
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        """Increment a workflow metric counter."""
+        with self._lock:
+            self.metrics[name] = self.metrics.get(name, 0) + amount
+
+    def set_metric(self, name: str, value: float) -> None:
+        """Set a workflow metric gauge (e.g. a ratio)."""
+        with self._lock:
+            self.metrics[name] = value
+
+    def memo_for(self, namespace: str) -> Dict[str, Any]:
+        """Return the memo table for a namespace, e.g. "search"."""
+        with self._lock:
+            return self.memo.setdefault(namespace, {})
+
+    def cancel(self) -> None:
+        """Signal running tools that the workflow was aborted."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def remaining_time(self) -> Optional[float]:
+        """Seconds left in the workflow budget, None when unlimited."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def get_metrics(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.metrics)
+
+
+_current_workflow: ContextVar[Optional[WorkflowContext]] = ContextVar(
+    "current_workflow", default=None
+)
+
+
+def get_workflow_context() -> Optional[WorkflowContext]:
+    """Return the context of the workflow being executed, if any."""
+    return _current_workflow.get()
+
+
+def bind_workflow_context(context: Optional[WorkflowContext]) -> Token:
+    """Bind `context` as the current workflow; pass the token to `reset_workflow_context`."""
+    return _current_workflow.set(context)
+
+
+def reset_workflow_context(token: Token) -> None:
+    try:
+        _current_workflow.reset(token)
+    except ValueError:
+        # The token was created in another context (e.g. an async generator
+        # closed from a different task); the binding dies with that context.
+        pass
+
+
+def remaining_workflow_time() -> Optional[float]:
+    """Seconds left in the current workflow's budget, None when unlimited or outside a workflow."""
+    context = get_workflow_context()
+    return context.remaining_time() if context is not None else None
@@ -4,6 +4,7 @@
 提供共享的fixtures和测试配置
 """
 
+import importlib.util
 import os
 import sys
 import pytest
@@ -11,8 +12,65 @@ import tempfile
 import shutil
 from pathlib import Path
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # 添加src目录到Python路径
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+
+# ── Loading modules whose packages other tests stub ────────────────────────────
+#
+# Importing `src.tools`, `src.graph` or `src.crawler` pulls in langchain tools,
+# the whole graph or playwright, and some unit tests replace these packages with
+# MagicMock in sys.modules. Tests of single modules load the real files under an
+# alias instead:
+#
+#     from tests.conftest import load_crawler_module, load_source
+#
+#     rate_limiter = load_source("rate_limiter_under_test", "src/llms/rate_limiter.py")
+#     batch = load_crawler_module("batch")
+
+CRAWLER_ALIAS = "crawler_under_test"
+
+
+def load_source(name: str, path: str):
+    """Load a module from `path` (relative to the project root) as `name`."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PROJECT_ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    # Registered before running, so dataclasses and relative imports resolve
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_crawler_module(name: str):
+    """Load `src/crawler/<name>.py` from the real crawler package, aliased as crawler_under_test."""
+    if CRAWLER_ALIAS not in sys.modules:
+        directory = os.path.join(PROJECT_ROOT, "src", "crawler")
+        spec = importlib.util.spec_from_file_location(
+            CRAWLER_ALIAS,
+            os.path.join(directory, "__init__.py"),
+            submodule_search_locations=[directory],
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[CRAWLER_ALIAS] = package
+        spec.loader.exec_module(package)
+    return load_source(f"{CRAWLER_ALIAS}.{name}", f"src/crawler/{name}.py")
+
+
+class FakeClock:
+    """A monotonic or wall clock that only moves when the test says so."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
 
 
 @pytest.fixture(scope="session")
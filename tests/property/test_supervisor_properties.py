@@ -87,9 +87,14 @@ def build_mock_state(next_agent: str, repeat_count: int) -> dict:
 
 
 def make_llm_response(agent_name: str):
+    """Return a mock LLM that streams the given agent name as a JSON routing response."""
+    import json as _json
+
+    chunk = MagicMock()
+    chunk.content = _json.dumps({"next": agent_name})
     mock_llm = MagicMock()
-    mock_llm.with_structured_output.return_value = mock_llm
-    mock_llm.invoke.return_value = {"next": agent_name}
+    mock_llm.bind.return_value = mock_llm
+    mock_llm.stream.side_effect = lambda *args, **kwargs: iter([chunk])
     return mock_llm
 
 
@@ -238,3 +243,36 @@ def test_property7_valid_agents_never_raise(
         supervisor_node(state)
     except ValueError as e:
         pytest.fail(f"Valid agent '{agent}' raised ValueError: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Property 8: 流式路由解析与分块方式无关
+# ---------------------------------------------------------------------------
+
+@given(
+    agent=st.sampled_from(VALID_OPTIONS),
+    cuts=st.lists(st.integers(min_value=0, max_value=60), max_size=10),
+)
+@settings(max_examples=100, deadline=None)
+def test_property8_stream_parser_is_chunking_independent(agent, cuts):
+    """
+    Property 8: For any way the provider chunks the JSON routing response,
+    RouterStreamParser reports the same `next` value, and never before the
+    value's closing quote has arrived.
+    """
+    import json as _json
+    from src.graph.routing import RouterStreamParser
+
+    text = _json.dumps({"next": agent, "reason": "because"})
+    value_end = text.index(f'"{agent}"') + len(agent) + 2
+    bounds = sorted({c for c in cuts if c < len(text)} | {0, len(text)})
+
+    parser = RouterStreamParser()
+    result = None
+    for start, end in zip(bounds, bounds[1:]):
+        result = parser.feed(text[start:end])
+        if result is not None:
+            assert end >= value_end
+            break
+
+    assert result == agent
@@ -0,0 +1,171 @@
+"""
+Unit tests for browser recording retention (src/utils/browser_history_store.py)
+and conditional/range file serving (src/utils/file_serving.py).
+"""
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.utils.browser_history_store import BrowserHistoryStore
+from src.utils.file_serving import parse_range, serve_file
+from tests.conftest import FakeClock
+
+
+def _record(store, tmp_path, name, size, user_id=1, workflow_id="wf-1"):
+    path = str(tmp_path / name)
+    store.register(path, user_id=user_id, workflow_id=workflow_id)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    store.mark_rendered(path)
+    return path
+
+
+class TestBrowserHistoryStore:
+    def test_index_by_workflow_survives_restart(self, tmp_path):
+        store = BrowserHistoryStore(str(tmp_path))
+        _record(store, tmp_path, "a.gif", 10, workflow_id="wf-1")
+        _record(store, tmp_path, "b.webp", 20, workflow_id="wf-2")
+        store.register(str(tmp_path / "c.gif"), user_id=1, workflow_id="wf-1")
+
+        reopened = BrowserHistoryStore(str(tmp_path))
+        recordings = reopened.list_workflow("wf-1")
+        assert [(r["filename"], r["size"], r["ready"]) for r in recordings] == [
+            ("a.gif", 10, True),
+            ("c.gif", 0, False),
+        ]
+
+    def test_quota_evicts_the_users_oldest_recordings(self, tmp_path):
+        clock = FakeClock(1_700_000_000.0)
+        store = BrowserHistoryStore(str(tmp_path), user_quota_bytes=250, clock=clock)
+        for i in range(3):
+            clock.now += 1
+            _record(store, tmp_path, f"{i}.gif", 100)
+        _record(store, tmp_path, "other.gif", 200, user_id=2)
+        assert not (tmp_path / "0.gif").exists()
+        assert (tmp_path / "1.gif").exists() and (tmp_path / "2.gif").exists()
+        assert (tmp_path / "other.gif").exists()
+        assert store.get_stats()["quota_evictions"] == 1
+
+    def test_newest_recording_is_kept_even_over_quota(self, tmp_path):
+        store = BrowserHistoryStore(str(tmp_path), user_quota_bytes=50)
+        _record(store, tmp_path, "big.gif", 100)
+        assert (tmp_path / "big.gif").exists()
+
+    def test_expired_and_legacy_recordings_are_pruned(self, tmp_path):
+        clock = FakeClock(1_700_000_000.0)
+        store = BrowserHistoryStore(str(tmp_path), ttl=3600, clock=clock)
+        _record(store, tmp_path, "new.gif", 10)
+        legacy = tmp_path / "legacy.gif"
+        legacy.write_bytes(b"old")
+        os.utime(legacy, (clock.now - 7200, clock.now - 7200))
+        assert store.prune() == 1
+        assert not legacy.exists() and (tmp_path / "new.gif").exists()
+
+    def test_failed_renders_are_forgotten(self, tmp_path):
+        store = BrowserHistoryStore(str(tmp_path))
+        path = str(tmp_path / "failed.gif")
+        store.register(path, workflow_id="wf-1")
+        store.forget(path)
+        assert store.list_workflow("wf-1") == []
+
+    def test_request_waits_for_a_recording_that_is_rendering(self, tmp_path):
+        store = BrowserHistoryStore(str(tmp_path))
+        path = str(tmp_path / "pending.webp")
+        store.register(path, workflow_id="wf-1")
+        assert store.is_pending("pending.webp")
+        assert not store.is_pending("unknown.webp")
+
+        async def scenario():
+            async def render():
+                await asyncio.sleep(0.1)
+                with open(path, "wb") as f:
+                    f.write(b"webp")
+                store.mark_rendered(path)
+
+            rendering = asyncio.ensure_future(render())
+            rendered = await store.wait_until_rendered("pending.webp", timeout=5, poll_interval=0.02)
+            await rendering
+            return rendered
+
+        assert asyncio.run(scenario()) is True
+        assert not store.is_pending("pending.webp")
+
+    def test_wait_gives_up_on_unknown_and_slow_recordings(self, tmp_path):
+        store = BrowserHistoryStore(str(tmp_path))
+        store.register(str(tmp_path / "slow.gif"), workflow_id="wf-1")
+
+        assert asyncio.run(store.wait_until_rendered("unknown.gif", timeout=5)) is False
+        assert asyncio.run(store.wait_until_rendered("slow.gif", timeout=0.1, poll_interval=0.02)) is False
+        # Still rendering: the endpoint answers 202 instead of 404
+        assert store.is_pending("slow.gif")
+
+
+class TestParseRange:
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=50-500", (50, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=abc", None),
+    ])
+    def test_parse(self, header, expected):
+        assert parse_range(header, 100) == expected
+
+    def test_unsatisfiable(self):
+        with pytest.raises(ValueError):
+            parse_range("bytes=100-", 100)
+
+
+@pytest.fixture
+def client(tmp_path):
+    data = bytes(range(256)) * 4
+    path = tmp_path / "run.gif"
+    path.write_bytes(data)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def get_file(request: Request):
+        return serve_file(request, str(path), "image/gif", "private, max-age=60, immutable")
+
+    return TestClient(app), data
+
+
+class TestServeFile:
+    def test_full_response_carries_validators(self, client):
+        http, data = client
+        response = http.get("/file")
+        assert response.status_code == 200
+        assert response.content == data
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["cache-control"] == "private, max-age=60, immutable"
+        assert response.headers["etag"].startswith('"')
+
+    def test_matching_etag_is_not_modified(self, client):
+        http, _ = client
+        etag = http.get("/file").headers["etag"]
+        response = http.get("/file", headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.content == b""
+
+    def test_range_request(self, client):
+        http, data = client
+        response = http.get("/file", headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.content == data[10:20]
+        assert response.headers["content-range"] == f"bytes 10-19/{len(data)}"
+
+    def test_stale_if_range_gets_the_full_file(self, client):
+        http, data = client
+        response = http.get("/file", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+        assert response.status_code == 200 and response.content == data
+
+    def test_unsatisfiable_range(self, client):
+        http, data = client
+        response = http.get("/file", headers={"Range": f"bytes={len(data)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(data)}"
@@ -0,0 +1,323 @@
+"""
+Unit tests for the warm browser pool (src/tools/browser_pool.py).
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tests.conftest import FakeClock, load_source
+
+# Importing `src.tools` pulls in every tool (and other unit tests stub it),
+# so load the pool module on its own.
+browser_pool = load_source("browser_pool_under_test", "src/tools/browser_pool.py")
+
+
+class FakeBrowser:
+    def __init__(self, config):
+        self.config = config
+        self.closed = False
+        self.contexts = []
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser, config):
+        self.browser = browser
+        self.viewport = config.viewport
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def _config(headless=True, proxy=None, viewport=None):
+    return SimpleNamespace(
+        headless=headless, proxy=proxy, chrome_instance_path=None,
+        viewport=viewport or {"width": 1280, "height": 720},
+    )
+
+
+def _pool(memory=lambda: 0, **kwargs):
+    launched = []
+
+    async def launch(config):
+        browser = FakeBrowser(config)
+        launched.append(browser)
+        return browser
+
+    async def new_context(browser, config):
+        context = FakeContext(browser, config)
+        browser.contexts.append(context)
+        return context
+
+    kwargs.setdefault("idle_ttl", 0)
+    pool = browser_pool.BrowserPool(
+        browser_factory=launch, context_factory=new_context, memory_probe=memory, **kwargs
+    )
+    return pool, launched
+
+
+async def _use(pool, config):
+    async with pool.lease(config) as lease:
+        return lease
+
+
+class TestBrowserProfile:
+    def test_viewport_does_not_split_browsers(self):
+        assert browser_pool.BrowserProfile.from_config(
+            _config(viewport={"width": 390, "height": 844})
+        ) == browser_pool.BrowserProfile.from_config(_config())
+
+    def test_proxy_and_headless_do(self):
+        base = browser_pool.BrowserProfile.from_config(_config())
+        assert browser_pool.BrowserProfile.from_config(_config(headless=False)) != base
+        assert browser_pool.BrowserProfile.from_config(
+            _config(proxy={"server": "http://proxy:8080"})
+        ) != base
+
+
+class TestBrowserPool:
+    def test_browser_is_reused_with_a_fresh_context_per_lease(self):
+        pool, launched = _pool()
+
+        async def scenario():
+            first = await _use(pool, _config())
+            second = await _use(pool, _config(viewport={"width": 390, "height": 844}))
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert len(launched) == 1
+        assert first.browser is second.browser
+        assert first.context is not second.context
+        assert first.context.closed and second.context.closed
+        assert second.context.viewport == {"width": 390, "height": 844}
+        assert pool.get_stats()["reuses"] == 1
+
+    def test_concurrent_leases_share_a_browser_with_isolated_contexts(self):
+        pool, launched = _pool()
+
+        async def scenario():
+            async with pool.lease(_config()) as a, pool.lease(_config()) as b:
+                assert pool.get_stats()["active_leases"] == 2
+                return a, b
+
+        a, b = asyncio.run(scenario())
+        assert len(launched) == 1 and a.context is not b.context
+
+    def test_profiles_get_their_own_browser(self):
+        pool, launched = _pool(max_browsers=1)
+
+        async def scenario():
+            await _use(pool, _config())
+            await _use(pool, _config(proxy={"server": "http://proxy:8080"}))
+
+        asyncio.run(scenario())
+        assert len(launched) == 2
+        # The idle browser of the other profile made room for the new one
+        assert launched[0].closed and not launched[1].closed
+        assert pool.get_stats()["browsers"] == 1
+
+    def test_overflow_browser_closes_when_returned(self):
+        pool, launched = _pool(max_browsers=1)
+
+        async def scenario():
+            async with pool.lease(_config()):
+                await _use(pool, _config(headless=False))
+
+        asyncio.run(scenario())
+        assert len(launched) == 2
+        assert launched[1].closed and launched[0].closed is False
+        assert pool.get_stats()["overflow_launches"] == 1
+
+    def test_browser_is_replaced_after_max_uses(self):
+        pool, launched = _pool(max_uses=2)
+
+        async def scenario():
+            for _ in range(3):
+                await _use(pool, _config())
+
+        asyncio.run(scenario())
+        assert len(launched) == 2
+        assert launched[0].closed and not launched[1].closed
+        assert pool.get_stats()["retired_max_uses"] == 1
+
+    def test_idle_browsers_expire(self):
+        clock = FakeClock()
+        pool, launched = _pool(idle_ttl=60, clock=clock)
+
+        async def scenario():
+            await _use(pool, _config())
+            clock.now = 30
+            await pool.prune()
+            assert not launched[0].closed
+            clock.now = 100
+            await pool.prune()
+
+        asyncio.run(scenario())
+        assert launched[0].closed
+        assert pool.get_stats()["browsers"] == 0
+
+    def test_memory_growth_recycles_idle_browsers(self):
+        usage = {"bytes": 0}
+        pool, launched = _pool(max_memory_mb=100, memory=lambda: usage["bytes"], memory_check_interval=0)
+
+        async def scenario():
+            await _use(pool, _config())
+            usage["bytes"] = 200 * 1024 * 1024
+            await _use(pool, _config())
+
+        asyncio.run(scenario())
+        assert launched[0].closed
+        assert pool.get_stats()["retired_memory"] == 1
+
+    def test_memory_is_measured_at_most_once_per_interval(self):
+        clock = FakeClock()
+        probes = []
+        pool, _ = _pool(memory=lambda: probes.append(1) or 0, memory_check_interval=30, clock=clock)
+
+        async def scenario():
+            for _ in range(3):
+                await _use(pool, _config())
+            clock.now = 31
+            await _use(pool, _config())
+
+        asyncio.run(scenario())
+        assert len(probes) == 2
+
+    def test_slow_launch_does_not_block_other_leases(self):
+        pool, launched = _pool()
+        fast_launch = pool._browser_factory
+        gate = {}
+
+        async def launch(config):
+            if config.headless is False:
+                # A cold start of another profile, still in progress
+                await gate["event"].wait()
+            return await fast_launch(config)
+
+        pool._browser_factory = launch
+
+        async def scenario():
+            gate["event"] = asyncio.Event()
+            await _use(pool, _config())
+            slow = asyncio.ensure_future(_use(pool, _config(headless=False)))
+            await asyncio.sleep(0.01)
+            # The warm browser is leased and returned while the launch is pending
+            await asyncio.wait_for(_use(pool, _config()), timeout=1)
+            assert not slow.done()
+            gate["event"].set()
+            await slow
+
+        asyncio.run(scenario())
+        assert len(launched) == 2
+
+    def test_leases_arriving_during_a_launch_share_it(self):
+        pool, launched = _pool()
+        fast_launch = pool._browser_factory
+
+        async def launch(config):
+            await asyncio.sleep(0.05)
+            return await fast_launch(config)
+
+        pool._browser_factory = launch
+
+        async def scenario():
+            await asyncio.gather(*(_use(pool, _config()) for _ in range(3)))
+
+        asyncio.run(scenario())
+        assert len(launched) == 1
+        assert pool.get_stats()["active_leases"] == 0
+
+    def test_overflow_launches_are_capped(self):
+        pool, launched = _pool(max_browsers=1, max_overflow=1)
+
+        async def hold(config, release):
+            async with pool.lease(config):
+                await release.wait()
+
+        async def scenario():
+            first, second = asyncio.Event(), asyncio.Event()
+            holders = [
+                asyncio.ensure_future(hold(_config(), first)),
+                asyncio.ensure_future(hold(_config(headless=False), second)),
+            ]
+            await asyncio.sleep(0.01)
+            waiting = asyncio.ensure_future(_use(pool, _config(proxy={"server": "http://proxy:8080"})))
+            await asyncio.sleep(0.01)
+            # Two browsers are running, so the third profile waits for one to be returned
+            assert len(launched) == 2 and not waiting.done()
+            second.set()
+            await waiting
+            first.set()
+            await asyncio.gather(*holders)
+
+        asyncio.run(scenario())
+        assert len(launched) == 3
+        assert pool.get_stats()["waits"] >= 1
+
+    def test_failed_launch_frees_its_slot(self):
+        pool, launched = _pool(max_browsers=1, max_overflow=0)
+        fast_launch = pool._browser_factory
+        attempts = []
+
+        async def launch(config):
+            attempts.append(config)
+            if len(attempts) == 1:
+                raise RuntimeError("chromium missing")
+            return await fast_launch(config)
+
+        pool._browser_factory = launch
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await _use(pool, _config())
+            await _use(pool, _config())
+
+        asyncio.run(scenario())
+        assert len(launched) == 1
+        assert pool.get_stats()["launch_failures"] == 1
+
+    def test_failed_context_retires_the_browser(self):
+        pool, launched = _pool()
+
+        async def broken_context(browser, config):
+            raise RuntimeError("browser crashed")
+
+        pool._context_factory = broken_context
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await _use(pool, _config())
+
+        asyncio.run(scenario())
+        assert launched[0].closed
+        assert pool.get_stats()["retired_errors"] == 1
+
+    def test_cancelled_task_returns_its_lease(self):
+        pool, launched = _pool()
+
+        async def scenario():
+            async def browse():
+                async with pool.lease(_config()) as lease:
+                    await asyncio.sleep(10)
+                return lease
+
+            task = asyncio.ensure_future(browse())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        assert launched[0].contexts[0].closed
+        assert pool.get_stats()["active_leases"] == 0
+
+    def test_shutdown_closes_browsers_from_sync_code(self):
+        pool, launched = _pool()
+        pool.loop.run(_use(pool, _config()), timeout=5)
+        pool.shutdown()
+        assert launched[0].closed
+        assert pool.get_stats()["browsers"] == 0
@@ -0,0 +1,155 @@
+"""
+Unit tests for the per-user browser storage state store (src/tools/browser_state.py).
+"""
+import asyncio
+import json
+import os
+
+from cryptography.fernet import Fernet
+
+from tests.conftest import FakeClock, load_source
+
+# Importing `src.tools` pulls in every tool (and other unit tests stub it),
+# so load the module on its own.
+browser_state = load_source("browser_state_under_test", "src/tools/browser_state.py")
+
+
+def _state(cookie_value="secret-session", origins=()):
+    return {
+        "cookies": [{"name": "sid", "value": cookie_value, "domain": "example.com", "path": "/", "expires": -1}],
+        "origins": list(origins),
+    }
+
+
+def _origin(name, size):
+    return {"origin": f"https://{name}.example.com", "localStorage": [{"name": "k", "value": "x" * size}]}
+
+
+def _store(tmp_path, **kwargs):
+    return browser_state.BrowserStateStore(str(tmp_path), Fernet.generate_key(), **kwargs)
+
+
+class TestBrowserStateStore:
+    def test_round_trip_is_encrypted_at_rest(self, tmp_path):
+        store = _store(tmp_path)
+        assert store.save(42, _state())
+        assert store.load(42) == _state()
+        raw = (tmp_path / "42.state").read_bytes()
+        assert b"secret-session" not in raw
+        assert os.stat(tmp_path / "42.state").st_mode & 0o077 == 0
+        assert store.load(7) is None
+
+    def test_expired_state_is_discarded(self, tmp_path):
+        clock = FakeClock(1_700_000_000.0)
+        store = _store(tmp_path, ttl=3600, clock=clock)
+        store.save(1, _state())
+        clock.now += 3601
+        assert store.load(1) is None
+        assert not (tmp_path / "1.state").exists()
+        assert store.get_stats()["expired"] == 1
+
+    def test_state_from_another_key_is_discarded(self, tmp_path):
+        _store(tmp_path).save(1, _state())
+        assert _store(tmp_path).load(1) is None
+
+    def test_expired_cookies_are_not_saved(self, tmp_path):
+        clock = FakeClock(1_700_000_000.0)
+        store = _store(tmp_path, clock=clock)
+        state = _state()
+        state["cookies"].append({"name": "old", "value": "v", "domain": "a.com", "path": "/", "expires": clock.now - 1})
+        store.save(1, state)
+        assert [c["name"] for c in store.load(1)["cookies"]] == ["sid"]
+
+    def test_largest_origins_are_dropped_to_fit(self, tmp_path):
+        store = _store(tmp_path, max_bytes=2000)
+        store.save(1, _state(origins=[_origin("small", 100), _origin("big", 5000)]))
+        assert [o["origin"] for o in store.load(1)["origins"]] == ["https://small.example.com"]
+
+    def test_oversized_cookies_are_not_saved(self, tmp_path):
+        store = _store(tmp_path, max_bytes=100)
+        assert not store.save(1, _state(cookie_value="x" * 500))
+        assert store.load(1) is None
+
+    def test_key_falls_back_to_the_jwt_secret(self):
+        key = browser_state.resolve_state_key("", "jwt-secret")
+        assert key == browser_state.resolve_state_key(None, "jwt-secret")
+        Fernet(key)
+        assert browser_state.resolve_state_key("", None) is None
+
+
+class FakePlaywrightContext:
+    def __init__(self, state=None):
+        self.cookies = []
+        self.scripts = []
+        self.state = state
+
+    async def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    async def add_init_script(self, script):
+        self.scripts.append(script)
+
+    async def storage_state(self):
+        return self.state
+
+
+class FakeBrowserUseContext:
+    def __init__(self, playwright_context):
+        self.session = None
+        self._playwright_context = playwright_context
+
+    async def get_session(self):
+        self.session = type("Session", (), {"context": self._playwright_context})()
+        return self.session
+
+
+def test_state_is_applied_to_and_captured_from_a_browser_use_context():
+    playwright_context = FakePlaywrightContext(state=_state())
+    context = FakeBrowserUseContext(playwright_context)
+
+    async def scenario():
+        assert await browser_state.capture_storage_state(context) is None
+        await browser_state.apply_storage_state(context, _state(origins=[_origin("app", 10)]))
+        return await browser_state.capture_storage_state(context)
+
+    assert asyncio.run(scenario()) == _state()
+    assert playwright_context.cookies == _state()["cookies"]
+    (script,) = playwright_context.scripts
+    assert json.dumps({"https://app.example.com": [["k", "x" * 10]]}) in script
+
+
+def test_concurrent_workflows_only_see_their_own_users_state(tmp_path):
+    import threading
+
+    from src.utils.background_loop import BackgroundLoop
+    from src.utils.workflow_context import WorkflowContext, bind_workflow_context, reset_workflow_context
+
+    store = _store(tmp_path)
+    store.save(1, _state("alice-session"))
+    store.save(2, _state("bob-session"))
+    loop = BackgroundLoop("browser-state-test")
+    both_started = threading.Barrier(2)
+    seen = {}
+
+    async def browser_task():
+        # Let the other workflow's task start before reading the owner
+        await asyncio.sleep(0.05)
+        owner = browser_state.state_owner()
+        return owner, store.load(owner)["cookies"][0]["value"]
+
+    def workflow(user_id):
+        token = bind_workflow_context(WorkflowContext(workflow_id=f"wf-{user_id}", user_id=user_id))
+        try:
+            both_started.wait()
+            seen[user_id] = loop.run(browser_task(), timeout=5)
+        finally:
+            reset_workflow_context(token)
+
+    threads = [threading.Thread(target=workflow, args=(user_id,)) for user_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {1: (1, "alice-session"), 2: (2, "bob-session")}
+    assert browser_state.state_owner() is None
@@ -0,0 +1,111 @@
+"""
+Unit tests for per-tool deadlines and cooperative cancellation
+(src/utils/cancellation.py).
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.cancellation import (
+    ToolCancelledError,
+    await_cancellable,
+    current_tool_scope,
+    remaining_tool_time,
+    run_cancellable,
+    tool_scope,
+)
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
+
+
+@pytest.fixture
+def workflow():
+    context = WorkflowContext(workflow_id="wf-1")
+    token = bind_workflow_context(context)
+    yield context
+    reset_workflow_context(token)
+
+
+async def _sleeper(state):
+    state["started"] = True
+    try:
+        await asyncio.sleep(30)
+    except asyncio.CancelledError:
+        state["cancelled"] = True
+        raise
+
+
+class TestToolScope:
+    def test_deadline_is_the_earlier_of_tool_and_workflow(self, workflow):
+        workflow.deadline = time.monotonic() + 5
+        with tool_scope("search", timeout=60) as scope:
+            assert current_tool_scope() is scope
+            assert 4 < remaining_tool_time() <= 5
+        with tool_scope("search", timeout=1):
+            assert remaining_tool_time() <= 1
+        assert current_tool_scope() is None
+
+    def test_scope_shares_the_workflow_cancel_event(self, workflow):
+        with tool_scope("search") as scope:
+            assert not scope.cancelled
+            workflow.cancel()
+            assert scope.cancelled
+            with pytest.raises(ToolCancelledError):
+                scope.check()
+
+
+class TestRunCancellable:
+    def test_returns_the_result(self, workflow):
+        async def answer():
+            return 42
+
+        with tool_scope("search"):
+            assert run_cancellable(answer()) == 42
+
+    def test_abort_cancels_the_coroutine_promptly(self, workflow):
+        state = {}
+        threading.Timer(0.2, workflow.cancel).start()
+        started = time.monotonic()
+        with tool_scope("search"), pytest.raises(ToolCancelledError):
+            run_cancellable(_sleeper(state))
+        assert time.monotonic() - started < 1
+        time.sleep(0.1)
+        assert state == {"started": True, "cancelled": True}
+
+    def test_tool_deadline_applies(self, workflow):
+        state = {}
+        with tool_scope("search", timeout=0.3), pytest.raises(TimeoutError):
+            run_cancellable(_sleeper(state))
+        time.sleep(0.1)
+        assert state.get("cancelled")
+
+    def test_timeout_raised_by_the_coroutine_propagates_at_once(self, workflow):
+        async def hung_extraction():
+            raise TimeoutError("extraction timed out")
+
+        started = time.monotonic()
+        with tool_scope("crawl_tool", timeout=2), pytest.raises(TimeoutError, match="extraction"):
+            run_cancellable(hung_extraction())
+        assert time.monotonic() - started < 1
+        # Without any deadline it must not spin on the failed future either
+        with pytest.raises(TimeoutError, match="extraction"):
+            run_cancellable(hung_extraction())
+
+
+def test_await_cancellable_on_the_callers_loop(workflow):
+    state = {}
+
+    async def run():
+        with tool_scope("browser"):
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.2, workflow.cancel)
+            await await_cancellable(_sleeper(state))
+
+    with pytest.raises(ToolCancelledError):
+        asyncio.run(run())
+    assert state == {"started": True, "cancelled": True}
@@ -0,0 +1,82 @@
+"""
+Unit tests for markdown chunking and query-aware pagination (src/utils/chunking.py).
+"""
+from src.utils.chunking import (
+    chunk_markdown,
+    estimate_tokens,
+    paginate_chunks,
+)
+
+DOCUMENT = """# Pricing
+
+The basic plan costs ten dollars per month.
+
+## History
+
+The company was founded in 2010 by two engineers.
+
+## Support
+
+Support is available by email around the clock.
+"""
+
+
+class TestChunkMarkdown:
+    def test_chunks_do_not_span_headings(self):
+        chunks = chunk_markdown(DOCUMENT, max_tokens=256)
+        assert [c.heading for c in chunks] == ["# Pricing", "## History", "## Support"]
+        assert chunks[1].text.startswith("## History")
+
+    def test_long_blocks_are_split_within_budget(self):
+        paragraph = " ".join(f"Sentence number {i} is here." for i in range(200))
+        chunks = chunk_markdown(f"## Long\n\n{paragraph}", max_tokens=50)
+        assert len(chunks) > 10
+        # A split chunk repeats its heading when shown on its own
+        assert chunks[3].display_text.startswith("## Long")
+        assert all(estimate_tokens(c.text) <= 50 for c in chunks)
+
+    def test_unbroken_text_is_hard_split(self):
+        chunks = chunk_markdown("x" * 1000, max_tokens=20)
+        assert "".join(c.text for c in chunks) == "x" * 1000
+        assert all(estimate_tokens(c.text) <= 20 for c in chunks)
+
+    def test_estimate_tokens_counts_cjk_per_character(self):
+        assert estimate_tokens("你好世界") == 4
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("") == 0
+
+
+class TestPaginateChunks:
+    def test_most_relevant_chunk_comes_first(self):
+        chunks = chunk_markdown(DOCUMENT)
+        budget = max(c.tokens for c in chunks)
+
+        first = paginate_chunks(chunks, "who founded the company", budget, page=1)
+
+        assert [c.heading for c in first.chunks] == ["## History"]
+        assert first.pages == 3
+        assert first.has_more
+
+    def test_pages_cover_every_chunk_once(self):
+        chunks = chunk_markdown(DOCUMENT)
+        budget = max(c.tokens for c in chunks)
+        seen = []
+        for page in range(1, 4):
+            seen += [c.index for c in paginate_chunks(chunks, "support email", budget, page).chunks]
+        assert sorted(seen) == [c.index for c in chunks]
+        assert paginate_chunks(chunks, "support email", budget, page=4).chunks == []
+
+    def test_without_query_keeps_document_order(self):
+        chunks = chunk_markdown(DOCUMENT)
+        page = paginate_chunks(chunks, None, token_budget=10_000)
+        assert page.pages == 1
+        assert page.to_markdown() == "\n\n".join(c.text for c in chunks)
+
+    def test_gaps_between_selected_chunks_are_marked(self):
+        chunks = chunk_markdown(DOCUMENT)
+        budget = chunks[0].tokens + chunks[2].tokens
+
+        page = paginate_chunks(chunks, "plan costs support email", budget)
+
+        assert sorted(c.index for c in page.chunks) == [0, 2]
+        assert "\n\n...\n\n" in page.to_markdown()
@@ -0,0 +1,122 @@
+"""
+Unit tests for the on-disk crawl cache (src/crawler/cache.py) and its use in
+Crawler.crawl with conditional revalidation.
+"""
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from tests.conftest import FakeClock, load_crawler_module
+
+cache_module = load_crawler_module("cache")
+crawler_module = load_crawler_module("crawler")
+direct_client = load_crawler_module("direct_client")
+
+HTML = "<html><head><title>Hello</title></head><body><article><p>Body text</p></article></body></html>"
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1_000_000.0)
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return cache_module.CrawlCache(str(tmp_path), ttl=60, clock=clock)
+
+
+class TestCrawlCache:
+    def test_put_and_get(self, cache):
+        cache.put("https://a.com", HTML, "Hello", "Body text", etag='"v1"')
+        entry = cache.get("https://a.com")
+        assert entry.title == "Hello"
+        assert entry.markdown == "Body text"
+        assert entry.etag == '"v1"'
+        assert entry.fresh
+
+    def test_entry_goes_stale_after_ttl(self, cache, clock):
+        cache.put("https://a.com", HTML, "Hello", "Body text")
+        clock.now += 61
+        assert cache.get("https://a.com").fresh is False
+        cache.touch("https://a.com")
+        assert cache.get("https://a.com").fresh is True
+
+    def test_identical_content_is_stored_once(self, cache, tmp_path):
+        first = cache.put("https://a.com", HTML, "Hello", "Body text")
+        second = cache.put("https://mirror.a.com", HTML, "Hello", "Body text")
+        assert first == second
+        assert len(os.listdir(tmp_path / "objects")) == 2  # one .html + one .json
+        assert cache.get_extraction(HTML)["markdown"] == "Body text"
+
+    def test_content_key_mode_never_serves_without_fetching(self, tmp_path):
+        cache = cache_module.CrawlCache(str(tmp_path), ttl=60, key_mode="content")
+        cache.put("https://a.com", HTML, "Hello", "Body text")
+        assert cache.get("https://a.com").fresh is False
+
+    def test_lru_eviction_by_size(self, tmp_path, clock):
+        cache = cache_module.CrawlCache(str(tmp_path), max_bytes=1, ttl=60, clock=clock)
+        # Any object exceeds a 1-byte budget, so only the most recent one survives
+        cache.put("https://a.com", HTML + "a", "A", "a")
+        clock.now += 1
+        cache.put("https://b.com", HTML + "b", "B", "b")
+        assert cache.get("https://a.com") is None
+        assert cache.get_stats()["evictions"] >= 1
+
+
+class TestCrawlerWithCache:
+    def _crawler(self, cache, fetch_mode="jina"):
+        crawler = crawler_module.Crawler({"fetch_mode": fetch_mode}, cache=cache)
+        crawler.jina_client = MagicMock()
+        crawler.jina_client.get_html.return_value = HTML
+        crawler.direct_client = MagicMock()
+        # Readability runs in node.js; keep the tests hermetic
+        article_cls = crawler_module.Article
+        crawler.readability_extractor = MagicMock()
+        crawler.readability_extractor.extract.side_effect = lambda html, url: article_cls(
+            title="Hello", html_content="<p>Body text</p>", url=url
+        )
+        return crawler
+
+    def test_fresh_entry_skips_fetch_and_extraction(self, cache):
+        crawler = self._crawler(cache)
+        first = crawler.crawl("https://a.com")
+        second = crawler.crawl("https://a.com")
+
+        assert crawler.jina_client.get_html.call_count == 1
+        assert crawler.readability_extractor.extract.call_count == 1
+        assert second.to_markdown() == first.to_markdown()
+        assert cache.get_stats()["hits"] == 1
+
+    def test_stale_entry_with_same_content_reuses_extraction(self, cache, clock):
+        crawler = self._crawler(cache)
+        crawler.crawl("https://a.com")
+        clock.now += 61
+        crawler.crawl("https://a.com")
+
+        assert crawler.jina_client.get_html.call_count == 2
+        assert crawler.readability_extractor.extract.call_count == 1
+
+    def test_direct_mode_revalidates_with_validators(self, cache, clock):
+        crawler = self._crawler(cache, fetch_mode="direct")
+        crawler.direct_client.fetch.return_value = direct_client.FetchResult(
+            200, HTML, etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"
+        )
+        first = crawler.crawl("https://a.com")
+
+        clock.now += 61
+        crawler.direct_client.fetch.return_value = direct_client.FetchResult(304)
+        second = crawler.crawl("https://a.com")
+
+        _, kwargs = crawler.direct_client.fetch.call_args
+        assert kwargs == {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        assert second.to_markdown() == first.to_markdown()
+        assert crawler.readability_extractor.extract.call_count == 1
+        assert cache.get_stats()["revalidated"] == 1
+        assert cache.get("https://a.com").fresh
+
+    def test_without_cache(self):
+        crawler = self._crawler(None)
+        assert crawler.crawl("https://a.com").title
+        assert crawler.crawl("https://a.com").title
+        assert crawler.readability_extractor.extract.call_count == 2
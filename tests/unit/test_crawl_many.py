@@ -0,0 +1,131 @@
+"""
+Unit tests for concurrent batch crawling with per-domain politeness
+(src/crawler/batch.py).
+"""
+import asyncio
+import threading
+import time
+
+from tests.conftest import load_crawler_module
+
+batch = load_crawler_module("batch")
+article_module = load_crawler_module("article")
+
+
+class FakeCrawler:
+    """Serves pages after per-URL delays and records peak concurrency per domain."""
+
+    def __init__(self, delays, failures=()):
+        self.delays = delays
+        self.failures = set(failures)
+        self.active = {}
+        self.peak = {}
+        self.starts = []
+
+    async def acrawl(self, url, deadline=None):
+        domain = batch.domain_of(url)
+        self.active[domain] = self.active.get(domain, 0) + 1
+        self.peak[domain] = max(self.peak.get(domain, 0), self.active[domain])
+        self.starts.append((url, time.monotonic()))
+        try:
+            await asyncio.sleep(self.delays.get(url, 0))
+        finally:
+            self.active[domain] -= 1
+        if url in self.failures:
+            return None
+        return article_module.Article(title=url, html_content="", url=url, markdown="body")
+
+
+async def collect(*args, **kwargs):
+    return [result async for result in batch.acrawl_many(*args, **kwargs)]
+
+
+class TestDomainLimiter:
+    def test_caps_concurrency_per_domain(self):
+        crawler = FakeCrawler({f"https://a.com/{i}": 0.02 for i in range(4)})
+        urls = [f"https://a.com/{i}" for i in range(4)] + ["https://b.com/x"]
+        limiter = batch.DomainLimiter(max_concurrency=2, min_interval=0)
+
+        results = asyncio.run(collect(crawler, urls, limiter=limiter))
+
+        assert len(results) == 5
+        assert crawler.peak["a.com"] == 2
+        assert crawler.peak["b.com"] == 1
+
+    def test_spaces_request_starts(self):
+        crawler = FakeCrawler({})
+        urls = ["https://a.com/1", "https://www.a.com/2", "https://b.com/1"]
+        limiter = batch.DomainLimiter(max_concurrency=5, min_interval=0.05)
+
+        asyncio.run(collect(crawler, urls, limiter=limiter))
+
+        starts = dict(crawler.starts)
+        assert starts["https://www.a.com/2"] - starts["https://a.com/1"] >= 0.04
+        # Other domains are not held back
+        assert starts["https://b.com/1"] - starts["https://a.com/1"] < 0.04
+
+    def test_domain_spacing_does_not_hold_global_slots(self):
+        crawler = FakeCrawler({})
+        urls = ["https://a.com/1", "https://a.com/2", "https://a.com/3", "https://b.com/1"]
+        limiter = batch.DomainLimiter(max_concurrency=5, min_interval=0.2)
+
+        asyncio.run(collect(crawler, urls, limiter=limiter, concurrency=1))
+
+        starts = dict(crawler.starts)
+        # b.com starts while a.com's later pages wait for their spacing
+        assert starts["https://b.com/1"] - starts["https://a.com/1"] < 0.1
+        assert starts["https://a.com/3"] - starts["https://a.com/2"] >= 0.15
+
+
+class TestCrawlMany:
+    def test_results_arrive_in_completion_order(self):
+        crawler = FakeCrawler(
+            {"https://a.com": 0.05, "https://b.com": 0.0, "https://c.com": 0.02},
+            failures={"https://c.com"},
+        )
+        limiter = batch.DomainLimiter(min_interval=0)
+
+        results = asyncio.run(
+            collect(crawler, ["https://a.com", "https://b.com", "https://c.com"], limiter=limiter)
+        )
+
+        assert [r.url for r in results] == ["https://b.com", "https://c.com", "https://a.com"]
+        assert results[1].article is None and results[1].error == "failed"
+        assert results[2].article.title == "https://a.com"
+
+    def test_deadline_reports_unfinished_pages(self):
+        crawler = FakeCrawler({"https://slow.com": 5, "https://fast.com": 0})
+        limiter = batch.DomainLimiter(min_interval=0)
+
+        started = time.monotonic()
+        results = asyncio.run(collect(
+            crawler, ["https://slow.com", "https://fast.com"],
+            deadline=time.monotonic() + 0.1, limiter=limiter,
+        ))
+
+        assert time.monotonic() - started < 1
+        assert {r.url: r.error for r in results} == {
+            "https://fast.com": None,
+            "https://slow.com": "timed out",
+        }
+
+    def test_sync_iterator_streams_from_background_loop(self):
+        crawler = FakeCrawler({"https://a.com": 0.05, "https://b.com": 0})
+        urls = ["https://a.com", "https://b.com", "https://a.com"]
+
+        results = list(batch.iter_crawl_many(crawler, urls))
+
+        assert [r.url for r in results] == ["https://b.com", "https://a.com"]
+
+    def test_sync_iterator_stops_when_cancelled(self):
+        crawler = FakeCrawler({"https://fast.com": 0, "https://slow.com": 30})
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+        started = time.monotonic()
+
+        results = list(batch.iter_crawl_many(
+            crawler, ["https://fast.com", "https://slow.com"], cancel_event=cancel_event
+        ))
+
+        assert [r.url for r in results] == ["https://fast.com"]
+        assert time.monotonic() - started < 1
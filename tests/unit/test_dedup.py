@@ -0,0 +1,90 @@
+"""
+Unit tests for SimHash near-duplicate detection (src/utils/dedup.py).
+"""
+from src.utils.dedup import (
+    NearDuplicateIndex,
+    dedup_search_results,
+    find_duplicate_article,
+    hamming_distance,
+    simhash,
+)
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
+
+ARTICLE = (
+    "The central bank raised interest rates by a quarter point on Wednesday, "
+    "citing persistent inflation in services and a tight labour market. "
+    "Officials signalled that further increases remain possible if price "
+    "pressures do not ease over the coming months, while markets had largely "
+    "priced in the move ahead of the announcement. Bond yields rose modestly "
+    "after the decision, and the currency strengthened against the dollar. "
+    "Analysts said the statement struck a more cautious tone than in March, "
+    "noting that wage growth has started to slow and that consumer spending "
+    "weakened in the first quarter of the year."
+)
+MIRROR = "Reuters | " + ARTICLE + " Share this article."
+OTHER = (
+    "A new species of frog was discovered in the rainforest after researchers "
+    "spent three months surveying remote streams with acoustic recorders and "
+    "night-time transects across the protected reserve."
+)
+
+
+class TestSimHash:
+    def test_near_duplicates_are_close(self):
+        assert hamming_distance(simhash(ARTICLE), simhash(MIRROR)) <= 6
+        assert hamming_distance(simhash(ARTICLE), simhash(OTHER)) > 10
+
+    def test_short_text_is_not_fingerprinted(self):
+        assert simhash("too short to tell") is None
+
+    def test_index_reports_original_source(self):
+        index = NearDuplicateIndex(max_distance=6)
+        assert index.check(ARTICLE, "https://a.com/rates") is None
+        assert index.check(OTHER, "https://b.com/frog") is None
+        assert index.check(MIRROR, "https://mirror.com/rates") == "https://a.com/rates"
+        # Seeing the same source again is not a duplicate
+        assert index.check(ARTICLE, "https://a.com/rates") is None
+        assert index.duplicate_ratio == 0.25
+
+
+class TestWorkflowDedup:
+    def _bind(self):
+        context = WorkflowContext(workflow_id="wf")
+        return context, bind_workflow_context(context)
+
+    def test_search_results_are_collapsed_and_counted(self):
+        results = [
+            {"url": "https://a.com/rates", "title": "Rates", "content": ARTICLE},
+            {"url": "https://mirror.com/rates", "title": "Rates", "content": MIRROR},
+            {"url": "https://b.com/frog", "title": "Frog", "content": OTHER},
+        ]
+        context, token = self._bind()
+        try:
+            deduped = dedup_search_results(results)
+        finally:
+            reset_workflow_context(token)
+
+        assert [r["url"] for r in deduped] == ["https://a.com/rates", "https://b.com/frog"]
+        assert deduped[0]["duplicates"] == ["https://mirror.com/rates"]
+        # Inputs (possibly cached) are left untouched
+        assert "duplicates" not in results[0]
+        assert context.get_metrics()["duplicate_ratio"] == round(1 / 3, 4)
+
+    def test_index_is_shared_between_search_and_crawl(self):
+        context, token = self._bind()
+        try:
+            dedup_search_results([{"url": "https://a.com/rates", "title": "", "content": ARTICLE}])
+            assert find_duplicate_article(MIRROR, "https://mirror.com/rates") == "https://a.com/rates"
+        finally:
+            reset_workflow_context(token)
+
+        assert context.get_metrics()["dedup_duplicates"] == 1
+
+    def test_outside_a_workflow_nothing_is_dropped(self):
+        results = [{"url": "https://a.com", "content": ARTICLE}, {"url": "https://b.com", "content": MIRROR}]
+        assert dedup_search_results(results) == results
+        assert find_duplicate_article(MIRROR, "https://b.com") is None
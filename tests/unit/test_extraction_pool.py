@@ -0,0 +1,111 @@
+"""
+Unit tests for the extraction process pool (src/crawler/extraction_pool.py).
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from tests.conftest import load_crawler_module
+
+pool_module = load_crawler_module("extraction_pool")
+readability_extractor = load_crawler_module("readability_extractor")
+
+
+def _sleep_and_return(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+@pytest.fixture
+def pool():
+    # Forked workers inherit the aliased modules; production uses spawn
+    pool = pool_module.ExtractionPool(max_workers=1, timeout=10, mp_context="fork")
+    yield pool
+    pool.shutdown()
+
+
+class TestExtractionPool:
+    def test_runs_tasks_in_worker_process(self, pool):
+        pool.warm()
+        assert pool.run(os.getpid) != os.getpid()
+        assert pool.get_stats()["running"] is True
+
+    def test_timeout_kills_the_worker(self, pool):
+        with pytest.raises(TimeoutError):
+            pool.run(time.sleep, 5, timeout=0.3)
+
+        assert pool.get_stats()["timeouts"] == 1
+        assert pool.get_stats()["restarts"] == 1
+        # A fresh worker serves the next task
+        assert pool.run(pow, 2, 10) == 1024
+
+    def test_timeout_leaves_other_workers_running(self):
+        pool = pool_module.ExtractionPool(max_workers=2, timeout=10, mp_context="fork")
+        try:
+            results = {}
+            slow = threading.Thread(target=lambda: results.update(slow=pool.run(_sleep_and_return, 1.0, "done")))
+            slow.start()
+            time.sleep(0.2)
+            with pytest.raises(TimeoutError):
+                pool.run(time.sleep, 5, timeout=0.3)
+            slow.join()
+
+            assert results == {"slow": "done"}
+            assert pool.get_stats()["timeouts"] == 1
+        finally:
+            pool.shutdown()
+
+    def test_time_waiting_for_a_worker_does_not_count(self, pool):
+        pool.warm()
+        busy = threading.Thread(target=pool.run, args=(time.sleep, 0.8))
+        busy.start()
+        time.sleep(0.1)
+        # Queued behind the busy worker for longer than its own timeout
+        assert pool.run(pow, 2, 10, timeout=0.5) == 1024
+        busy.join()
+        assert pool.get_stats()["timeouts"] == 0
+
+    def test_task_errors_are_raised_and_keep_the_worker(self, pool):
+        with pytest.raises(ZeroDivisionError):
+            pool.run(divmod, 1, 0)
+        assert pool.get_stats()["restarts"] == 0
+        assert pool.run(pow, 3, 2) == 9
+
+    def test_zero_workers_runs_inline(self):
+        pool = pool_module.ExtractionPool(max_workers=0)
+        assert pool.run(os.getpid) == os.getpid()
+        assert pool.get_stats()["inline"] == 1
+
+    def test_oversized_pages_are_truncated(self, monkeypatch):
+        pool = pool_module.ExtractionPool(max_workers=0, max_html_bytes=10)
+        seen = []
+        monkeypatch.setattr(
+            pool_module, "extract_article",
+            lambda html: seen.append(html) or {"title": "", "markdown": ""},
+        )
+
+        pool.extract("<p>" + "x" * 100 + "</p>")
+
+        assert seen == ["<p>xxxxxxx"]
+        assert pool.get_stats()["truncated"] == 1
+
+
+def test_truncate_html_keeps_characters_whole():
+    assert pool_module.truncate_html("你好世界", 7) == "你好"
+    assert pool_module.truncate_html("short", 100) == "short"
+    assert pool_module.truncate_html("anything", 0) == "anything"
+
+
+def test_readability_extractor_uses_pool_output(monkeypatch):
+    monkeypatch.setattr(
+        readability_extractor.extraction_pool, "extract",
+        lambda html: {"title": "Title", "markdown": "Body"},
+    )
+
+    article = readability_extractor.ReadabilityExtractor().extract("<html></html>", "https://a.com")
+
+    assert article.title == "Title"
+    assert article.to_markdown() == "# Title\n\nBody"
+    assert article.url == "https://a.com"
@@ -0,0 +1,96 @@
+"""
+Unit tests for background rendering of browser recordings (src/tools/history_renderer.py).
+"""
+import base64
+import io
+import os
+import time
+from types import SimpleNamespace
+
+from PIL import Image
+
+from tests.conftest import load_source
+
+# Importing `src.tools` pulls in every tool (and other unit tests stub it),
+# so load the module on its own.
+history_renderer = load_source("history_renderer_under_test", "src/tools/history_renderer.py")
+
+
+def _screenshot(color, size=(320, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def _frames(n):
+    colors = ["red", "green", "blue", "white"]
+    return [{"screenshot": _screenshot(colors[i % 4]), "caption": f"Step {i}"} for i in range(n)]
+
+
+class TestFormats:
+    def test_normalize(self):
+        normalize = history_renderer.normalize_history_format
+        assert normalize("WebP") == "webp"
+        assert normalize("none") == normalize(False) == "off"
+        assert normalize(True) == "gif"
+        assert normalize("mp4") is None and normalize(None) is None
+
+    def test_request_beats_user_setting_beats_default(self):
+        resolve = history_renderer.resolve_history_format
+        assert resolve("off", "webp") == "off"
+        assert resolve(None, "webp") == "webp"
+        assert resolve("bogus", None) == "gif"
+
+    def test_path_follows_format(self):
+        assert history_renderer.new_history_path("static/h", "webp").endswith(".webp")
+        assert history_renderer.new_history_path("static/h", "off") is None
+
+
+def test_select_frames_keeps_first_and_last():
+    frames = list(range(100))
+    selected = history_renderer.select_frames(frames, 5)
+    assert len(selected) == 5 and selected[0] == 0 and selected[-1] == 99
+    assert history_renderer.select_frames(frames[:3], 5) == [0, 1, 2]
+
+
+def test_render_history_writes_animations(tmp_path):
+    frames = _frames(3)
+    screenshots = [f["screenshot"] for f in frames]
+    captions = [f["caption"] for f in frames]
+    for fmt in ("gif", "webp"):
+        path = str(tmp_path / f"run.{fmt}")
+        history_renderer.render_history(screenshots, captions, path, fmt, 500, 160)
+        with Image.open(path) as image:
+            assert image.format == fmt.upper()
+            assert image.n_frames == 3
+            assert image.width == 160
+        assert not os.path.exists(path + ".tmp")
+
+
+def test_renderer_runs_in_the_background(tmp_path):
+    renderer = history_renderer.HistoryRenderer(max_workers=0, max_frames=2)
+    try:
+        path = str(tmp_path / "run.webp")
+        future = renderer.submit(_frames(4), path, "webp")
+        assert future.result(30) == path
+        with Image.open(path) as image:
+            assert image.n_frames == 2
+        assert renderer.submit([], str(tmp_path / "none.gif"), "gif") is None
+        # Done callbacks run right after the result is published
+        deadline = time.monotonic() + 5
+        while renderer.get_stats()["rendered"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = renderer.get_stats()
+        assert stats["rendered"] == 1 and stats["skipped"] == 1
+    finally:
+        renderer.shutdown()
+
+
+def test_history_frames_reads_agent_history():
+    step = SimpleNamespace(
+        state=SimpleNamespace(screenshot="abc"),
+        model_output=SimpleNamespace(current_state=SimpleNamespace(next_goal="Open the page")),
+    )
+    no_screenshot = SimpleNamespace(state=SimpleNamespace(screenshot=None), model_output=None)
+    history = SimpleNamespace(history=[step, no_screenshot])
+    assert history_renderer.history_frames(history) == [{"screenshot": "abc", "caption": "Open the page"}]
@@ -0,0 +1,116 @@
+"""
+Unit tests for image filtering in crawled articles (src/crawler/image_policy.py).
+"""
+import httpx
+
+from tests.conftest import load_crawler_module
+
+image_policy = load_crawler_module("image_policy")
+article_module = load_crawler_module("article")
+url_guard = load_crawler_module("url_guard")
+
+
+async def _resolve_public(host, port):
+    return ["93.184.216.34"]
+
+
+class TestIsDecorative:
+    def test_decorative_urls_and_alt_text(self):
+        assert image_policy.is_decorative("https://a.com/static/logo.png")
+        assert image_policy.is_decorative("https://a.com/img/social-icon-twitter.png")
+        assert image_policy.is_decorative("https://a.com/i/photo.png", alt="Author avatar")
+        assert image_policy.is_decorative("https://a.com/i/chart.svg")
+        assert image_policy.is_decorative("data:image/gif;base64,R0lGOD")
+
+    def test_declared_size(self):
+        assert image_policy.is_decorative("https://a.com/thumb-50x50.jpg")
+        assert image_policy.is_decorative("https://cdn.a.com/photo.jpg?w=64")
+        assert not image_policy.is_decorative("https://cdn.a.com/photo.jpg?w=1200")
+
+    def test_content_images_are_kept(self):
+        assert not image_policy.is_decorative("https://a.com/uploads/2024/chart.png", alt="GDP growth")
+
+
+class TestImagePolicy:
+    def test_dedups_and_caps(self):
+        policy = image_policy.ImagePolicy(max_images=2)
+        kept = policy.select([
+            ("https://a.com/logo.png", ""),
+            ("https://a.com/p/one.jpg?w=800", ""),
+            ("https://a.com/p/one.jpg?w=400", ""),
+            ("https://a.com/p/two.jpg", ""),
+            ("https://a.com/p/three.jpg", ""),
+        ])
+        assert kept == ["https://a.com/p/one.jpg?w=800", "https://a.com/p/two.jpg"]
+
+    def test_probe_drops_non_images_and_tiny_files(self, monkeypatch):
+        headers = {
+            "/tiny.png": {"Content-Type": "image/png", "Content-Length": "100"},
+            "/page.jpg": {"Content-Type": "text/html"},
+            "/photo.jpg": {"Content-Type": "image/jpeg", "Content-Length": "90000"},
+        }
+
+        def handler(request):
+            assert request.method == "HEAD"
+            return httpx.Response(200, headers=headers[request.url.path])
+
+        monkeypatch.setattr(
+            image_policy, "get_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(url_guard, "resolve_host", _resolve_public)
+        policy = image_policy.ImagePolicy(max_images=3, probe=True)
+
+        kept = policy.select([(f"https://a.com{path}", "") for path in headers])
+
+        assert kept == ["https://a.com/photo.jpg"]
+
+    def test_probe_never_reaches_private_addresses(self, monkeypatch):
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            if request.url.path == "/redirect.jpg":
+                return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data"})
+            return httpx.Response(200, headers={"Content-Type": "image/jpeg", "Content-Length": "90000"})
+
+        monkeypatch.setattr(
+            image_policy, "get_http_client",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(url_guard, "resolve_host", _resolve_public)
+        policy = image_policy.ImagePolicy(max_images=3, probe=True)
+
+        kept = policy.select([
+            ("http://127.0.0.1/admin.jpg", ""),
+            ("https://a.com/redirect.jpg", ""),
+            ("https://a.com/photo.jpg", ""),
+        ])
+
+        assert kept == ["https://a.com/photo.jpg"]
+        assert not any("127.0.0.1" in url or "169.254" in url for url in requested)
+
+
+class TestArticleToMessage:
+    def test_only_kept_images_become_parts(self):
+        markdown = (
+            "Intro ![logo](/logo.png) text\n\n"
+            "![Chart](/uploads/chart.png \"GDP\")\n\n"
+            "More ![Chart again](/uploads/chart.png) end"
+        )
+        article = article_module.Article("T", "", url="https://a.com/post", markdown=markdown)
+
+        content = article.to_message(markdown)
+
+        assert content == [
+            {"type": "text", "text": "Intro\n\ntext"},
+            {"type": "image_url", "image_url": {"url": "https://a.com/uploads/chart.png"}},
+            {"type": "text", "text": "More\n\nend"},
+        ]
+
+    def test_zero_budget_drops_all_images(self):
+        article = article_module.Article(
+            "T", "", url="https://a.com", markdown="a ![x](/p/photo.jpg) b"
+        )
+        content = article.to_message(policy=image_policy.ImagePolicy(max_images=0))
+        assert [part["type"] for part in content] == ["text"]
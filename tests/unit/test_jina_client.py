@@ -0,0 +1,95 @@
+"""
+Unit tests for the pooled, retrying Jina client (src/crawler/jina_client.py).
+"""
+import asyncio
+import time
+
+import httpx
+
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
+from tests.conftest import load_source
+
+# Other unit tests stub the `src.crawler` package, so load the module from its file.
+jina_client = load_source("jina_client_under_test", "src/crawler/jina_client.py")
+
+
+def install_transport(monkeypatch, responses):
+    """Serve `responses` (status codes or exceptions) in order; return the request log."""
+    requests = []
+    queue = list(responses)
+
+    def handler(request):
+        requests.append(request)
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return httpx.Response(item, text="<html>ok</html>" if item == 200 else "error")
+
+    monkeypatch.setattr(
+        jina_client, "get_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(jina_client, "backoff_delay", lambda attempt: 0)
+    return requests
+
+
+class TestRetries:
+    def test_retries_transient_failures(self, monkeypatch):
+        requests = install_transport(
+            monkeypatch, [503, httpx.ConnectError("reset"), 200]
+        )
+        client = jina_client.JinaClient({"jina_api_key": "jina-key"})
+
+        assert asyncio.run(client.aget_html("https://example.com")) == "<html>ok</html>"
+        assert len(requests) == 3
+        assert requests[0].headers["Authorization"] == "Bearer jina-key"
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        requests = install_transport(monkeypatch, [503, 503, 503, 503])
+        client = jina_client.JinaClient()
+        client.max_retries = 2
+
+        assert asyncio.run(client.aget_html("https://example.com")) is None
+        assert len(requests) == 3
+
+    def test_client_errors_are_not_retried(self, monkeypatch):
+        requests = install_transport(monkeypatch, [404, 200])
+        client = jina_client.JinaClient()
+
+        assert asyncio.run(client.aget_html("https://example.com")) is None
+        assert len(requests) == 1
+
+    def test_backoff_is_bounded(self):
+        for attempt in range(10):
+            assert 0 <= jina_client.backoff_delay(attempt) <= jina_client.RETRY_BACKOFF_MAX
+
+
+class TestDeadlines:
+    def test_expired_deadline_skips_request(self, monkeypatch):
+        requests = install_transport(monkeypatch, [200])
+        client = jina_client.JinaClient()
+
+        assert asyncio.run(
+            client.aget_html("https://example.com", deadline=time.monotonic() - 1)
+        ) is None
+        assert requests == []
+
+    def test_sync_shim_respects_workflow_budget(self, monkeypatch):
+        requests = install_transport(monkeypatch, [200, 200])
+        client = jina_client.JinaClient()
+
+        context = WorkflowContext(workflow_id="wf", deadline=time.monotonic() + 60)
+        token = bind_workflow_context(context)
+        try:
+            assert client.get_html("https://example.com") == "<html>ok</html>"
+            context.deadline = time.monotonic() - 1
+            assert client.get_html("https://example.com") is None
+        finally:
+            reset_workflow_context(token)
+
+        assert len(requests) == 1
+        assert context.get_metrics()["jina_requests"] == 1
@@ -234,3 +234,82 @@ class TestPlannerNodeValidJSON:
             cmd = planner_node(state)
 
             assert cmd.goto == "supervisor"
+
+
+# ---------------------------------------------------------------------------
+# Tests: speculative planning started by the coordinator
+# ---------------------------------------------------------------------------
+
+class TestSpeculativePlanning:
+    """The coordinator may start the planner early; the planner reuses that plan."""
+
+    @staticmethod
+    def _patched(llm):
+        """Patch the LLM for both nodes; the speculative planner runs in a thread."""
+        from contextlib import ExitStack
+
+        stack = ExitStack()
+        stack.enter_context(patch("src.graph.nodes.get_llm_by_type", return_value=llm))
+        stack.enter_context(patch("src.graph.nodes.AGENT_LLM_MAP", {"coordinator": "basic"}))
+        stack.enter_context(patch(
+            "src.graph.nodes.apply_prompt_template",
+            return_value=[HumanMessage(content="prompt")],
+        ))
+        return stack
+
+    def test_handoff_reuses_speculative_plan(self):
+        from langchain_core.messages import AIMessage
+        from src.graph.nodes import coordinator_node, planner_node
+        from src.graph.speculation import pop_speculation_report
+
+        plan = json.dumps({"steps": [{"agent_name": "coder", "title": "write code"}]})
+        llm = make_streaming_llm(plan)
+        llm.invoke.return_value = AIMessage(content="handoff_to_planner")
+        state = build_planner_state()
+        state.update(speculative_planning=True, workflow_id="wf-handoff")
+
+        with self._patched(llm):
+            cmd = coordinator_node(state)
+            assert cmd.goto == "planner"
+            cmd = planner_node(state)
+
+        assert json.loads(cmd.update["full_plan"]) == json.loads(plan)
+        # The planner LLM ran once, in the background
+        assert llm.stream.call_count == 1
+        report = pop_speculation_report("wf-handoff")
+        assert report["used"] == 1
+        assert report["cancelled"] == 0
+
+    def test_no_handoff_cancels_speculative_plan(self):
+        from langchain_core.messages import AIMessage
+        from src.graph.nodes import coordinator_node
+        from src.graph.speculation import pop_speculation_report
+
+        llm = make_streaming_llm(json.dumps({"steps": []}))
+        llm.invoke.return_value = AIMessage(content="Hello! How can I help?")
+        state = build_planner_state()
+        state.update(speculative_planning=True, workflow_id="wf-greeting")
+
+        with self._patched(llm):
+            cmd = coordinator_node(state)
+
+        assert cmd.goto == "__end__"
+        report = pop_speculation_report("wf-greeting")
+        assert report["cancelled"] == 1
+        assert report["used"] == 0
+
+    def test_disabled_by_default(self):
+        from langchain_core.messages import AIMessage
+        from src.graph.nodes import coordinator_node
+        from src.graph.speculation import pop_speculation_report
+
+        llm = make_streaming_llm(json.dumps({"steps": []}))
+        llm.invoke.return_value = AIMessage(content="handoff_to_planner")
+        state = build_planner_state()
+        state["workflow_id"] = "wf-off"
+
+        with self._patched(llm):
+            coordinator_node(state)
+
+        llm.stream.assert_not_called()
+        assert pop_speculation_report("wf-off") is None
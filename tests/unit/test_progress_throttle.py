@@ -0,0 +1,52 @@
+"""
+Unit tests for tool_progress rate limiting (src/service/progress_throttle.py).
+"""
+from src.service.progress_throttle import ToolProgressThrottle
+from tests.conftest import FakeClock
+
+
+def _throttle(**kwargs):
+    clock = FakeClock()
+    return ToolProgressThrottle(min_interval=0.5, clock=clock, **kwargs), clock
+
+
+class TestToolProgressThrottle:
+    def test_first_update_is_sent_immediately(self):
+        throttle, _ = _throttle()
+        assert throttle.feed("call-1", {"tool_name": "bash_tool", "text": "a\n"}) == {
+            "tool_name": "bash_tool", "text": "a\n"
+        }
+
+    def test_updates_within_interval_are_merged(self):
+        throttle, clock = _throttle()
+        throttle.feed("call-1", {"text": "a\n"})
+        clock.now = 0.1
+        assert throttle.feed("call-1", {"text": "b\n", "done": 1}) is None
+        clock.now = 0.2
+        assert throttle.feed("call-1", {"text": "c\n", "done": 2}) is None
+        clock.now = 0.6
+        assert throttle.feed("call-1", {"text": "d\n", "done": 3}) == {
+            "text": "b\nc\nd\n", "done": 3
+        }
+
+    def test_tool_calls_are_throttled_independently(self):
+        throttle, _ = _throttle()
+        assert throttle.feed("call-1", {"text": "a"}) is not None
+        assert throttle.feed("call-2", {"text": "b"}) is not None
+        assert throttle.feed("call-1", {"text": "c"}) is None
+
+    def test_flush_releases_held_back_text(self):
+        throttle, _ = _throttle()
+        throttle.feed("call-1", {"text": "a"})
+        throttle.feed("call-1", {"text": "b"})
+        assert throttle.flush("call-1") == {"text": "b"}
+        assert throttle.flush("call-1") is None
+        # A finished call leaves no state behind
+        assert throttle.feed("call-1", {"text": "c"}) == {"text": "c"}
+
+    def test_long_text_keeps_the_tail(self):
+        throttle, _ = _throttle(max_chars=5)
+        throttle.feed("call-1", {"text": "x"})
+        throttle.feed("call-1", {"text": "0123"})
+        throttle.feed("call-1", {"text": "456789"})
+        assert throttle.flush("call-1") == {"text": "56789", "truncated": True}
@@ -0,0 +1,124 @@
+"""
+Unit tests for the per-session Python sandbox pool (src/utils/python_sandbox.py).
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils.python_sandbox import PythonSandboxPool, session_key
+
+
+@pytest.fixture
+def pool():
+    pool = PythonSandboxPool(max_workers=2, spares=0, timeout=10, memory_mb=0)
+    yield pool
+    pool.shutdown()
+
+
+class TestPythonSandbox:
+    def test_sessions_keep_state_and_are_isolated(self, pool):
+        assert pool.run("thread-a", "x = 41").ok
+        assert pool.run("thread-a", "print(x + 1)").output == "42\n"
+
+        other = pool.run("thread-b", "print(x)")
+        assert not other.ok
+        assert "NameError" in other.error
+
+    def test_code_runs_outside_the_server_process(self, pool):
+        result = pool.run("thread-a", "import os; print(os.getpid())")
+        assert int(result.output) != os.getpid()
+
+    def test_errors_keep_captured_output(self, pool):
+        result = pool.run("thread-a", "print('before'); 1 / 0")
+        assert result.output == "before\n"
+        assert "ZeroDivisionError" in result.error
+
+    def test_timeout_kills_worker_and_resets_session(self, pool):
+        pool.run("thread-a", "x = 1")
+        result = pool.run("thread-a", "while True: pass", timeout=0.5)
+
+        assert "TimeoutError" in result.error
+        assert "NameError" in pool.run("thread-a", "print(x)").error
+        assert pool.get_stats()["timeouts"] == 1
+
+    def test_least_recently_used_session_is_evicted_at_capacity(self, pool):
+        pool.run("thread-a", "x = 'a'")
+        pool.run("thread-b", "x = 'b'")
+        pool.run("thread-c", "x = 'c'")
+
+        assert pool.get_stats()["active_sessions"] == 2
+        assert pool.run("thread-b", "print(x)").output == "b\n"
+        assert "NameError" in pool.run("thread-a", "print(x)").error
+
+    def test_idle_sessions_are_evicted(self, pool):
+        pool.idle_ttl = 0
+        pool.run("thread-a", "x = 1")
+        pool.run("thread-b", "y = 2")
+
+        assert pool.get_stats()["evictions"] >= 1
+        assert "NameError" in pool.run("thread-a", "print(x)").error
+
+    def test_output_is_streamed_while_running(self, pool):
+        received = []
+        result = pool.run(
+            "thread-a",
+            "import time\nprint('first', flush=True)\ntime.sleep(1)\nprint('second')",
+            on_output=received.append,
+        )
+        assert result.output == "first\nsecond\n"
+        # The first line arrives before the code finished sleeping
+        assert received[0] == "first\n"
+        assert "".join(received) in ("first\n", "first\nsecond\n")
+
+    def test_cancel_event_stops_running_code(self, pool):
+        pool.run("thread-a", "x = 1")
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        started = time.monotonic()
+        result = pool.run("thread-a", "while True: pass", cancel_event=cancel_event)
+
+        assert "Cancelled" in result.error
+        assert time.monotonic() - started < 2
+        assert "NameError" in pool.run("thread-a", "print(x)").error
+        assert pool.get_stats()["cancellations"] == 1
+
+    def test_same_thread_id_of_different_users_gets_separate_sessions(self, pool):
+        alice = session_key(1, "shared-thread", "wf-1")
+        bob = session_key(2, "shared-thread", "wf-2")
+        assert alice != bob
+        # Anonymous workflows never share a session through a thread_id
+        assert session_key(None, "shared-thread", "wf-3") != session_key(None, "shared-thread", "wf-4")
+        assert session_key(1, "shared-thread", "wf-5") == alice
+
+        pool.run(alice, "secret = 'alice-token'")
+        assert "NameError" in pool.run(bob, "print(secret)").error
+        assert pool.run(alice, "print(secret)").output.strip() == "alice-token"
+
+    def test_acquired_worker_is_not_evicted_before_it_runs(self, pool, monkeypatch):
+        pool.run("thread-a", "x = 1")
+        acquired, proceed = threading.Event(), threading.Event()
+        acquire = pool._acquire
+
+        def slow_acquire(session_id):
+            worker = acquire(session_id)
+            if session_id == "thread-a":
+                # Another call gets the pool lock before this one locks its worker
+                acquired.set()
+                proceed.wait(5)
+            return worker
+
+        monkeypatch.setattr(pool, "_acquire", slow_acquire)
+        results = []
+        caller = threading.Thread(target=lambda: results.append(pool.run("thread-a", "print(x)")))
+        caller.start()
+        assert acquired.wait(5)
+        pool.idle_ttl = 0
+        # Idle eviction and, at capacity, LRU eviction may only pick thread-b
+        assert pool.run("thread-b", "y = 2").ok
+        assert pool.run("thread-c", "z = 3").ok
+        proceed.set()
+        caller.join(5)
+
+        assert results[0].output == "1\n"
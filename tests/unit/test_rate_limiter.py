@@ -0,0 +1,161 @@
+"""
+Unit tests for the client-side LLM rate limiter (src/llms/rate_limiter.py).
+"""
+import asyncio
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from tests.conftest import FakeClock, load_source
+
+# Load the module straight from its file: other unit tests stub the `src.llms`
+# package with MagicMock, which would shadow a regular import.
+rate_limiter = load_source("rate_limiter_under_test", "src/llms/rate_limiter.py")
+
+
+class TestTokenBucket:
+    def test_consume_and_refill(self):
+        clock = FakeClock()
+        bucket = rate_limiter.TokenBucket(capacity=60, refill_per_second=1, clock=clock)
+
+        assert bucket.time_until_available(60) == 0
+        bucket.consume(60)
+        assert bucket.time_until_available(10) == pytest.approx(10)
+
+        clock.advance(10)
+        assert bucket.time_until_available(10) == 0
+
+    def test_refill_never_exceeds_capacity(self):
+        clock = FakeClock()
+        bucket = rate_limiter.TokenBucket(capacity=5, refill_per_second=1, clock=clock)
+        clock.advance(1000)
+        assert bucket.tokens == 5
+
+    def test_adjust_can_go_into_debt(self):
+        clock = FakeClock()
+        bucket = rate_limiter.TokenBucket(capacity=100, refill_per_second=10, clock=clock)
+        bucket.consume(100)
+        bucket.adjust(50)
+        assert bucket.tokens == pytest.approx(-50)
+        assert bucket.time_until_available(10) == pytest.approx(6)
+
+
+class TestProviderRateLimiter:
+    def test_requests_per_minute_budget(self):
+        clock = FakeClock()
+        limiter = rate_limiter.ProviderRateLimiter(
+            "test", requests_per_minute=2, clock=clock
+        )
+
+        assert limiter.acquire(blocking=False) is True
+        assert limiter.acquire(blocking=False) is True
+        assert limiter.acquire(blocking=False) is False
+
+        clock.advance(30)
+        assert limiter.acquire(blocking=False) is True
+
+    def test_tokens_per_minute_reconciled_with_usage(self):
+        clock = FakeClock()
+        limiter = rate_limiter.ProviderRateLimiter(
+            "test",
+            tokens_per_minute=6000,
+            estimated_tokens_per_request=1000,
+            clock=clock,
+        )
+        assert limiter.acquire(blocking=False) is True
+        # The call actually used 6000 tokens: the bucket is now empty.
+        limiter.record_usage(6000)
+        assert limiter.acquire(blocking=False) is False
+        assert limiter.get_stats()["reported_tokens"] == 6000
+
+    def test_non_blocking_failure_leaves_queue(self):
+        clock = FakeClock()
+        limiter = rate_limiter.ProviderRateLimiter(
+            "test", requests_per_minute=1, clock=clock
+        )
+        limiter.acquire(blocking=False)
+        assert limiter.acquire(blocking=False) is False
+        assert limiter.get_stats()["queue_depth"] == 0
+
+    def test_blocking_waiters_are_served_in_arrival_order(self):
+        limiter = rate_limiter.ProviderRateLimiter(
+            "test", requests_per_minute=600, poll_interval=0.01
+        )
+        # Drain the bucket so every waiter has to queue.
+        while limiter.acquire(blocking=False):
+            pass
+
+        order = []
+        started = []
+
+        def worker(index):
+            started.append(index)
+            limiter.acquire()
+            order.append(index)
+
+        threads = []
+        for index in range(3):
+            thread = threading.Thread(target=worker, args=(index,))
+            thread.start()
+            threads.append(thread)
+            # Make arrival order deterministic.
+            while len(started) <= index:
+                pass
+            threading.Event().wait(0.02)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert order == [0, 1, 2]
+        stats = limiter.get_stats()
+        assert stats["waited"] >= 3
+        assert stats["max_wait_seconds"] > 0
+
+    def test_async_acquire(self):
+        limiter = rate_limiter.ProviderRateLimiter("test", requests_per_minute=600)
+        assert asyncio.run(limiter.aacquire()) is True
+        assert limiter.get_stats()["acquired"] == 1
+
+
+class TestUsageHandler:
+    def test_reads_total_tokens_from_llm_output(self):
+        limiter = rate_limiter.ProviderRateLimiter("test", tokens_per_minute=10000)
+        handler = rate_limiter.RateLimitUsageHandler(limiter)
+        handler.on_llm_end(
+            LLMResult(generations=[], llm_output={"token_usage": {"total_tokens": 321}})
+        )
+        assert limiter.get_stats()["reported_tokens"] == 321
+
+    def test_reads_usage_metadata_from_message(self):
+        limiter = rate_limiter.ProviderRateLimiter("test", tokens_per_minute=10000)
+        handler = rate_limiter.RateLimitUsageHandler(limiter)
+        message = AIMessage(
+            content="hi",
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+        handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+        assert limiter.get_stats()["reported_tokens"] == 15
+
+
+class TestRegistry:
+    def test_disabled_without_budgets(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "LLM_REQUESTS_PER_MINUTE", 0)
+        monkeypatch.setattr(rate_limiter, "LLM_TOKENS_PER_MINUTE", 0)
+        assert rate_limiter.get_rate_limiter("openai", "sk-1") is None
+        assert rate_limiter.rate_limit_kwargs("openai", "sk-1") == {}
+
+    def test_shared_per_provider_and_key(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter, "LLM_REQUESTS_PER_MINUTE", 100)
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+        first = rate_limiter.get_rate_limiter("openai", "sk-1")
+        assert rate_limiter.get_rate_limiter("openai", "sk-1") is first
+        assert rate_limiter.get_rate_limiter("openai", "sk-2") is not first
+        assert rate_limiter.get_rate_limiter("deepseek", "sk-1") is not first
+        # The raw key never shows up in limiter names or stats.
+        assert all("sk-1" not in s["name"] for s in rate_limiter.get_rate_limiter_stats())
+
+        kwargs = rate_limiter.rate_limit_kwargs("openai", "sk-1")
+        assert kwargs["rate_limiter"] is first
+        assert isinstance(kwargs["callbacks"][0], rate_limiter.RateLimitUsageHandler)
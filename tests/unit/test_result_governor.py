@@ -0,0 +1,112 @@
+"""
+Unit tests for tool result budgets (src/utils/result_governor.py) and the
+artifact store behind them (src/utils/artifact_store.py).
+"""
+import json
+import os
+import re
+
+import pytest
+
+from src.utils.artifact_store import ArtifactStore
+from src.utils.result_governor import (
+    ResultBudget,
+    ResultGovernor,
+    parse_token_budgets,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "artifacts"))
+
+
+@pytest.fixture
+def governor(store):
+    return ResultGovernor(
+        store, ResultBudget(max_tokens=100, max_bytes=10_000), token_budgets={"big_tool": 1000, "free_tool": 0}
+    )
+
+
+def _artifact(text):
+    artifact_id, offset = re.search(r'read_artifact\(artifact_id="([^"]+)", offset=(\d+)\)', text).groups()
+    return artifact_id, int(offset)
+
+
+class TestResultGovernor:
+    def test_small_results_pass_through(self, governor):
+        result = [{"url": "u", "content": "short"}]
+        assert governor.govern("search", result, "wf-1") is result
+        assert governor.govern("search", "short text", "wf-1") == "short text"
+
+    def test_long_text_keeps_head_tail_and_reference(self, governor, store):
+        text = "".join(f"line {i:04d}\n" for i in range(500))
+        cut = governor.govern("bash_tool", text, "wf-1")
+
+        assert len(cut) < 1000
+        assert cut.startswith("line 0000\n")
+        assert cut.endswith("line 0499\n")
+        artifact_id, offset = _artifact(cut)
+        assert store.read("wf-1", artifact_id) == text
+        # The offset points right after the kept head
+        assert cut.startswith(text[:offset] + "\n\n[...")
+        # Artifacts are scoped to their workflow
+        assert store.read("wf-2", artifact_id) is None
+
+    def test_per_tool_budgets(self, governor):
+        text = "word " * 1000
+        assert len(governor.govern("big_tool", text, "wf-1")) < len(text)
+        assert len(governor.govern("big_tool", text, "wf-1")) > 3000
+        assert governor.govern("free_tool", text, "wf-1") is text
+
+    def test_json_results_stay_parseable(self, governor):
+        result = json.dumps({"result_content": "x" * 5000, "generated_gif_path": "static/a.gif"})
+        parsed = json.loads(governor.govern("browser", result, "wf-1"))
+        assert parsed["generated_gif_path"] == "static/a.gif"
+        assert len(parsed["result_content"]) < 1000
+
+    def test_message_parts_are_cut_in_proportion(self, governor):
+        message = {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "## Source: https://a.example"},
+                {"type": "text", "text": "a" * 3000},
+                {"type": "image_url", "image_url": {"url": "https://a.example/x.png"}},
+                {"type": "text", "text": "b" * 1000},
+            ],
+        }
+        cut = governor.govern("crawl_many", message, "wf-1")
+        parts = cut["content"]
+        assert parts[0]["text"] == "## Source: https://a.example"
+        assert parts[2] == message["content"][2]
+        kept_a = parts[1]["text"].count("a")
+        kept_b = parts[3]["text"].count("b")
+        assert 0 < kept_b < kept_a < 3000
+        # The input is not modified
+        assert message["content"][1]["text"] == "a" * 3000
+
+    def test_disabled_governor_is_a_no_op(self, store):
+        governor = ResultGovernor(store, ResultBudget(10, 100), enabled=False)
+        assert governor.govern("bash_tool", "x" * 1000) == "x" * 1000
+
+
+def test_parse_token_budgets():
+    assert parse_token_budgets("crawl_many=12000, bash_tool=2000,bad,") == {
+        "crawl_many": 12000, "bash_tool": 2000
+    }
+
+
+def test_artifact_store_prunes_expired_then_oldest(tmp_path):
+    now = [1_000_000.0]
+    store = ArtifactStore(str(tmp_path), max_bytes=2500, ttl=100, clock=lambda: now[0])
+    ids = [store.put("wf-1", "tool", str(i) * 1000) for i in range(3)]
+    paths = [os.path.join(tmp_path, "wf-1", f"{i}.txt") for i in ids]
+    for age, path in zip((500, 50, 10), paths):
+        os.utime(path, (now[0] - age, now[0] - age))
+
+    assert store.prune() == 1
+    assert [os.path.exists(p) for p in paths] == [False, True, True]
+
+    store.max_bytes = 1500
+    assert store.prune() == 1
+    assert [os.path.exists(p) for p in paths] == [False, False, True]
@@ -0,0 +1,114 @@
+"""
+Unit tests for the search result cache (src/tools/search_cache.py).
+"""
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
+from tests.conftest import FakeClock, load_source
+
+# Other unit tests stub the `src.tools` package, so load the module from its file.
+search_cache = load_source("search_cache_under_test", "src/tools/search_cache.py")
+
+RESULTS = [{"title": "Python", "url": "https://python.org", "content": "..."}]
+
+
+class CountingFetch:
+    def __init__(self, result=RESULTS):
+        self.calls = 0
+        self.result = result
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+class TestCacheKey:
+    def test_normalizes_case_and_whitespace(self):
+        assert search_cache.make_cache_key("  Python   Tutorial ", 5) == \
+            search_cache.make_cache_key("python tutorial", 5)
+
+    def test_max_results_is_part_of_key(self):
+        assert search_cache.make_cache_key("python", 5) != \
+            search_cache.make_cache_key("python", 10)
+
+
+class TestSearchCache:
+    def test_ttl_expiry(self):
+        clock = FakeClock(1_000_000.0)
+        cache = search_cache.SearchCache(ttl=60, clock=clock)
+        cache.set("k", RESULTS)
+        assert cache.get("k") == RESULTS
+
+        clock.now += 61
+        assert cache.get("k") is None
+        stats = cache.get_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        cache = search_cache.SearchCache(ttl=60, max_size=2)
+        cache.set("a", [1])
+        cache.set("b", [2])
+        cache.get("a")
+        cache.set("c", [3])
+        assert cache.get("b") is None
+        assert cache.get("a") == [1]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        db_path = str(tmp_path / "search_cache.db")
+        search_cache.SearchCache(ttl=60, db_path=db_path).set("k", RESULTS)
+
+        fresh = search_cache.SearchCache(ttl=60, db_path=db_path)
+        assert fresh.get("k") == RESULTS
+        assert fresh.get_stats()["disk_hits"] == 1
+        # Promoted into memory
+        assert fresh.get("k") == RESULTS
+        assert fresh.get_stats()["memory_hits"] == 1
+
+    def test_disabled_with_zero_ttl(self):
+        cache = search_cache.SearchCache(ttl=0)
+        cache.set("k", RESULTS)
+        assert cache.get("k") is None
+
+
+class TestCachedSearch:
+    def test_shared_cache_skips_api_call(self):
+        cache = search_cache.SearchCache(ttl=60)
+        fetch = CountingFetch()
+        assert search_cache.cached_search("python", 5, fetch, cache) == RESULTS
+        assert search_cache.cached_search("Python ", 5, fetch, cache) == RESULTS
+        assert fetch.calls == 1
+
+    def test_errors_are_not_cached(self):
+        cache = search_cache.SearchCache(ttl=60)
+        fetch = CountingFetch(result="Failed to search")
+        search_cache.cached_search("python", 5, fetch, cache)
+        search_cache.cached_search("python", 5, fetch, cache)
+        assert fetch.calls == 2
+
+    def test_workflow_memo_and_metrics(self):
+        # Shared tier disabled: only the in-workflow memo can dedup
+        cache = search_cache.SearchCache(ttl=0)
+        fetch = CountingFetch()
+        context = WorkflowContext(workflow_id="wf-1")
+        token = bind_workflow_context(context)
+        try:
+            search_cache.cached_search("python", 5, fetch, cache)
+            search_cache.cached_search("python", 5, fetch, cache)
+        finally:
+            reset_workflow_context(token)
+
+        assert fetch.calls == 1
+        assert context.get_metrics() == {
+            "search_requests": 2,
+            "search_api_calls": 1,
+            "search_memo_hits": 1,
+        }
+        assert cache.get_stats()["memo_hits"] == 1
+
+        # A new workflow starts with an empty memo
+        search_cache.cached_search("python", 5, fetch, cache)
+        assert fetch.calls == 2
@@ -0,0 +1,149 @@
+"""
+Unit tests for the multi-query search path: BM25 ranking and URL dedup
+(src/utils/ranking.py), the background loop and the pooled Tavily client.
+"""
+import asyncio
+import contextvars
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.utils.background_loop import BackgroundLoop
+from src.utils.ranking import bm25_scores, merge_search_results, normalize_url
+from tests.conftest import load_source
+
+# Other unit tests stub the `src.tools` package, so load the module from its file.
+tavily_client = load_source("tavily_client_under_test", "src/tools/tavily_client.py")
+
+
+def result(url, title="", content="", score=0.5):
+    return {"url": url, "title": title, "content": content, "score": score}
+
+
+class TestBM25:
+    def test_relevant_document_scores_higher(self):
+        scores = bm25_scores(
+            "python asyncio tutorial",
+            ["A tutorial on python asyncio", "Cooking pasta at home", ""],
+        )
+        assert scores[0] > scores[1] == scores[2] == 0
+
+    def test_cjk_text_is_tokenized_per_character(self):
+        scores = bm25_scores("天气预报", ["北京天气预报", "股票行情"])
+        assert scores[0] > scores[1]
+
+    def test_empty_inputs(self):
+        assert len(bm25_scores("query", [])) == 0
+        assert list(bm25_scores("", ["doc"])) == [0]
+
+
+class TestMergeSearchResults:
+    def test_dedups_by_normalized_url(self):
+        merged = merge_search_results(
+            ["python asyncio", "asyncio guide"],
+            [
+                [result("https://Docs.python.org/asyncio/", "asyncio", "short", 0.4)],
+                [result("https://docs.python.org/asyncio#top", "asyncio", "a longer snippet", 0.9)],
+            ],
+        )
+        assert len(merged) == 1
+        assert merged[0]["queries"] == ["python asyncio", "asyncio guide"]
+        assert merged[0]["content"] == "a longer snippet"
+        assert merged[0]["score"] == 0.9
+
+    def test_ranks_by_relevance_and_limits(self):
+        merged = merge_search_results(
+            ["rust borrow checker"],
+            [[
+                result("https://a.com", "Gardening tips", "roses"),
+                result("https://b.com", "Rust borrow checker explained", "borrow checker rules"),
+                result("https://c.com", "Rust language", "systems programming"),
+            ]],
+            limit=2,
+        )
+        assert [r["url"] for r in merged] == ["https://b.com", "https://c.com"]
+
+    def test_normalize_url(self):
+        assert normalize_url("HTTPS://Example.com/a/?q=1#frag") == "https://example.com/a?q=1"
+
+
+class TestBackgroundLoop:
+    def test_runs_coroutines_from_sync_code(self):
+        loop = BackgroundLoop("test-loop")
+
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        assert loop.run(add(1, 2), timeout=5) == 3
+        # The same loop is reused
+        first = loop.loop
+        assert loop.run(add(2, 2), timeout=5) == 4
+        assert loop.loop is first
+
+    def test_timeout_cancels(self):
+        loop = BackgroundLoop("test-loop-timeout")
+        with pytest.raises(TimeoutError):
+            loop.run(asyncio.sleep(10), timeout=0.05)
+
+    def test_submitted_coroutines_see_the_callers_context(self):
+        loop = BackgroundLoop("test-loop-context")
+        request_id = contextvars.ContextVar("request_id", default=None)
+
+        async def read():
+            return request_id.get()
+
+        token = request_id.set("req-1")
+        try:
+            assert loop.submit(read()).result(5) == "req-1"
+        finally:
+            request_id.reset(token)
+
+    def test_cancelling_the_future_cancels_the_task(self):
+        loop = BackgroundLoop("test-loop-cancel")
+        cancelled = threading.Event()
+
+        async def wait():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        future = loop.submit(wait())
+        time.sleep(0.05)
+        future.cancel()
+        assert cancelled.wait(5)
+
+
+class TestAsyncTavilyClient:
+    def _client(self, handler):
+        client = tavily_client.AsyncTavilyClient()
+        client._client = httpx.AsyncClient(
+            base_url="https://api.tavily.com", transport=httpx.MockTransport(handler)
+        )
+        return client
+
+    def test_search_many_reuses_one_client_and_keeps_order(self):
+        seen = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            seen.append(body["query"])
+            if body["query"] == "broken":
+                return httpx.Response(500)
+            return httpx.Response(200, json={"results": [
+                {"title": body["query"], "url": f"https://{body['query']}.com",
+                 "content": "c", "score": 0.1, "raw_content": None},
+            ]})
+
+        client = self._client(handler)
+        results = asyncio.run(client.search_many(["one", "broken", "two"], "key", 3))
+
+        assert sorted(seen) == ["broken", "one", "two"]
+        assert results[0] == [{"title": "one", "url": "https://one.com", "content": "c", "score": 0.1}]
+        assert isinstance(results[1], httpx.HTTPStatusError)
+        assert results[2][0]["url"] == "https://two.com"
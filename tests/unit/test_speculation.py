@@ -0,0 +1,112 @@
+"""
+Unit tests for speculative execution (src/graph/speculation.py).
+"""
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from tests.conftest import load_source
+
+# Importing the src.graph package would build the whole graph; load the file directly.
+speculation = load_source("speculation_under_test", "src/graph/speculation.py")
+
+
+def blocking_work(release: threading.Event):
+    """Work that runs until released or cancelled."""
+
+    def work(cancel_event, callbacks):
+        while not release.wait(0.01):
+            if cancel_event.is_set():
+                raise speculation.SpeculationCancelled()
+        return "plan"
+
+    return work
+
+
+class TestSpeculativeTask:
+    def test_result_is_returned(self):
+        task = speculation.SpeculativeTask("planner", lambda cancel, cbs: "plan").start()
+        assert task.result(timeout=5) == "plan"
+        assert task.done
+
+    def test_error_is_reraised(self):
+        def broken(cancel, cbs):
+            raise ValueError("boom")
+
+        task = speculation.SpeculativeTask("planner", broken).start()
+        with pytest.raises(ValueError):
+            task.result(timeout=5)
+
+    def test_cancel_stops_work(self):
+        task = speculation.SpeculativeTask("planner", blocking_work(threading.Event())).start()
+        task.cancel()
+        with pytest.raises(speculation.SpeculationCancelled):
+            task.result(timeout=5)
+
+    def test_runs_without_callers_context(self):
+        import contextvars
+
+        marker = contextvars.ContextVar("marker", default=None)
+        marker.set("coordinator")
+        task = speculation.SpeculativeTask("planner", lambda cancel, cbs: marker.get()).start()
+        assert task.result(timeout=5) is None
+
+
+class TestTokenUsageCounter:
+    def test_counts_usage_metadata(self):
+        counter = speculation.TokenUsageCounter()
+        message = AIMessage(
+            content="x",
+            usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10},
+        )
+        counter.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+        counter.on_llm_end(LLMResult(generations=[], llm_output={"token_usage": {"total_tokens": 5}}))
+        assert counter.llm_calls == 2
+        assert counter.total_tokens == 15
+
+
+class TestWorkflowRegistry:
+    def test_used_speculation_reports_saved_latency(self):
+        task = speculation.start_speculation("wf-used", "planner", lambda cancel, cbs: "plan")
+        assert speculation.take_speculation("wf-used") is task
+        assert task.result(timeout=5) == "plan"
+        speculation.record_speculation_used("wf-used", task, waited=0.0)
+
+        report = speculation.pop_speculation_report("wf-used")
+        assert report["started"] == 1
+        assert report["used"] == 1
+        assert report["cancelled"] == 0
+        assert report["latency_saved_seconds"] >= 0
+        assert speculation.pop_speculation_report("wf-used") is None
+
+    def test_cancelled_speculation_is_wasted(self):
+        release = threading.Event()
+        task = speculation.start_speculation("wf-cancel", "planner", blocking_work(release))
+        speculation.cancel_speculation("wf-cancel")
+
+        assert task.cancel_event.is_set()
+        assert speculation.take_speculation("wf-cancel") is None
+        report = speculation.pop_speculation_report("wf-cancel")
+        assert report["cancelled"] == 1
+        assert report["used"] == 0
+        release.set()
+
+    def test_pop_report_cancels_unclaimed_task(self):
+        task = speculation.start_speculation("wf-left", "planner", blocking_work(threading.Event()))
+        report = speculation.pop_speculation_report("wf-left")
+        assert task.cancel_event.is_set()
+        assert report["cancelled"] == 1
+
+    def test_discard_forgets_the_report_of_an_aborted_workflow(self):
+        task = speculation.start_speculation("wf-aborted", "planner", blocking_work(threading.Event()))
+        speculation.discard_speculation("wf-aborted")
+
+        assert task.cancel_event.is_set()
+        assert "wf-aborted" not in speculation._reports
+        speculation.discard_speculation(None)
+
+    def test_missing_workflow_id_is_ignored(self):
+        assert speculation.take_speculation(None) is None
+        speculation.cancel_speculation(None)
@@ -0,0 +1,97 @@
+"""
+Unit tests for async shell execution (src/utils/subprocess_runner.py) and
+tool progress events (src/utils/tool_progress.py).
+"""
+import asyncio
+import os
+import threading
+import time
+
+from langchain_core.tools import tool
+
+from src.utils.subprocess_runner import HeadTailBuffer, run_command
+from src.utils.tool_progress import TOOL_PROGRESS_EVENT, publish_tool_progress
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Reaped zombies no longer exist; unreaped ones are as good as dead
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split()[2] != "Z"
+
+
+class TestHeadTailBuffer:
+    def test_small_output_is_kept_whole(self):
+        buffer = HeadTailBuffer(max_bytes=100)
+        buffer.write(b"hello ")
+        buffer.write(b"world")
+        assert buffer.getvalue() == "hello world"
+
+    def test_keeps_head_and_tail(self):
+        buffer = HeadTailBuffer(max_bytes=10)
+        for i in range(100):
+            buffer.write(f"{i:03d}\n".encode())
+        value = buffer.getvalue()
+        assert value.startswith("000\n0")
+        assert value.endswith("\n099\n")
+        assert "[390 bytes omitted]" in value
+
+
+class TestRunCommand:
+    def test_captures_output_and_exit_code(self):
+        streamed = []
+        result = asyncio.run(run_command(
+            "echo out; echo err >&2; exit 3", timeout=10,
+            on_output=lambda stream, text: streamed.append((stream, text)),
+        ))
+        assert result.returncode == 3
+        assert result.stdout == "out\n"
+        assert result.stderr == "err\n"
+        assert ("stdout", "out\n") in streamed
+
+    def test_output_is_capped(self):
+        result = asyncio.run(run_command("seq 1 100000", timeout=10, max_output_bytes=1000))
+        assert result.stdout.startswith("1\n2\n")
+        assert result.stdout.endswith("99999\n100000\n")
+        assert "bytes omitted" in result.stdout
+
+    def test_timeout_kills_process_group(self, tmp_path):
+        pid_file = tmp_path / "pid"
+        started = time.monotonic()
+        result = asyncio.run(run_command(
+            f"sleep 30 & echo $! > {pid_file}; wait", timeout=0.5,
+        ))
+        assert result.timed_out and result.returncode is None
+        assert time.monotonic() - started < 5
+        assert not _alive(int(pid_file.read_text()))
+
+    def test_cancel_event_stops_command(self):
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        result = asyncio.run(run_command("sleep 30", timeout=30, cancel_event=cancel_event))
+        assert result.cancelled
+        assert result.duration < 5
+
+
+def test_progress_is_attached_to_the_tool_run():
+    @tool
+    def slow_tool(x: str) -> str:
+        """Test tool."""
+        publish_tool_progress("slow_tool", "halfway")
+        publish_tool_progress("slow_tool", "")
+        return x
+
+    async def collect():
+        return [event async for event in slow_tool.astream_events({"x": "a"}, version="v2")]
+
+    events = asyncio.run(collect())
+    progress = [e for e in events if e["event"] == "on_custom_event"]
+    assert [(e["name"], e["data"]) for e in progress] == [
+        (TOOL_PROGRESS_EVENT, {"tool_name": "slow_tool", "text": "halfway"})
+    ]
+    assert progress[0]["run_id"] == events[0]["run_id"]
+    # Outside a run publishing is a no-op
+    publish_tool_progress("slow_tool", "ignored")
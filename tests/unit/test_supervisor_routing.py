@@ -0,0 +1,151 @@
+"""
+Unit tests for the supervisor pre-router rules (src/graph/routing.py).
+"""
+import json
+
+from langchain_core.messages import HumanMessage
+
+from tests.conftest import load_source
+
+# Load the module straight from its file to avoid importing the whole graph.
+routing = load_source("routing_under_test", "src/graph/routing.py")
+
+TEAM_MEMBERS = ["researcher", "coder", "browser", "reporter"]
+
+
+def make_plan(*agents):
+    return json.dumps(
+        {
+            "thought": "t",
+            "title": "plan",
+            "steps": [
+                {"agent_name": agent, "title": f"step {i}", "description": "d"}
+                for i, agent in enumerate(agents)
+            ],
+        }
+    )
+
+
+def build_state(messages, plan="", next_agent=""):
+    return {
+        "messages": messages,
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "full_plan": plan,
+        "next": next_agent,
+    }
+
+
+def agent_message(name, content="done"):
+    return HumanMessage(content=content, name=name)
+
+
+class TestFinishAfterReporter:
+    def test_reporter_answer_finishes(self):
+        state = build_state([HumanMessage(content="q"), agent_message("reporter", "# Report")])
+        assert routing.finish_after_reporter(state) == "FINISH"
+
+    def test_other_agent_does_not_finish(self):
+        state = build_state([agent_message("researcher")])
+        assert routing.finish_after_reporter(state) is None
+
+    def test_failed_reporter_defers(self):
+        state = build_state([agent_message("reporter", "")])
+        assert routing.finish_after_reporter(state) is None
+
+
+class TestAdvancePlannedStep:
+    def test_fresh_plan_starts_with_first_step(self):
+        plan = make_plan("researcher", "coder", "reporter")
+        state = build_state([HumanMessage(content="q"), agent_message("planner", plan)], plan)
+        assert routing.advance_planned_step(state) == "researcher"
+
+    def test_success_advances_to_next_step(self):
+        plan = make_plan("researcher", "coder", "reporter")
+        messages = [
+            HumanMessage(content="q"),
+            agent_message("planner", plan),
+            agent_message("researcher", "found it"),
+        ]
+        assert routing.advance_planned_step(build_state(messages, plan)) == "coder"
+
+        messages.append(agent_message("coder", "computed"))
+        assert routing.advance_planned_step(build_state(messages, plan)) == "reporter"
+
+    def test_failed_step_defers_to_llm(self):
+        plan = make_plan("researcher", "reporter")
+        messages = [
+            agent_message("planner", plan),
+            agent_message("researcher", "Failed to crawl. Error: timeout"),
+        ]
+        assert routing.advance_planned_step(build_state(messages, plan)) is None
+
+    def test_off_plan_agent_defers_to_llm(self):
+        plan = make_plan("researcher", "reporter")
+        messages = [agent_message("planner", plan), agent_message("coder", "x")]
+        assert routing.advance_planned_step(build_state(messages, plan)) is None
+
+    def test_completed_plan_defers_to_llm(self):
+        plan = make_plan("researcher")
+        messages = [agent_message("planner", plan), agent_message("researcher", "ok")]
+        assert routing.advance_planned_step(build_state(messages, plan)) is None
+
+    def test_no_plan_defers_to_llm(self):
+        assert routing.advance_planned_step(build_state([HumanMessage(content="q")])) is None
+
+    def test_uses_latest_plan_after_replanning(self):
+        old_plan = make_plan("researcher", "reporter")
+        new_plan = make_plan("coder", "reporter")
+        messages = [
+            agent_message("planner", old_plan),
+            agent_message("researcher", "ok"),
+            agent_message("planner", new_plan),
+            agent_message("coder", "ok"),
+        ]
+        assert routing.advance_planned_step(build_state(messages, new_plan)) == "reporter"
+
+
+class TestSupervisorPreRouter:
+    def test_returns_rule_name_and_goto(self):
+        router = routing.SupervisorPreRouter()
+        state = build_state([agent_message("reporter", "# Report")])
+        assert router.route(state) == ("finish_after_reporter", "FINISH")
+        assert router.get_stats()["skip_rate"] == 1.0
+
+    def test_rejects_unknown_worker_and_previous_worker(self):
+        router = routing.SupervisorPreRouter(rules=[lambda state: "unknown"])
+        assert router.route(build_state([])) is None
+
+        router = routing.SupervisorPreRouter(rules=[lambda state: "coder"])
+        assert router.route(build_state([], next_agent="coder")) is None
+        assert router.get_stats()["llm_fallbacks"] == 1
+
+    def test_registered_rule_is_used(self):
+        router = routing.SupervisorPreRouter(rules=[])
+
+        def always_coder(state):
+            return "coder"
+
+        router.register(always_coder)
+        assert router.route(build_state([])) == ("always_coder", "coder")
+        assert router.get_stats()["rule_hits_by_rule"] == {"always_coder": 1}
+
+    def test_failing_rule_is_skipped(self):
+        def broken(state):
+            raise RuntimeError("boom")
+
+        router = routing.SupervisorPreRouter(rules=[broken, lambda state: "FINISH"])
+        assert router.route(build_state([]))[1] == "FINISH"
+
+    def test_disabled_router_always_defers(self):
+        router = routing.SupervisorPreRouter(enabled=False)
+        assert router.route(build_state([agent_message("reporter", "# Report")])) is None
+
+    def test_audit_records_disagreement(self, caplog):
+        router = routing.SupervisorPreRouter(audit_rate=1.0)
+        assert router.should_audit() is True
+        router.record_audit("finish_after_reporter", "FINISH", "coder")
+        router.record_audit("finish_after_reporter", "FINISH", "FINISH")
+        stats = router.get_stats()
+        assert stats["audits"] == 2
+        assert stats["disagreements"] == 1
+        assert "disagreement" in caplog.text
@@ -0,0 +1,155 @@
+"""
+Unit tests for per-workflow memoization of tool calls (src/tools/decorators.py).
+"""
+import asyncio
+
+from langchain_core.tools import BaseTool, tool
+
+from src.utils.tool_progress import TOOL_CACHE_HIT_EVENT
+from src.utils.workflow_context import (
+    WorkflowContext,
+    bind_workflow_context,
+    reset_workflow_context,
+)
+from tests.conftest import load_source
+
+# Importing `src.tools` pulls in every tool (and other unit tests stub it),
+# so load the decorators module on its own.
+decorators = load_source("tool_decorators_under_test", "src/tools/decorators.py")
+
+
+def _in_workflow(fn):
+    context = WorkflowContext(workflow_id="wf-1")
+    token = bind_workflow_context(context)
+    try:
+        return fn(), context
+    finally:
+        reset_workflow_context(token)
+
+
+def _counting_tool(memoize=True, result="ok"):
+    calls = []
+
+    @decorators.log_io(memoize=memoize)
+    def fake_search(query, max_results=5):
+        calls.append(query)
+        return f"{result} {len(calls)}"
+
+    return fake_search, calls
+
+
+class TestLogIoMemo:
+    def test_identical_calls_reuse_the_first_result(self):
+        fake_search, calls = _counting_tool()
+
+        results, context = _in_workflow(lambda: [
+            fake_search("llm agents"),
+            fake_search(" llm agents ", max_results=5),
+            fake_search(query="llm agents"),
+            fake_search("llm agents", max_results=10),
+        ])
+
+        assert results == ["ok 1", "ok 1", "ok 1", "ok 2"]
+        assert calls == ["llm agents", "llm agents"]
+        assert context.get_metrics()["tool_cache_hits"] == 2
+
+    def test_no_memo_outside_a_workflow(self):
+        fake_search, calls = _counting_tool()
+        fake_search("q")
+        fake_search("q")
+        assert len(calls) == 2
+
+    def test_workflows_do_not_share_results(self):
+        fake_search, calls = _counting_tool()
+        _in_workflow(lambda: fake_search("q"))
+        _in_workflow(lambda: fake_search("q"))
+        assert len(calls) == 2
+
+    def test_opted_out_tools_always_run(self):
+        fake_bash, calls = _counting_tool(memoize=False)
+        _in_workflow(lambda: [fake_bash("ls"), fake_bash("ls")])
+        assert len(calls) == 2
+
+    def test_failures_are_not_memoized(self):
+        fake_search, calls = _counting_tool(result="Failed to search.")
+        _in_workflow(lambda: [fake_search("q"), fake_search("q")])
+        assert len(calls) == 2
+
+
+def test_class_tools_are_memoized_unless_opted_out():
+    class EchoTool(BaseTool):
+        name: str = "echo"
+        description: str = "Echo."
+        calls: int = 0
+
+        def _run(self, text: str) -> str:
+            self.calls += 1
+            return text
+
+    memoized = decorators.create_logged_tool(EchoTool)()
+    opted_out = decorators.create_logged_tool(EchoTool, memoize=False)()
+
+    _in_workflow(lambda: [memoized.invoke({"text": "a"}) for _ in range(2)])
+    _in_workflow(lambda: [opted_out.invoke({"text": "a"}) for _ in range(2)])
+
+    assert memoized.calls == 1
+    assert opted_out.calls == 2
+
+
+def test_cache_hit_is_reported_on_the_tool_run():
+    @tool
+    @decorators.log_io
+    def lookup(key: str) -> str:
+        """Test tool."""
+        return key.upper()
+
+    async def collect():
+        events = []
+        for _ in range(2):
+            events.append([e async for e in lookup.astream_events({"key": "a"}, version="v2")])
+        return events
+
+    (first, second), _ = _in_workflow(lambda: asyncio.run(collect()))
+    assert not [e for e in first if e["event"] == "on_custom_event"]
+    hits = [e for e in second if e["event"] == "on_custom_event"]
+    assert [e["name"] for e in hits] == [TOOL_CACHE_HIT_EVENT]
+    assert hits[0]["run_id"] == second[0]["run_id"]
+
+
+def test_results_are_governed_before_memoization(monkeypatch):
+    seen = []
+
+    def fake_govern(tool_name, result, workflow_id):
+        seen.append((tool_name, workflow_id))
+        return result[:10]
+
+    monkeypatch.setattr(decorators.result_governor, "govern", fake_govern)
+    fake_search, calls = _counting_tool(result="x" * 100)
+
+    results, _ = _in_workflow(lambda: [fake_search("q"), fake_search("q")])
+    assert results == ["x" * 10, "x" * 10]
+    assert seen == [("fake_search", "wf-1")]
+
+
+def test_tools_do_not_start_after_an_abort():
+    fake_search, calls = _counting_tool()
+
+    def run():
+        from src.utils.workflow_context import get_workflow_context
+        get_workflow_context().cancel()
+        return fake_search("q")
+
+    result, _ = _in_workflow(run)
+    assert result.startswith("Failed to run fake_search")
+    assert calls == []
+
+
+def test_timeouts_become_error_results():
+    @decorators.log_io(memoize=False)
+    def slow_browse(instruction):
+        raise TimeoutError("Background task did not finish before the tool's deadline")
+
+    result, _ = _in_workflow(lambda: slow_browse("open example.com"))
+    assert result == (
+        "Failed to run slow_browse. Error: Background task did not finish before the tool's deadline"
+    )
@@ -0,0 +1,106 @@
+"""
+Unit tests for restricting server-side fetches to public addresses
+(src/crawler/url_guard.py) and their use by the direct client.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from tests.conftest import load_crawler_module
+
+url_guard = load_crawler_module("url_guard")
+direct_client = load_crawler_module("direct_client")
+
+HOSTS = {
+    "example.com": ["93.184.216.34"],
+    "intranet.example.com": ["10.1.2.3"],
+    "dual.example.com": ["93.184.216.34", "::1"],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    async def resolve(host, port):
+        return HOSTS[host]
+
+    monkeypatch.setattr(url_guard, "resolve_host", resolve)
+
+
+@pytest.mark.parametrize("address, public", [
+    ("93.184.216.34", True),
+    ("2606:2800:220:1:248:1893:25c8:1946", True),
+    ("127.0.0.1", False),
+    ("10.0.0.1", False),
+    ("172.16.5.4", False),
+    ("192.168.1.1", False),
+    ("169.254.169.254", False),
+    ("0.0.0.0", False),
+    ("::1", False),
+    ("fe80::1%eth0", False),
+    ("::ffff:127.0.0.1", False),
+])
+def test_is_public_address(address, public):
+    assert url_guard.is_public_address(address) is public
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/api",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/",
+    "https://intranet.example.com/wiki",
+    "https://dual.example.com/",
+    "file:///etc/passwd",
+])
+def test_non_public_urls_are_refused(url):
+    with pytest.raises(url_guard.UnsafeURLError):
+        asyncio.run(url_guard.check_url(url, allow_private=False))
+
+
+def test_public_urls_and_the_opt_out_are_allowed():
+    asyncio.run(url_guard.check_url("https://example.com/page", allow_private=False))
+    asyncio.run(url_guard.check_url("https://intranet.example.com/wiki", allow_private=True))
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_redirects_are_checked_before_they_are_followed():
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.host)
+        return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data"})
+
+    with pytest.raises(url_guard.UnsafeURLError):
+        asyncio.run(url_guard.guarded_request(_client(handler), "GET", "https://example.com/", allow_private=False))
+    assert requested == ["example.com"]
+
+
+def test_public_redirects_are_followed():
+    def handler(request):
+        if request.url.path == "/old":
+            return httpx.Response(301, headers={"Location": "/new"})
+        return httpx.Response(200, text="moved here")
+
+    response = asyncio.run(
+        url_guard.guarded_request(_client(handler), "GET", "https://example.com/old", allow_private=False)
+    )
+    assert response.status_code == 200 and str(response.url) == "https://example.com/new"
+
+
+def test_direct_client_does_not_fetch_private_pages(monkeypatch):
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200, text="<html></html>")
+
+    monkeypatch.setattr(direct_client, "get_http_client", lambda: _client(handler))
+    monkeypatch.setattr(url_guard, "CRAWLER_ALLOW_PRIVATE_URLS", False)
+    client = direct_client.DirectClient()
+
+    assert asyncio.run(client.afetch("http://127.0.0.1:6379/")) is None
+    assert asyncio.run(client.afetch("https://example.com/")).html == "<html></html>"
+    assert requested == ["https://example.com/"]
@@ -0,0 +1,17 @@
+"""
+Unit tests for reading the user from an Authorization header (src/services/user_service.py).
+"""
+from src.services.user_service import UserService
+
+
+def test_bearer_header_yields_the_user_id():
+    token = UserService.generate_token(42, "alice")
+    assert UserService.get_user_id_from_authorization(f"Bearer {token}") == 42
+
+
+def test_missing_or_malformed_headers_yield_no_user():
+    token = UserService.generate_token(42, "alice")
+    assert UserService.get_user_id_from_authorization(None) is None
+    assert UserService.get_user_id_from_authorization("") is None
+    assert UserService.get_user_id_from_authorization(token) is None
+    assert UserService.get_user_id_from_authorization("Bearer not-a-jwt") is None
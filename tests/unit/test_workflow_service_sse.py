@@ -10,6 +10,7 @@ import asyncio
 import sys
 import types
 import pytest
+from hypothesis import given, strategies as st
 from unittest.mock import MagicMock, AsyncMock, patch
 
 
@@ -75,6 +76,8 @@ def _setup_module_mocks():
 
 _setup_module_mocks()
 
+from src.service.handoff import HandoffPrefixMatcher
+
 
 @pytest.fixture
 def mock_workflow_service():
@@ -121,9 +124,7 @@ class TestAgentNameInjection:
             team_members = ["researcher", "coder", "browser"]
 
         streaming_llm_agents = [*team_members, "planner", "coordinator"]
-        MAX_CACHE_SIZE = 3
-        coordinator_cache = []
-        is_handoff_case = False
+        coordinator_matcher = HandoffPrefixMatcher()
         yielded = []
 
         for event in stream_events:
@@ -158,36 +159,18 @@ class TestAgentNameInjection:
                 yielded.append(ydata)
             else:
                 if node == "coordinator":
-                    if len(coordinator_cache) < MAX_CACHE_SIZE:
-                        coordinator_cache.append(content)
-                        cached_content = "".join(coordinator_cache)
-                        if cached_content.startswith("handoff"):
-                            is_handoff_case = True
-                            continue
-                        if len(coordinator_cache) < MAX_CACHE_SIZE:
-                            continue
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "agent_name": node,
-                                "message_id": chunk_id,
-                                "delta": {"content": cached_content},
-                            },
-                        }
-                        yielded.append(ydata)
-                    elif not is_handoff_case:
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "agent_name": node,
-                                "message_id": chunk_id,
-                                "delta": {"content": content},
-                            },
-                        }
-                        yielded.append(ydata)
-                    else:
-                        # is_handoff_case=True: suppress all coordinator tokens
+                    content = coordinator_matcher.feed(content)
+                    if not content:
                         continue
+                    ydata = {
+                        "event": "message",
+                        "data": {
+                            "agent_name": node,
+                            "message_id": chunk_id,
+                            "delta": {"content": content},
+                        },
+                    }
+                    yielded.append(ydata)
                 else:
                     ydata = {
                         "event": "message",
@@ -255,47 +238,35 @@ class TestCoordinatorHandoffFilter:
 
     def _run_coordinator_logic(self, coordinator_tokens):
         """运行 coordinator token 处理逻辑，返回 yielded 事件"""
-        MAX_CACHE_SIZE = 3
-        coordinator_cache = []
-        is_handoff_case = False
+        coordinator_matcher = HandoffPrefixMatcher()
         yielded = []
 
         for token, chunk_id in coordinator_tokens:
-            content = token
-            node = "coordinator"
-
-            if len(coordinator_cache) < MAX_CACHE_SIZE:
-                coordinator_cache.append(content)
-                cached_content = "".join(coordinator_cache)
-                if cached_content.startswith("handoff"):
-                    is_handoff_case = True
-                    continue
-                if len(coordinator_cache) < MAX_CACHE_SIZE:
-                    continue
-                ydata = {
-                    "event": "message",
-                    "data": {
-                        "agent_name": node,
-                        "message_id": chunk_id,
-                        "delta": {"content": cached_content},
-                    },
-                }
-                yielded.append(ydata)
-            elif not is_handoff_case:
-                ydata = {
-                    "event": "message",
-                    "data": {
-                        "agent_name": node,
-                        "message_id": chunk_id,
-                        "delta": {"content": content},
-                    },
-                }
-                yielded.append(ydata)
-            else:
-                # is_handoff_case=True: suppress
+            content = coordinator_matcher.feed(token)
+            if not content:
                 continue
-
-        return yielded, is_handoff_case
+            yielded.append({
+                "event": "message",
+                "data": {
+                    "agent_name": "coordinator",
+                    "message_id": chunk_id,
+                    "delta": {"content": content},
+                },
+            })
+
+        # on_chat_model_end: 释放仍可能是 handoff 前缀的缓冲内容
+        pending = coordinator_matcher.flush()
+        if pending:
+            yielded.append({
+                "event": "message",
+                "data": {
+                    "agent_name": "coordinator",
+                    "message_id": coordinator_tokens[-1][1],
+                    "delta": {"content": pending},
+                },
+            })
+
+        return yielded, coordinator_matcher.is_handoff
 
     def test_handoff_suppresses_all_coordinator_tokens(self):
         """验证 handoff 时零个 coordinator token 事件被 yield (Requirement 8.3)"""
@@ -337,18 +308,20 @@ class TestCoordinatorHandoffFilter:
         yielded, is_handoff = self._run_coordinator_logic(tokens)
 
         assert is_handoff is False
-        # 前3个 token 被缓存，第3个时发送 cached_content，之后每个 token 单独发送
-        assert len(yielded) >= 1
+        # 首个 token 不可能是 handoff 前缀，应立即发送，不做额外缓存
+        assert [evt["data"]["message_id"] for evt in yielded] == [
+            "id-1", "id-2", "id-3", "id-4", "id-5"
+        ]
         for evt in yielded:
             assert evt["data"]["agent_name"] == "coordinator"
 
     def test_handoff_case_suppresses_tokens_after_cache_full(self):
-        """验证 is_handoff_case=True 时，cache 满后的 token 也被过滤"""
+        """验证识别为 handoff 之后的 token 也被过滤"""
         # 前两个 token 合起来是 "ha"，第三个是 "ndoff..."
         tokens = [
             ("ha", "id-1"),
             ("nd", "id-2"),
-            ("off_to_planner", "id-3"),  # 第3个 token 使 cached_content = "handoff_to_planner"
+            ("off_to_planner", "id-3"),  # 第3个 token 拼成完整的 "handoff_to_planner"
             ("extra token 1", "id-4"),
             ("extra token 2", "id-5"),
         ]
@@ -357,3 +330,54 @@ class TestCoordinatorHandoffFilter:
         assert is_handoff is True
         assert len(yielded) == 0, \
             f"handoff 后所有 token 都应被过滤，但得到了 {len(yielded)} 个"
+
+    def test_handoff_prefix_is_released_when_stream_ends(self):
+        """验证回复恰好是 handoff 前缀（如 "hand"）时，结束后仍会完整发送"""
+        tokens = [("ha", "id-1"), ("nd", "id-2")]
+        yielded, is_handoff = self._run_coordinator_logic(tokens)
+
+        assert is_handoff is False
+        assert "".join(evt["data"]["delta"]["content"] for evt in yielded) == "hand"
+
+    def test_leading_whitespace_before_handoff(self):
+        """验证 handoff 前的空白不会导致漏判"""
+        tokens = [("\n", "id-1"), ("handoff_to", "id-2"), ("_planner", "id-3")]
+        yielded, is_handoff = self._run_coordinator_logic(tokens)
+
+        assert is_handoff is True
+        assert yielded == []
+
+    def test_diverging_prefix_is_released_in_order(self):
+        """验证以 "hand" 开头的普通回复不会丢失被缓冲的内容"""
+        tokens = [("hand", "id-1"), ("le it", "id-2"), (" now", "id-3")]
+        yielded, is_handoff = self._run_coordinator_logic(tokens)
+
+        assert is_handoff is False
+        assert [evt["data"]["delta"]["content"] for evt in yielded] == ["handle it", " now"]
+
+    @given(
+        text=st.sampled_from([
+            "handoff_to_planner",
+            "Sure, I can help with that.",
+            "hand",
+            "handle this yourself",
+            "你好，我是 FreeTop",
+        ]),
+        cuts=st.lists(st.integers(min_value=1, max_value=30), max_size=10),
+    )
+    def test_output_is_independent_of_chunking(self, text, cuts):
+        """验证无论 token 如何切分，输出内容与 handoff 判定保持一致"""
+        chunks = []
+        position = 0
+        for cut in sorted(set(cuts)):
+            if position < cut < len(text):
+                chunks.append(text[position:cut])
+                position = cut
+        chunks.append(text[position:])
+        tokens = [(chunk, f"id-{i}") for i, chunk in enumerate(chunks)]
+
+        yielded, is_handoff = self._run_coordinator_logic(tokens)
+
+        assert is_handoff is (text == "handoff_to_planner")
+        expected = "" if is_handoff else text
+        assert "".join(evt["data"]["delta"]["content"] for evt in yielded) == expected
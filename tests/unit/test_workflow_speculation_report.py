@@ -0,0 +1,121 @@
+"""
+Unit tests for the speculation report in the final workflow state
+(src/service/workflow_service.py).
+"""
+import asyncio
+import sys
+import threading
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tests.conftest import load_source
+
+# Importing the src.graph package would build the whole graph; load the file directly.
+speculation = load_source("speculation_under_test", "src/graph/speculation.py")
+
+
+def _stub(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+@pytest.fixture
+def workflow_service():
+    graph = MagicMock()
+    with patch.dict(sys.modules, {
+        "src.graph": _stub("src.graph", build_graph=MagicMock(return_value=graph)),
+        "src.graph.speculation": speculation,
+        "src.tools.browser": _stub("src.tools.browser", browser_tool=None),
+        "src.tools.smart_browser": _stub("src.tools.smart_browser", smart_browser_tool=None),
+        "src.llms.llm": _stub("src.llms.llm", get_llm_by_type=MagicMock()),
+        "langchain_community.adapters.openai": _stub(
+            "langchain_community.adapters.openai",
+            convert_message_to_dict=lambda m: {"role": "assistant", "content": str(m)},
+        ),
+    }):
+        module = load_source("workflow_service_under_test", "src/service/workflow_service.py")
+        yield module, graph
+
+
+def _graph_events(speculated):
+    """A graph run whose planner was speculated and used."""
+
+    async def astream_events(inputs, **kwargs):
+        workflow_id = inputs["workflow_id"]
+        speculation.start_speculation(workflow_id, "planner", lambda cancel, cbs: "plan")
+        task = speculation.take_speculation(workflow_id)
+        task.result(timeout=5)
+        speculation.record_speculation_used(workflow_id, task, waited=0.0)
+        speculated.append(workflow_id)
+        yield {
+            "event": "on_chain_end",
+            "name": "LangGraph",
+            "run_id": "run-1",
+            "data": {"output": {"messages": ["done"]}},
+            "metadata": {},
+        }
+
+    return astream_events
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def test_finished_workflow_reports_speculation(workflow_service):
+    module, graph = workflow_service
+    speculated = []
+    graph.astream_events = _graph_events(speculated)
+
+    events = asyncio.run(_collect(module.run_agent_workflow(
+        [{"role": "user", "content": "hi"}], team_members=["coder"], speculative_planning=True,
+    )))
+
+    final_state = events[-1]
+    assert final_state["event"] == "final_session_state"
+    assert final_state["data"]["speculation"]["started"] == 1
+    assert final_state["data"]["speculation"]["used"] == 1
+    assert speculated[0] not in speculation._reports
+
+
+def test_aborted_workflow_drops_its_report(workflow_service):
+    module, graph = workflow_service
+    speculated = []
+    graph.astream_events = _graph_events(speculated)
+    abort_event = asyncio.Event()
+    abort_event.set()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_collect(module.run_agent_workflow(
+            [{"role": "user", "content": "hi"}], team_members=["coder"], abort_event=abort_event,
+        )))
+
+    assert speculated and speculated[0] not in speculation._reports
+
+
+def test_pending_speculation_is_cancelled_when_the_workflow_fails(workflow_service):
+    module, graph = workflow_service
+    release = threading.Event()
+
+    async def failing_events(inputs, **kwargs):
+        def work(cancel_event, callbacks):
+            while not release.wait(0.01):
+                if cancel_event.is_set():
+                    raise speculation.SpeculationCancelled()
+
+        failing_events.task = speculation.start_speculation(inputs["workflow_id"], "planner", work)
+        raise RuntimeError("graph failed")
+        yield
+
+    graph.astream_events = failing_events
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(_collect(module.run_agent_workflow(
+                [{"role": "user", "content": "hi"}], team_members=["coder"],
+            )))
+        assert failing_events.task.cancel_event.is_set()
+    finally:
+        release.set()
@@ -4,6 +4,8 @@ import { useState, useEffect } from "react";
 
 import { cn } from "~/core/utils";
 
+import { retryRecordingLoad } from "../_utils/recording";
+
 import { ContentDetailModal } from "./ContentDetailModal";
 
 
@@ -306,10 +308,8 @@ export function BrowserEmbedView({ className }: BrowserEmbedViewProps) {
                             naturalWidth: e.currentTarget.naturalWidth,
                             naturalHeight: e.currentTarget.naturalHeight
                           });
-                          // 尝试重新加载
-                          setTimeout(() => {
-                            e.currentTarget.src = e.currentTarget.src + '?t=' + Date.now();
-                          }, 1000);
+                          // 录像可能仍在后台生成，稍后重新加载
+                          retryRecordingLoad(e.currentTarget);
                         }}
                       />
                       {/* 悬停时显示的放大图标 */}
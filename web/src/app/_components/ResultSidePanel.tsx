@@ -6,6 +6,8 @@ import { useState } from "react";
 import { cn } from "~/core/utils";
 import type { ToolCallTask } from "~/core/workflow";
 
+import { retryRecordingLoad } from "../_utils/recording";
+
 import { ContentDetailModal } from "./ContentDetailModal";
 import { EnhancedBrowserView } from "./EnhancedBrowserView";
 import { EnhancedSearchResults } from "./EnhancedSearchResults";
@@ -172,6 +174,8 @@ export function ResultSidePanel({ task, className }: ResultSidePanelProps) {
                       height={600}
                       unoptimized
                       className="max-w-full h-auto rounded-lg shadow-lg transition-transform group-hover:scale-105"
+                      // 录像可能仍在后台生成，稍后重新加载
+                      onError={(e) => retryRecordingLoad(e.currentTarget)}
                     />
                     {/* 悬停时显示的放大图标 */}
                     <div className="absolute inset-0 flex items-center justify-center bg-black bg-opacity-0 group-hover:bg-opacity-20 transition-all duration-200 rounded-lg">
@@ -0,0 +1,24 @@
+// 浏览器操作录像在任务结束后由后台渲染：服务端会短暂等待，仍未生成时返回 202，
+// 图片加载失败，这里按指数退避重新请求
+
+export const RECORDING_MAX_RETRIES = 5;
+const RECORDING_RETRY_DELAY_BASE = 1000;
+
+/**
+ * 重新加载尚未生成的录像
+ * @returns 是否安排了重试（超过次数上限时返回 false）
+ */
+export function retryRecordingLoad(img: HTMLImageElement, maxRetries: number = RECORDING_MAX_RETRIES): boolean {
+  const attempt = Number(img.dataset.retry ?? '0') + 1;
+  if (attempt > maxRetries) {
+    return false;
+  }
+  img.dataset.retry = String(attempt);
+  // React 事件对象在回调结束后会被回收，这里只持有元素本身
+  const url = new URL(img.src, window.location.href);
+  url.searchParams.set('retry', String(attempt));
+  setTimeout(() => {
+    img.src = url.toString();
+  }, RECORDING_RETRY_DELAY_BASE * Math.pow(2, attempt - 1));
+  return true;
+}